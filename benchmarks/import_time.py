@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Cold-start import cost of the entry points, measured with `python -X importtime`
+# in fresh interpreters. Each target has a budget and a list of modules it must
+# not load at import time; sockets are blocked during the import so any network
+# I/O fails the run. Exits 1 when a target breaks its budget or rules.
+#
+#   python -m benchmarks.import_time
+#   python -m benchmarks.import_time --runs 5 --out imports.json
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# heavy dependencies that should only load on first use
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "onnxruntime",
+    "pymilvus",
+    "ollama",
+    "faiss",
+    "requests",
+    "bs4",
+    "fitz",
+]
+
+# module -> (budget ms for the whole import, heavy modules it is allowed to load)
+TARGETS: Dict[str, tuple[float, List[str]]] = {
+    "src.api.main": (1500.0, []),
+    "src.scrapers.indiacode.cli": (150.0, []),
+    "src.retrieval.hybrid_retriever": (600.0, []),
+    "src.pipelines.indexer": (600.0, []),
+    "src.llm.answerer": (600.0, []),
+}
+
+_NO_NETWORK = """
+import os, socket, sys
+
+def _deny(*args, **kwargs):
+    sys.stderr.write("NETWORK-IO-AT-IMPORT %r\\n" % (args,))
+    sys.stderr.flush()
+    os._exit(3)
+
+socket.socket.connect = _deny
+socket.create_connection = _deny
+socket.getaddrinfo = _deny
+import {module}
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    # "import time:  self [us] | cumulative | imported package" lines
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cum_us)})
+    return rows
+
+
+def measure(module: str, cwd: str) -> Dict[str, Any]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(p for p in (str(REPO_ROOT), os.environ.get("PYTHONPATH", "")) if p),
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _NO_NETWORK.format(module=module)],
+        capture_output=True,
+        text=True,
+        cwd=cwd,  # anything written at import lands in the temp dir, not in data/
+        env=env,
+    )
+    rows = parse_importtime(proc.stderr)
+    top = next((r for r in reversed(rows) if r["module"] == module), None)
+    loaded = {r["module"] for r in rows}
+    error = None
+    if "NETWORK-IO-AT-IMPORT" in proc.stderr:
+        error = "network I/O at import"
+    elif proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return {
+        "ms": round(top["cumulative_us"] / 1000, 1) if top else None,
+        "modules": len(rows),
+        "heavy": sorted(m for m in HEAVY_MODULES if m in loaded),
+        "slowest": sorted(rows, key=lambda r: r["self_us"], reverse=True)[:10],
+        "error": error,
+    }
+
+
+def run(targets: Dict[str, tuple[float, List[str]]], runs: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="lawmate-import-") as tmp:
+        for module, (budget_ms, allowed) in targets.items():
+            samples = [measure(module, tmp) for _ in range(runs)]
+            last = samples[-1]
+            times = [s["ms"] for s in samples if s["ms"] is not None]
+            median_ms = round(statistics.median(times), 1) if times else None
+            problems = [s["error"] for s in samples if s["error"]][:1]
+            disallowed = [m for m in last["heavy"] if m not in allowed]
+            if disallowed:
+                problems.append(f"loads {', '.join(disallowed)}")
+            if median_ms is not None and median_ms > budget_ms:
+                problems.append(f"{median_ms} ms over the {budget_ms:.0f} ms budget")
+            report[module] = {
+                "median_ms": median_ms,
+                "min_ms": min(times) if times else None,
+                "budget_ms": budget_ms,
+                "modules": last["modules"],
+                "heavy": last["heavy"],
+                "slowest_self": [
+                    {"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1)} for r in last["slowest"]
+                ],
+                "problems": problems,
+            }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Import-time budget check for the CLI and API entry points")
+    ap.add_argument("--runs", type=int, default=3, help="fresh interpreters per target, the median is reported")
+    ap.add_argument("--module", action="append", help="only these targets (repeatable)")
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    targets = {m: TARGETS.get(m, (float("inf"), [])) for m in args.module} if args.module else TARGETS
+    report = run(targets, args.runs)
+
+    failed = False
+    for module, r in report.items():
+        status = "FAIL" if r["problems"] else "ok"
+        failed = failed or bool(r["problems"])
+        slowest = ", ".join(f"{s['module']}={s['self_ms']}" for s in r["slowest_self"][:3])
+        print(f"{status:4} {module:34} {r['median_ms']} ms (budget {r['budget_ms']:.0f})  {r['modules']} modules  slowest: {slowest}")
+        for problem in r["problems"]:
+            print(f"     - {problem}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stubs import load_jsonl
+
+# Open-loop load test for POST /ask. Starts src.api.main:app in-process under
+# uvicorn with stubbed dependencies (fixed-result vector store, lexical
+# cross-encoder with a per-pair cost, fake Ollama at a set tokens/s) and fires
+# Poisson arrivals at each requested rate, whether or not earlier requests have
+# finished. Per rate it reports latency percentiles, status/error counts, the
+# achieved throughput and the per-stage breakdown from X-Timing, which shows
+# where the time goes once the service saturates.
+#
+#   python -m benchmarks.loadtest --rates 2,5,10,20 --duration 20 --tokens-per-s 40
+#   LAW_MATE_LLM_CONCURRENCY=4 python -m benchmarks.loadtest --rates 10 --out llm4.json
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_QUESTIONS = BENCH_DIR / "data" / "queries.jsonl"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _parse_timing(header: str) -> Dict[str, float]:
+    # "embed;dur=3.2, vector_search;dur=11.0, total;dur=40.1" -> {stage: ms}
+    out: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, dur = part.strip().partition(";dur=")
+        if name and dur:
+            out[name] = float(dur)
+    return out
+
+
+class ServerThread:
+    # uvicorn on its own thread and event loop, so the load generator does not
+    # share a loop with the service it measures
+
+    def __init__(self, app: Any, port: int) -> None:
+        import uvicorn
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="loadtest-server", daemon=True)
+
+    def __enter__(self) -> "ServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + 60
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def _one_request(client, question: str, body: Dict[str, Any], results: List[Dict[str, Any]], inflight: List[int]) -> None:
+    inflight[0] += 1
+    inflight[1] = max(inflight[1], inflight[0])
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {}
+    try:
+        resp = await client.post("/ask", json={**body, "question": question}, headers={"X-Timing": "1"})
+        record["status"] = resp.status_code
+        record["stages"] = _parse_timing(resp.headers.get("x-timing", ""))
+    except Exception as exc:  # timeouts, resets: counted, not fatal
+        record["status"] = type(exc).__name__
+    finally:
+        inflight[0] -= 1
+    record["latency_s"] = time.perf_counter() - t0
+    results.append(record)
+
+
+async def run_level(
+    base_url: str,
+    questions: List[str],
+    *,
+    rate: float,
+    duration_s: float,
+    body: Dict[str, Any],
+    timeout_s: float,
+    seed: int,
+) -> Dict[str, Any]:
+    import httpx
+
+    from src.utils.stats import latency_summary
+
+    rng = random.Random(seed)
+    results: List[Dict[str, Any]] = []
+    inflight = [0, 0]  # current, peak
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+        tasks = []
+        started = time.perf_counter()
+        next_at = 0.0
+        n = 0
+        while True:
+            # exponential inter-arrival times: arrivals do not wait for responses
+            next_at += rng.expovariate(rate)
+            if next_at >= duration_s:
+                break
+            delay = started + next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # a counter suffix keeps every question distinct, so no cache answers it
+            question = f"{questions[n % len(questions)]} [{seed}-{n}]"
+            tasks.append(asyncio.create_task(_one_request(client, question, body, results, inflight)))
+            n += 1
+        sent_s = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+        drained_s = time.perf_counter() - started
+
+    statuses = Counter(str(r["status"]) for r in results)
+    ok = [r for r in results if r["status"] == 200]
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for r in ok:
+        for name, ms in r.get("stages", {}).items():
+            stages[name].append(ms / 1000)
+    return {
+        "offered_rps": rate,
+        "sent": len(results),
+        "sent_rps": round(len(results) / sent_s, 2) if sent_s > 0 else 0.0,
+        "ok": len(ok),
+        "goodput_rps": round(len(ok) / drained_s, 2) if drained_s > 0 else 0.0,
+        "error_rate": round(1 - len(ok) / len(results), 4) if results else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "peak_in_flight": inflight[1],
+        "latency_ok": latency_summary([r["latency_s"] for r in ok]),
+        "latency_all": latency_summary([r["latency_s"] for r in results]),
+        "stages_ok": {name: latency_summary(v) for name, v in sorted(stages.items())},
+    }
+
+
+def _print_level(level: Dict[str, Any]) -> None:
+    lat = level["latency_ok"]
+    slowest = sorted(
+        ((name, s["p95_ms"]) for name, s in level["stages_ok"].items() if name != "total"),
+        key=lambda kv: kv[1],
+        reverse=True,
+    )[:3]
+    print(
+        f"{level['offered_rps']:>7.1f} rps  sent={level['sent']:<5} ok={level['ok']:<5} "
+        f"err={level['error_rate']:.1%}  p50={lat['p50_ms']:.0f} p95={lat['p95_ms']:.0f} p99={lat['p99_ms']:.0f} ms  "
+        f"goodput={level['goodput_rps']} rps  peak_in_flight={level['peak_in_flight']}  "
+        f"p95 by stage: {', '.join(f'{n}={ms:.0f}' for n, ms in slowest)}  {level['statuses']}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Open-loop load test for /ask against stubbed dependencies")
+    ap.add_argument("--rates", default="1,2,5,10", help="comma-separated arrival rates (requests/s), one level each")
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds of arrivals per level")
+    ap.add_argument("--questions", default=str(DEFAULT_QUESTIONS), help="JSONL with a question field")
+    ap.add_argument("--corpus", default=str(BENCH_DIR / "data" / "corpus.jsonl"), help="chunks the fake store returns")
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--rerank-k", type=int, default=5)
+    ap.add_argument("--embed-cost-ms", type=float, default=5.0, help="stub embedder cost per text")
+    ap.add_argument("--search-cost-ms", type=float, default=10.0, help="fake vector store cost per query")
+    ap.add_argument("--rerank-cost-ms", type=float, default=2.0, help="stub cross-encoder cost per pair")
+    ap.add_argument("--tokens-per-s", type=float, default=50.0, help="fake LLM generation rate")
+    ap.add_argument("--prefill-ms", type=float, default=50.0, help="fake LLM prompt processing time")
+    ap.add_argument("--timeout", type=float, default=120.0, help="client timeout per request")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--max-error-rate", type=float, default=0.01, help="levels above this count as saturated")
+    ap.add_argument("--slo-p95-ms", type=float, default=0.0, help="levels with a higher p95 count as saturated")
+    ap.add_argument("--out", help="write the JSON report here")
+    args = ap.parse_args(argv)
+
+    rates = [float(r) for r in args.rates.split(",") if r.strip()]
+    questions = [q["question"] for q in load_jsonl(args.questions)]
+
+    # caches would answer repeated work and hide the service cost; the
+    # pool/scheduler sizes still come from the usual LAW_MATE_* variables
+    os.environ.setdefault("LAW_MATE_ANSWER_CACHE_SIZE", "0")
+    os.environ.setdefault("LAW_MATE_RETRIEVAL_CACHE_DB", "")
+    os.environ.setdefault("LAW_MATE_RERANK_CACHE_SIZE", "0")
+
+    from benchmarks.stubs import install_fake_llm, install_fixed_store, install_stub_models
+
+    with tempfile.TemporaryDirectory(prefix="lawmate-load-") as tmp:
+        install_stub_models(embed_cost_s=args.embed_cost_ms / 1000, rerank_cost_s=args.rerank_cost_ms / 1000)
+        install_fixed_store(args.corpus, tmp, search_cost_s=args.search_cost_ms / 1000)
+        install_fake_llm(tokens_per_s=args.tokens_per_s, prefill_s=args.prefill_ms / 1000)
+
+        from src.api import concurrency
+        from src.api.main import app
+
+        port = _free_port()
+        levels = []
+        with ServerThread(app, port):
+            base_url = f"http://127.0.0.1:{port}"
+            for i, rate in enumerate(rates):
+                level = asyncio.run(run_level(
+                    base_url,
+                    questions,
+                    rate=rate,
+                    duration_s=args.duration,
+                    body={"top_k": args.top_k, "rerank_k": args.rerank_k},
+                    timeout_s=args.timeout,
+                    seed=args.seed + i,
+                ))
+                _print_level(level)
+                levels.append(level)
+
+    def saturated(level: Dict[str, Any]) -> bool:
+        if level["error_rate"] > args.max_error_rate:
+            return True
+        return bool(args.slo_p95_ms) and level["latency_ok"]["p95_ms"] > args.slo_p95_ms
+
+    ok_levels = [lv["offered_rps"] for lv in levels if not saturated(lv)]
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "service": {
+            "max_in_flight": concurrency.MAX_IN_FLIGHT,
+            "retrieval_workers": concurrency.RETRIEVAL_WORKERS,
+            "rerank_workers": concurrency.RERANK_WORKERS,
+            "llm_concurrency": concurrency.LLM_CONCURRENCY,
+            "llm_queue": concurrency.LLM_QUEUE,
+        },
+        "levels": levels,
+        "max_sustained_rps": max(ok_levels) if ok_levels else None,
+    }
+    print(f"max sustained rate: {report['max_sustained_rps']} rps")
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.stubs import load_jsonl
+
+# Replays labelled questions through search_similar_chunks + rerank_chunks and
+# reports recall@k, MRR, stage latency percentiles and QPS as JSON, so two runs
+# can be diffed. By default it is fully offline: the bundled corpus is indexed
+# into a temp local store with stub models (benchmarks/stubs.py). --live uses
+# the configured backend and real models instead.
+#
+#   python -m benchmarks.retrieval_bench --concurrency 8 --out before.json
+#   python -m benchmarks.retrieval_bench --concurrency 8 --out after.json --baseline before.json
+#   python -m benchmarks.retrieval_bench --live --queries my_queries.jsonl
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_QUERIES = BENCH_DIR / "data" / "queries.jsonl"
+DEFAULT_CORPUS = BENCH_DIR / "data" / "corpus.jsonl"
+RECALL_KS = (1, 3, 5, 10)
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCH_DIR)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _matches(chunk: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    # an expected entry without section_id accepts any section of the doc
+    if chunk.get("doc_id") != expected["doc_id"]:
+        return False
+    return expected.get("section_id") is None or chunk.get("section_id") == expected["section_id"]
+
+
+def relevance(chunks: List[Dict[str, Any]], expected: List[Dict[str, Any]], k: int) -> Dict[str, float]:
+    # recall counts distinct expected sections found in the top k;
+    # reciprocal rank is for the first chunk matching any of them
+    top = chunks[:k]
+    found = sum(1 for e in expected if any(_matches(c, e) for c in top))
+    rr = 0.0
+    for rank, c in enumerate(chunks, start=1):
+        if any(_matches(c, e) for e in expected):
+            rr = 1.0 / rank
+            break
+    return {"recall": found / len(expected) if expected else 0.0, "rr": rr}
+
+
+def run_query(item: Dict[str, Any], top_k: int, rerank_k: int, rerank: bool) -> Dict[str, Any]:
+    from src.retrieval.hybrid_retriever import search_similar_chunks
+    from src.retrieval.ranker import rerank_chunks
+
+    t0 = time.perf_counter()
+    initial = search_similar_chunks(item["question"], top_k=top_k)
+    t1 = time.perf_counter()
+    # rerank_chunks writes rerank_score into the dicts, keep the search order separately
+    final = rerank_chunks(item["question"], [dict(c) for c in initial], top_k=rerank_k) if rerank else initial[:rerank_k]
+    t2 = time.perf_counter()
+    return {
+        "question": item["question"],
+        "search": [{"doc_id": c["doc_id"], "section_id": c["section_id"]} for c in initial],
+        "final": [{"doc_id": c["doc_id"], "section_id": c["section_id"]} for c in final],
+        "expected": item["expected"],
+        "search_s": t1 - t0,
+        "rerank_s": t2 - t1,
+        "total_s": t2 - t0,
+    }
+
+
+def _quality(results: List[Dict[str, Any]], field: str, ks: List[int]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    n = len(results) or 1
+    for k in ks:
+        out[f"recall@{k}"] = round(sum(relevance(r[field], r["expected"], k)["recall"] for r in results) / n, 4)
+    out["mrr"] = round(sum(relevance(r[field], r["expected"], len(r[field]))["rr"] for r in results) / n, 4)
+    return out
+
+
+def summarize(results: List[Dict[str, Any]], wall_s: float, top_k: int, rerank_k: int) -> Dict[str, Any]:
+    from src.utils.stats import latency_summary
+
+    return {
+        "queries": len(results),
+        "wall_s": round(wall_s, 3),
+        "qps": round(len(results) / wall_s, 2) if wall_s > 0 else 0.0,
+        "search": _quality(results, "search", [k for k in RECALL_KS if k <= top_k]),
+        "reranked": _quality(results, "final", [k for k in RECALL_KS if k <= rerank_k]),
+        "latency": {
+            stage: latency_summary([r[f"{stage}_s"] for r in results]) for stage in ("search", "rerank", "total")
+        },
+    }
+
+
+def run_benchmark(
+    items: List[Dict[str, Any]],
+    *,
+    top_k: int,
+    rerank_k: int,
+    concurrency: int,
+    repeat: int = 1,
+    rerank: bool = True,
+) -> tuple[List[Dict[str, Any]], float]:
+    work = [item for _ in range(repeat) for item in items]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda item: run_query(item, top_k, rerank_k, rerank), work))
+    return results, time.perf_counter() - t0
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    # one line per headline metric that moved, "metric: old -> new (+delta)"
+    def flat(r: Dict[str, Any]) -> Dict[str, float]:
+        out = {"qps": r["qps"]}
+        for part in ("search", "reranked"):
+            out.update({f"{part}.{k}": v for k, v in r[part].items()})
+        for stage, lat in r["latency"].items():
+            out.update({f"latency.{stage}.{k}": lat[k] for k in ("p50_ms", "p95_ms", "p99_ms")})
+        return out
+
+    old, new = flat(baseline), flat(report)
+    return [
+        f"{key}: {old[key]} -> {value} ({value - old[key]:+.4g})"
+        for key, value in new.items()
+        if key in old and value != old[key]
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Retrieval quality + latency benchmark")
+    ap.add_argument("--queries", default=str(DEFAULT_QUERIES), help="JSONL: question, expected [{doc_id, section_id}]")
+    ap.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL corpus indexed in offline mode")
+    ap.add_argument("--live", action="store_true", help="use the configured vector backend and real models")
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--rerank-k", type=int, default=5)
+    ap.add_argument("--no-rerank", action="store_true")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=1, help="replay the query set, later passes hit the rerank score cache")
+    ap.add_argument("--embed-cost-ms", type=float, default=0.0, help="stub embedder cost per text")
+    ap.add_argument("--rerank-cost-ms", type=float, default=0.0, help="stub cross-encoder cost per pair")
+    ap.add_argument("--out", help="write the JSON report here (stdout otherwise)")
+    ap.add_argument("--baseline", help="earlier JSON report to print deltas against")
+    ap.add_argument("--per-query", action="store_true", help="include per-query hits in the report")
+    args = ap.parse_args(argv)
+
+    items = [q for q in load_jsonl(args.queries) if q.get("expected")]
+    if not items:
+        print(f"No labelled queries in {args.queries}", file=sys.stderr)
+        return 1
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    with tempfile.TemporaryDirectory(prefix="lawmate-bench-") as tmp:
+        index = None
+        if not args.live:
+            # keep the run self-contained: no shared caches, no writes under data/
+            os.environ.setdefault("LAW_MATE_RETRIEVAL_CACHE_DB", "")
+            from benchmarks.stubs import build_local_index, install_stub_models
+
+            install_stub_models(embed_cost_s=args.embed_cost_ms / 1000, rerank_cost_s=args.rerank_cost_ms / 1000)
+            chunks, index_s = build_local_index(args.corpus, tmp)
+            index = {"chunks": chunks, "build_s": round(index_s, 3)}
+
+        # loads the models without putting any benchmark question in the caches
+        run_query({"question": "warm up", "expected": []}, args.top_k, args.rerank_k, not args.no_rerank)
+
+        results, wall_s = run_benchmark(
+            items,
+            top_k=args.top_k,
+            rerank_k=args.rerank_k,
+            concurrency=args.concurrency,
+            repeat=args.repeat,
+            rerank=not args.no_rerank,
+        )
+
+    report: Dict[str, Any] = {
+        "mode": "live" if args.live else "offline",
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "config": config,
+        "index": index,
+        **summarize(results, wall_s, args.top_k, args.rerank_k),
+    }
+    if args.per_query:
+        report["per_query"] = [
+            {k: r[k] for k in ("question", "expected", "final")} | {"total_ms": round(r["total_s"] * 1000, 3)}
+            for r in results[: len(items)]
+        ]
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+        quality = " ".join(f"{k}={v}" for k, v in report["reranked"].items())
+        print(
+            f"{report['queries']} queries, {report['qps']} qps, {quality}, "
+            f"p95={report['latency']['total']['p95_ms']} ms -> {args.out}"
+        )
+    else:
+        print(text)
+    if args.baseline:
+        for line in compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8"))):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
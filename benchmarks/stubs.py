@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Offline stand-ins for the embedder, cross-encoder, vector store and LLM, so
+# benchmarks run without model downloads or servers. They are installed through
+# the same lazy singletons the real ones live in; everything around them
+# (chunk store, caches, batching, scheduling) is the real code.
+
+EMBED_DIM = 384
+_WORD_RE = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "an", "and", "any", "are", "as", "be", "by", "can", "do", "does", "for", "from", "has", "have",
+    "how", "in", "is", "it", "its", "may", "of", "on", "or", "shall", "such", "that", "the", "their",
+    "there", "this", "to", "under", "what", "when", "where", "which", "who", "with",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class HashingEmbedder:
+    # SentenceTransformer.encode look-alike: hashed unigrams + bigrams, L2-normalised
+
+    def __init__(self, dim: int = EMBED_DIM, cost_per_text_s: float = 0.0) -> None:
+        self.dim = dim
+        self.cost_per_text_s = cost_per_text_s
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        terms = _terms(text)
+        for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode(self, texts: str | Sequence[str], **kwargs: Any) -> np.ndarray:
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if self.cost_per_text_s:
+            time.sleep(self.cost_per_text_s * len(batch))
+        out = np.stack([self._vector(t) for t in batch]) if batch else np.zeros((0, self.dim), dtype=np.float32)
+        return out[0] if single else out
+
+
+class WhitespaceTokenizer:
+    # the parts of a HF tokenizer the ranker's truncation path uses
+    model_max_length = 512
+
+    def __call__(self, text: str, add_special_tokens: bool = True, return_offsets_mapping: bool = False, **kwargs: Any):
+        spans = [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+        enc: Dict[str, Any] = {"input_ids": list(range(len(spans)))}
+        if return_offsets_mapping:
+            enc["offset_mapping"] = spans
+        return enc
+
+    def num_special_tokens_to_add(self, pair: bool = False) -> int:
+        return 3 if pair else 2
+
+
+def _make_lexical_cross_encoder():
+    from src.retrieval.ranker import OnnxCrossEncoder
+
+    class LexicalCrossEncoder(OnnxCrossEncoder):
+        # goes through the ONNX branch of the ranker; scores are the weighted
+        # share of query terms (and bigrams) found in the passage, squashed like logits
+        def __init__(self, cost_per_pair_s: float = 0.0) -> None:
+            self.tokenizer = WhitespaceTokenizer()
+            self.num_labels = 1
+            self.max_length = 512
+            self.cost_per_pair_s = cost_per_pair_s
+
+        def _run(self, queries: List[str], texts: List[str]) -> np.ndarray:
+            if self.cost_per_pair_s:
+                time.sleep(self.cost_per_pair_s * len(texts))
+            scores = np.zeros(len(texts), dtype=np.float32)
+            for i, (q, t) in enumerate(zip(queries, texts)):
+                q_terms, t_terms = _terms(q), _terms(t)
+                if not q_terms:
+                    continue
+                words = set(t_terms)
+                bigrams = set(zip(t_terms, t_terms[1:]))
+                hit = sum(1 for w in q_terms if w in words) / len(q_terms)
+                q_bigrams = list(zip(q_terms, q_terms[1:]))
+                pair_hit = sum(1 for b in q_bigrams if b in bigrams) / len(q_bigrams) if q_bigrams else 0.0
+                scores[i] = 1.0 / (1.0 + np.exp(-(6.0 * hit + 4.0 * pair_hit - 4.0)))
+            return scores
+
+    return LexicalCrossEncoder
+
+
+def install_stub_models(*, embed_cost_s: float = 0.0, rerank_cost_s: float = 0.0) -> None:
+    from src.pipelines import embedder
+    from src.retrieval import ranker
+
+    embedder._model = HashingEmbedder(cost_per_text_s=embed_cost_s)
+    ranker._cross_encoder = _make_lexical_cross_encoder()(cost_per_pair_s=rerank_cost_s)
+
+
+def load_jsonl(path: str | Path) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def corpus_chunks(corpus: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # one chunk per corpus section, shaped like hydrated search results
+    chunks = []
+    for row in corpus:
+        chunks.append({
+            "chunk_id": f"{row['doc_id']}-{row['section_id']}-0",
+            "doc_id": row["doc_id"],
+            "section_id": row["section_id"],
+            "section_heading": row.get("section_heading") or "",
+            "part": row.get("part") or "",
+            "chapter": row.get("chapter") or "",
+            "page_start": int(row.get("page_start") or 1),
+            "page_end": int(row.get("page_end") or 1),
+            "chunk_index": 0,
+            "text": row["text"],
+        })
+    return chunks
+
+
+def build_local_index(corpus_path: str | Path, root: str | Path) -> Tuple[int, float]:
+    # Indexes the corpus into a fresh local vector store, section store and
+    # chunk store under root and makes them the process-wide stores. Needs
+    # install_stub_models() (or real models) first. Returns (chunks indexed, seconds).
+    from src.pipelines import embedder
+    from src.pipelines.embedder import EmbeddedChunk
+    from src.pipelines.indexer import VectorBatchWriter
+    from src.pipelines.legal_sectionizer import LegalSection
+    from src.pipelines.section_index import index_sections
+    from src.vectorstore import chunk_store, factory
+    from src.vectorstore.chunk_store import ChunkTextStore
+    from src.vectorstore.local_store import LocalVectorStore
+
+    root = Path(root)
+    factory._store = LocalVectorStore(root / "vectorstore")
+    factory._section_store = LocalVectorStore(root / "vectorstore_sections")
+    chunk_store._chunk_store = ChunkTextStore(root / "chunk_store")
+
+    t0 = time.perf_counter()
+    corpus = load_jsonl(corpus_path)
+    chunks = corpus_chunks(corpus)
+    vectors = embedder.get_model().encode([c["text"] for c in chunks])
+    embedded = [EmbeddedChunk(**c, embedding=v.tolist()) for c, v in zip(chunks, vectors)]
+    with VectorBatchWriter() as writer:
+        writer.add(embedded)
+
+    by_doc: Dict[str, List[LegalSection]] = {}
+    for row in corpus:
+        by_doc.setdefault(row["doc_id"], []).append(LegalSection(
+            act_id=row["doc_id"],
+            section_id=row["section_id"],
+            heading=row.get("section_heading"),
+            body=row["text"],
+            part=row.get("part"),
+            chapter=row.get("chapter"),
+            page_start=int(row.get("page_start") or 1),
+            page_end=int(row.get("page_end") or 1),
+        ))
+    for doc_id, sections in by_doc.items():
+        index_sections(doc_id, sections, {"act_title": sections[0].act_id})
+    factory._section_store.flush()
+    return len(embedded), time.perf_counter() - t0
+
+
+def _make_fixed_vector_store():
+    from src.vectorstore.base import SearchFilter, VectorStore
+
+    class FixedVectorStore(VectorStore):
+        # returns the same chunks for every query (rotated per query vector so
+        # prompts differ), after an optional fixed search cost
+        name = "fixed"
+
+        def __init__(self, chunks: List[Dict[str, Any]], search_cost_s: float = 0.0) -> None:
+            self.chunks = {c["chunk_id"]: c for c in chunks}
+            self.ids = list(self.chunks)
+            self.search_cost_s = search_cost_s
+
+        def insert(self, columns: Dict[str, List[Any]]) -> int:
+            return 0
+
+        def upsert(self, columns: Dict[str, List[Any]]) -> int:
+            return 0
+
+        def delete(self, *, doc_ids=None, chunk_ids=None) -> int:
+            return 0
+
+        def search(self, vectors, top_k, filters=None, output_fields=None):
+            if self.search_cost_s:
+                time.sleep(self.search_cost_s * len(vectors))
+            out = []
+            for vec in vectors:
+                start = int(abs(float(np.sum(vec))) * 1000) % len(self.ids) if self.ids else 0
+                ids = (self.ids[start:] + self.ids[:start])[:top_k]
+                out.append([
+                    {**{f: self.chunks[cid].get(f) for f in (output_fields or ["chunk_id"])}, "score": 1.0 - 0.01 * rank}
+                    for rank, cid in enumerate(ids)
+                ])
+            return out
+
+        def query(self, filters: SearchFilter, output_fields=None):
+            ids = filters.chunk_ids if filters.chunk_ids is not None else self.ids
+            return [dict(self.chunks[cid]) for cid in ids if cid in self.chunks]
+
+        def iter_rows(self, output_fields=None, batch_size=2000):
+            for start in range(0, len(self.ids), batch_size):
+                yield [dict(self.chunks[cid]) for cid in self.ids[start:start + batch_size]]
+
+        def flush(self) -> None:
+            pass
+
+        def count(self) -> int:
+            return len(self.ids)
+
+    return FixedVectorStore
+
+
+def install_fixed_store(corpus_path: str | Path, root: str | Path, *, search_cost_s: float = 0.0) -> int:
+    # fixed-result vector store plus a real chunk store under root for hydration
+    from src.vectorstore import chunk_store, factory
+    from src.vectorstore.chunk_store import ChunkTextStore
+
+    chunks = corpus_chunks(load_jsonl(corpus_path))
+    factory._store = _make_fixed_vector_store()(chunks, search_cost_s=search_cost_s)
+    # no section vectors: every request takes the plain chunk search
+    factory._section_store = _make_fixed_vector_store()([])
+    chunk_store._chunk_store = ChunkTextStore(Path(root) / "chunk_store")
+    chunk_store._chunk_store.put({f: [c.get(f) for c in chunks] for f in chunks[0]})
+    return len(chunks)
+
+
+def install_fake_llm(*, tokens_per_s: float, prefill_s: float = 0.05):
+    from src.llm import client
+    from src.llm.fake_client import FakeOllamaClient
+
+    client._async_client = FakeOllamaClient(tokens_per_s=tokens_per_s, prefill_s=prefill_s)
+    return client._async_client
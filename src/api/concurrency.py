@@ -0,0 +1,103 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+MAX_IN_FLIGHT = int(os.getenv("LAW_MATE_MAX_IN_FLIGHT", "64"))
+RETRIEVAL_WORKERS = int(os.getenv("LAW_MATE_RETRIEVAL_WORKERS", "4"))
+RETRIEVAL_QUEUE = int(os.getenv("LAW_MATE_RETRIEVAL_QUEUE", "32"))
+RERANK_WORKERS = int(os.getenv("LAW_MATE_RERANK_WORKERS", "2"))
+RERANK_QUEUE = int(os.getenv("LAW_MATE_RERANK_QUEUE", "32"))
+LLM_CONCURRENCY = int(os.getenv("LAW_MATE_LLM_CONCURRENCY", "2"))
+LLM_QUEUE = int(os.getenv("LAW_MATE_LLM_QUEUE", "32"))
+RETRY_AFTER_S = int(os.getenv("LAW_MATE_RETRY_AFTER_S", "2"))
+
+
+class Overloaded(Exception):
+    def __init__(self, stage: str, status_code: int = 503) -> None:
+        super().__init__(f"{stage} is at capacity, retry later")
+        self.stage = stage
+        self.status_code = status_code
+
+
+# All the counters below are only touched from the event loop thread, so
+# plain ints are enough; the blocking work itself runs in the pools.
+
+class StageExecutor:
+    # bounded thread pool for one blocking stage, rejects instead of queueing forever
+
+    def __init__(self, name: str, workers: int, queue_size: int) -> None:
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"lawmate-{name}")
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.pending >= self.capacity:
+            raise Overloaded(self.name)
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # carry contextvars (the request trace) into the worker thread
+            ctx = contextvars.copy_context()
+            return await loop.run_in_executor(self._pool, ctx.run, partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": self.workers, "capacity": self.capacity, "pending": self.pending}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class AdmissionSlot:
+    # one admitted request; release() is idempotent so every exit path of a
+    # streamed response can call it
+
+    def __init__(self, controller: AdmissionController) -> None:
+        self._controller = controller
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._controller.in_flight -= 1
+
+
+class AdmissionController:
+    # caps requests in flight across all stages; excess gets a 429 straight away
+
+    def __init__(self, max_in_flight: int) -> None:
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    def acquire(self) -> AdmissionSlot:
+        if self.in_flight >= self.max_in_flight:
+            raise Overloaded("admission", status_code=429)
+        self.in_flight += 1
+        return AdmissionSlot(self)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        slot = self.acquire()
+        try:
+            yield
+        finally:
+            slot.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"max_in_flight": self.max_in_flight, "in_flight": self.in_flight}
+
+
+admission = AdmissionController(MAX_IN_FLIGHT)
+retrieval_pool = StageExecutor("retrieval", RETRIEVAL_WORKERS, RETRIEVAL_QUEUE)
+rerank_pool = StageExecutor("rerank", RERANK_WORKERS, RERANK_QUEUE)
+# the LLM stage is gated by src.llm.scheduler.llm_scheduler
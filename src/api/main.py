@@ -1,18 +1,81 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from src.retrieval.hybrid_retriever import search_similar_chunks
-from src.retrieval.ranker import rerank_chunks
-from src.llm.answerer import answer_with_llm, LLMAnswer
+from src.pipelines.embedder import get_model
+from src.retrieval.citation_index import CITATION_FAST_PATH, cited_chunks, get_citation_index
+from src.retrieval.hybrid_retriever import embed_query
+from src.retrieval.ranker import get_cross_encoder, rerank_chunks, score_with_model
+from src.retrieval.retrieval_cache import cached_rerank, cached_search, get_retrieval_cache
+from src.llm.answerer import (
+    aanswer_with_llm,
+    astream_llama,
+    build_answer_prompt,
+    build_citations,
+    LLM_MODEL,
+    LLMAnswer,
+    NO_CONTEXT_ANSWER,
+)
+from src.api.concurrency import (
+    RETRY_AFTER_S,
+    AdmissionSlot,
+    Overloaded,
+    admission,
+    rerank_pool,
+    retrieval_pool,
+)
+from src.llm.answer_cache import answer_cache
+from src.llm.batch_answerer import agenerate_batch, rerank_batch, retrieve_batch
+from src.llm.client import llm_timing_report, warm_up
+from src.llm.scheduler import ClientDisconnected, DeadlineExceeded, cancel_on_disconnect, llm_scheduler
+from src.utils.telemetry import format_timing, registry, request_seconds, requests_total, trace
+from src.vectorstore.base import SearchFilter
+
+
+# load the embedder, cross-encoder and Ollama model before taking traffic
+WARM_UP = os.getenv("LAW_MATE_WARM_UP", "1") == "1"
+
+
+def _preload_models() -> None:
+    get_model().encode(["warm up"])
+    score_with_model(get_cross_encoder(), "warm up", [{"text": "warm up"}])
+
+
+async def _warm_up_llm() -> None:
+    timings = await warm_up(LLM_MODEL)
+    print(f"[api] LLM {LLM_MODEL} loaded (load {timings.load_ms:.0f} ms)")
+
+
+async def warm_up_models() -> None:
+    t0 = time.perf_counter()
+    # failures are not fatal: the first request just pays the load instead
+    results = await asyncio.gather(asyncio.to_thread(_preload_models), _warm_up_llm(), return_exceptions=True)
+    for name, result in zip(("embedder/cross-encoder", "LLM"), results):
+        if isinstance(result, Exception):
+            print(f"[api] Warm-up of {name} failed: {result}")
+    print(f"[api] Warm-up done in {time.perf_counter() - t0:.1f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    if WARM_UP:
+        await warm_up_models()
+    yield
 
 
 app = FastAPI(
     title="LawMate India RAG API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -20,26 +83,264 @@ class AskRequest(BaseModel):
     question: str
     top_k: int = 20
     rerank_k: int = 5
+    # narrows the vector search itself, e.g. {"ministry": "road-transport-and-highways", "chapter": "CHAPTER II"}
+    filters: Optional[SearchFilter] = None
+    # seconds from arrival until the answer must be done; bounds LLM queueing plus generation
+    deadline_s: Optional[float] = None
+
+
+# X-Timing response header with per-stage durations: "1" always, otherwise
+# only when the request sends an X-Timing header itself
+TIMING_HEADER = os.getenv("LAW_MATE_TIMING_HEADER", "0") == "1"
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    t0 = time.perf_counter()
+    with trace() as stages:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - t0
+    # streaming responses are timed up to their headers, the body is not waited for
+    endpoint = request.scope.get("route").path if request.scope.get("route") else "unmatched"
+    request_seconds.observe(elapsed, endpoint=endpoint)
+    requests_total.inc(endpoint=endpoint, status=str(response.status_code))
+    if TIMING_HEADER or "x-timing" in request.headers:
+        response.headers["X-Timing"] = format_timing(stages, elapsed)
+    return response
+
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+# upper bound on questions per /ask_batch call
+BATCH_MAX_QUESTIONS = int(os.getenv("LAW_MATE_BATCH_MAX_QUESTIONS", "500"))
+
+
+class AskBatchRequest(BaseModel):
+    questions: List[str]
+    top_k: int = 20
+    rerank_k: int = 5
+    filters: Optional[SearchFilter] = None
+    # per question, counted from when its generation is queued
+    deadline_s: Optional[float] = None
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "stage": exc.stage},
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
+
+
+@app.exception_handler(ClientDisconnected)
+async def disconnected_handler(request: Request, exc: ClientDisconnected) -> Response:
+    # nobody is listening any more; 499 is what nginx logs for this
+    return Response(status_code=499)
 
 
+def _remaining(payload: AskRequest, started: float) -> Optional[float]:
+    if payload.deadline_s is None:
+        return None
+    return max(payload.deadline_s - (time.perf_counter() - started), 0.001)
+
+
+# async so it is answered on the event loop even when every worker thread is busy
 @app.get("/health")
-def health() -> dict:
-    return {"status": "ok"}
+async def health() -> dict:
+    return {
+        "status": "ok",
+        "admission": admission.stats(),
+        "retrieval": retrieval_pool.stats(),
+        "rerank": rerank_pool.stats(),
+        "llm": llm_scheduler.stats(),
+        "answer_cache": answer_cache.stats(),
+        "retrieval_cache": get_retrieval_cache().stats(),
+        "citation_index": get_citation_index().stats(),
+        "llm_timings": llm_timing_report(),
+    }
+
+
+def _cache_params(payload: AskRequest) -> str:
+    # near-duplicate questions only share an answer when they were asked the same way
+    filters = payload.filters.model_dump(mode="json", exclude_none=True) if payload.filters else {}
+    return json.dumps(
+        {"top_k": payload.top_k, "rerank_k": payload.rerank_k, "filters": filters, "model": LLM_MODEL},
+        sort_keys=True,
+    )
+
+
+async def _cited_context(q: str, payload: AskRequest) -> Optional[List[dict]]:
+    # "Section 5 of the X Act" questions are served from the citation index:
+    # no embedding or vector search, and the cross-encoder only runs when the
+    # cited sections hold more than rerank_k chunks. None -> normal retrieval.
+    if not CITATION_FAST_PATH:
+        return None
+    cited = await retrieval_pool.run(cited_chunks, q, payload.filters)
+    if not cited:
+        return None
+    if len(cited) <= payload.rerank_k:
+        return cited
+    return await rerank_pool.run(rerank_chunks, q, cited, top_k=payload.rerank_k)
 
 
 @app.post("/ask", response_model=LLMAnswer)
-def ask(payload: AskRequest) -> LLMAnswer:
+async def ask(payload: AskRequest, request: Request) -> LLMAnswer:
+    started = time.perf_counter()
     q = payload.question.strip()
     if not q:
         raise HTTPException(status_code=400, detail="question cannot be empty")
 
-    initial = search_similar_chunks(q, top_k=payload.top_k)
-    if not initial:
-        return LLMAnswer(
-            answer="I could not retrieve any relevant statutory text to answer this question from the index.",
-            citations=[],
+    async with admission.admit():
+        params = _cache_params(payload)
+        q_emb = None
+        reranked = await _cited_context(q, payload)
+        if reranked is None:
+            q_emb = await retrieval_pool.run(embed_query, q)
+            # the cache may hit sqlite (disk tier, citation aliases): off the event loop
+            cached = await retrieval_pool.run(answer_cache.get_similar, q, q_emb, params)
+            if cached is not None:
+                return cached
+
+            initial = await retrieval_pool.run(
+                cached_search, q, top_k=payload.top_k, filters=payload.filters, query_vector=q_emb
+            )
+            if not initial:
+                return LLMAnswer(answer=NO_CONTEXT_ANSWER, citations=[])
+
+            reranked = await rerank_pool.run(
+                cached_rerank, q, initial, top_k=payload.rerank_k, search_top_k=payload.top_k, filters=payload.filters
+            )
+        chunk_ids = [c["chunk_id"] for c in reranked]
+        cached = await retrieval_pool.run(answer_cache.get_exact, q, chunk_ids, params)
+        if cached is not None:
+            return cached
+
+        answer = await cancel_on_disconnect(
+            llm_scheduler.run(aanswer_with_llm, q, reranked, deadline_s=_remaining(payload, started)),
+            request.is_disconnected,
         )
+        # not through the bounded pool: a full queue must not throw away a generated answer
+        await asyncio.to_thread(answer_cache.put, q, chunk_ids, params, answer, query_vector=q_emb)
+        return answer
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    # holds an admission slot until the response is over, however it ends: the
+    # body generator's own finally never runs if the client is gone before
+    # Starlette starts iterating it
+
+    def __init__(self, content: Any, slot: AdmissionSlot, **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/ask/stream")
+async def ask_stream(payload: AskRequest, request: Request) -> StreamingResponse:
+    # Server-Sent Events: `citations` as soon as reranking is done, then one
+    # `token` event per generated piece, then `done` (or `error`).
+    started = time.perf_counter()
+    q = payload.question.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="question cannot be empty")
+
+    # the admission slot has to outlive this function, the body streams after we return
+    slot = admission.acquire()
+    try:
+        reranked = await _cited_context(q, payload)
+        if reranked is None:
+            initial = await retrieval_pool.run(cached_search, q, top_k=payload.top_k, filters=payload.filters)
+            reranked = []
+            if initial:
+                reranked = await rerank_pool.run(
+                    cached_rerank, q, initial, top_k=payload.rerank_k, search_top_k=payload.top_k, filters=payload.filters
+                )
+        llm_scheduler.ensure_capacity()
+    except BaseException:
+        slot.release()
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            prompt, blocks, usage = build_answer_prompt(q, reranked)
+            citations = build_citations(blocks)
+            yield _sse("citations", [c.model_dump() for c in citations])
+            if not reranked:
+                yield _sse("token", {"text": NO_CONTEXT_ANSWER})
+                yield _sse("done", {"tokens": 1})
+                return
+
+            n_tokens = 0
+            async with llm_scheduler.slot(deadline_s=_remaining(payload, started)) as ticket:
+                tokens = astream_llama(prompt)
+                try:
+                    while True:
+                        # the deadline covers generation too, also a model that stalls between tokens
+                        try:
+                            token = await asyncio.wait_for(anext(tokens), timeout=max(ticket.remaining(), 0))
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise DeadlineExceeded(llm_scheduler.name) from None
+                        if await request.is_disconnected():
+                            return
+                        n_tokens += 1
+                        yield _sse("token", {"text": token})
+                finally:
+                    # closes the Ollama stream, which stops generation
+                    await tokens.aclose()
+            yield _sse("done", {"tokens": n_tokens, "usage": usage.model_dump()})
+        except DeadlineExceeded as exc:
+            yield _sse("error", {"detail": str(exc), "stage": exc.stage, "reason": "deadline", "tokens": n_tokens})
+        except Overloaded as exc:
+            yield _sse("error", {"detail": str(exc), "stage": exc.stage})
+        finally:
+            slot.release()
+
+    return AdmittedStreamingResponse(
+        events(),
+        slot,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask_batch")
+async def ask_batch(payload: AskBatchRequest) -> StreamingResponse:
+    # NDJSON, one line per question as soon as its answer is ready (not in
+    # input order, each line carries its index)
+    questions = [q.strip() for q in payload.questions]
+    if not questions or not all(questions):
+        raise HTTPException(status_code=400, detail="questions must be a non-empty list of non-empty strings")
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"at most {BATCH_MAX_QUESTIONS} questions per batch")
+
+    slot = admission.acquire()
+    try:
+        _, candidates = await retrieval_pool.run(retrieve_batch, questions, top_k=payload.top_k, filters=payload.filters)
+        reranked = await rerank_pool.run(rerank_batch, questions, candidates, rerank_k=payload.rerank_k)
+    except BaseException:
+        slot.release()
+        raise
+
+    async def lines() -> AsyncIterator[str]:
+        try:
+            async for result in agenerate_batch(questions, reranked, deadline_s=payload.deadline_s):
+                yield result.model_dump_json() + "\n"
+        finally:
+            slot.release()
 
-    reranked = rerank_chunks(q, initial, top_k=payload.rerank_k)
-    resp = answer_with_llm(q, reranked)
-    return resp
\ No newline at end of file
+    return AdmittedStreamingResponse(lines(), slot, media_type="application/x-ndjson")
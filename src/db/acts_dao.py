@@ -1,8 +1,12 @@
 import hashlib
 import json
-from datetime import datetime
+from datetime import date, datetime
+from typing import Dict, Optional
 from .database import get_conn
 
+# same formats as scrapers.indiacode.constants.DATE_FORMATS ("1-Apr-1955")
+ENACTMENT_DATE_FORMATS = ["%d-%b-%Y", "%d-%B-%Y"]
+
 def md5_hash(value:str) -> str:
     return hashlib.md5(value.encode('utf-8')).hexdigest()
 
@@ -41,4 +45,31 @@ def insert_or_update_act(act):
             )
         )
         conn.commit()
-    return act_id
\ No newline at end of file
+    return act_id
+
+
+def parse_enactment_date(raw: Optional[str]) -> Optional[date]:
+    if not raw:
+        return None
+    for fmt in ENACTMENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(raw.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def load_act_metadata_by_asset() -> Dict[str, dict]:
+    # parsed text files are named <asset_id>.txt, so asset id == pipeline doc_id
+    with get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT s.id AS asset_id, a.id AS act_id, a.ministry_slug, a.ministry_name,
+                   a.act_title, a.act_number, a.enactment_date_raw
+            FROM assets s
+            JOIN acts a ON s.act_id = a.id
+            """
+        )
+        rows = cursor.fetchall()
+    return {r["asset_id"]: dict(r) for r in rows}
@@ -0,0 +1,393 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# One process holds the embedder and the cross-encoder for every uvicorn worker
+# on the box. Workers talk to it over a Unix socket (set LAW_MATE_MODEL_SIDECAR
+# to the socket path and get_model()/get_cross_encoder() return the proxies
+# below); requests arriving from all workers within a few ms are merged into
+# one model batch, and one inference thread runs with the thread count pinned
+# to the cores this process may use.
+#
+#   python -m src.inference.sidecar serve --socket /tmp/lawmate-models.sock
+#   LAW_MATE_MODEL_SIDECAR=/tmp/lawmate-models.sock uvicorn src.api.main:app --workers 4
+
+MODEL_SIDECAR = os.getenv("LAW_MATE_MODEL_SIDECAR", "")
+SIDECAR_SOCKET = MODEL_SIDECAR or "/tmp/lawmate-models.sock"
+SIDECAR_THREADS = int(os.getenv("LAW_MATE_SIDECAR_THREADS", "0"))  # 0 -> cores in this process's affinity mask
+SIDECAR_MAX_WAIT_MS = float(os.getenv("LAW_MATE_SIDECAR_MAX_WAIT_MS", "2"))
+SIDECAR_MAX_BATCH = int(os.getenv("LAW_MATE_SIDECAR_MAX_BATCH", "256"))  # texts or pairs per model call
+SIDECAR_TIMEOUT_S = float(os.getenv("LAW_MATE_SIDECAR_TIMEOUT_S", "60"))
+
+# frame: !II (header length, body length), JSON header, raw float32 body
+_FRAME = struct.Struct("!II")
+# errors that mean the sidecar is gone (restarted, not running), so the frame
+# never reached a live process and can be sent again; a timeout is not one of them
+_RECONNECT_ERRORS = (ConnectionRefusedError, ConnectionResetError, BrokenPipeError, FileNotFoundError)
+
+
+class SidecarUnavailable(RuntimeError):
+    pass
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        return os.cpu_count() or 1
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionResetError("sidecar closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _encode_frame(header: Dict[str, Any], body: bytes = b"") -> bytes:
+    head = json.dumps(header).encode("utf-8")
+    return _FRAME.pack(len(head), len(body)) + head + body
+
+
+# --- worker side ---------------------------------------------------------
+
+class SidecarClient:
+    # blocking, one connection per calling thread (the retrieval and rerank
+    # pools call from several threads at once)
+
+    def __init__(self, path: str = SIDECAR_SOCKET, timeout_s: float = SIDECAR_TIMEOUT_S) -> None:
+        self.path = path
+        self.timeout_s = timeout_s
+        self._local = threading.local()
+
+    def _sock(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout_s)
+            try:
+                sock.connect(self.path)
+            except OSError as e:
+                sock.close()
+                raise SidecarUnavailable(f"model sidecar not reachable at {self.path}: {e}") from e
+            self._local.sock = sock
+        return sock
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        frame = _encode_frame(header)
+        for attempt in (1, 2):
+            sock = self._sock()
+            try:
+                sock.sendall(frame)
+                head_len, body_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+                resp = json.loads(_recv_exact(sock, head_len))
+                body = _recv_exact(sock, body_len) if body_len else b""
+                break
+            except _RECONNECT_ERRORS as e:
+                # a restarted sidecar leaves a dead socket behind; reconnect once
+                self._drop()
+                if attempt == 2:
+                    raise SidecarUnavailable(f"model sidecar call failed: {e}") from e
+            except OSError as e:
+                # timed out (or worse) with the request possibly still running:
+                # resending would run it twice and leave a stray reply on the socket
+                self._drop()
+                raise SidecarUnavailable(f"model sidecar call failed: {e}") from e
+        if not resp.get("ok"):
+            raise RuntimeError(f"model sidecar error: {resp.get('error')}")
+        return resp, body
+
+    def _array(self, header: Dict[str, Any]) -> np.ndarray:
+        resp, body = self.call(header)
+        return np.frombuffer(body, dtype=np.float32).reshape(resp["shape"])
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self._array({"op": "embed", "texts": texts})
+
+    def rerank(self, queries: List[str], texts: List[str]) -> np.ndarray:
+        return self._array({"op": "rerank", "queries": queries, "texts": texts})
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call({"op": "stats"})[0]["stats"]
+
+
+_client: Optional[SidecarClient] = None
+
+
+def get_sidecar_client() -> SidecarClient:
+    global _client
+    if _client is None:
+        _client = SidecarClient()
+    return _client
+
+
+class SidecarEmbedder:
+    # what get_model() returns when LAW_MATE_MODEL_SIDECAR is set; only encode() is used
+
+    def __init__(self, client: Optional[SidecarClient] = None) -> None:
+        self.client = client or get_sidecar_client()
+
+    def encode(self, texts: str | Sequence[str], **kwargs: Any) -> np.ndarray:
+        single = isinstance(texts, str)
+        out = self.client.embed([texts] if single else list(texts))
+        return out[0] if single else out
+
+
+class SidecarCrossEncoder:
+    # what get_cross_encoder() returns when LAW_MATE_MODEL_SIDECAR is set. No
+    # tokenizer on this side: passages are sent whole and the sidecar truncates
+    # and length-batches them
+
+    def __init__(self, client: Optional[SidecarClient] = None) -> None:
+        self.client = client or get_sidecar_client()
+
+    def _run(self, queries: List[str], texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        return self.client.rerank(queries, texts)
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        return self._run([query] * len(texts), texts)
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 0) -> np.ndarray:
+        return self._run([q for q, _ in pairs], [t for _, t in pairs])
+
+
+# --- sidecar side --------------------------------------------------------
+
+class _Batcher:
+    # collects requests for one model for up to max_wait_s (or max_items) and
+    # runs them as one call on the shared inference thread
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Dict[str, Any]]], List[np.ndarray]],
+        size_of: Callable[[Dict[str, Any]], int],
+        executor: ThreadPoolExecutor,
+        max_items: int = SIDECAR_MAX_BATCH,
+        max_wait_s: float = SIDECAR_MAX_WAIT_MS / 1000,
+    ) -> None:
+        self.name = name
+        self.run_batch = run_batch
+        self.size_of = size_of
+        self.executor = executor
+        self.max_items = max_items
+        self.max_wait_s = max_wait_s
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.counters: Dict[str, float] = {"requests": 0, "batches": 0, "items": 0, "max_batch_items": 0, "busy_s": 0.0}
+
+    async def submit(self, request: Dict[str, Any]) -> np.ndarray:
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, fut))
+        return await fut
+
+    async def _collect(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        n = self.size_of(batch[0][0])
+        deadline = loop.time() + self.max_wait_s
+        while n < self.max_items:
+            timeout = deadline - loop.time()
+            try:
+                item = self.queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self.queue.get(), timeout)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+            batch.append(item)
+            n += self.size_of(item[0])
+        return batch
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            requests = [r for r, _ in batch]
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.run_batch, requests)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            items = sum(self.size_of(r) for r in requests)
+            self.counters["requests"] += len(batch)
+            self.counters["batches"] += 1
+            self.counters["items"] += items
+            self.counters["max_batch_items"] = max(self.counters["max_batch_items"], items)
+            self.counters["busy_s"] += time.perf_counter() - t0
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counters
+        return {
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in c.items()},
+            "queued": self.queue.qsize(),
+            "mean_batch_items": round(c["items"] / c["batches"], 2) if c["batches"] else 0.0,
+            "requests_per_batch": round(c["requests"] / c["batches"], 2) if c["batches"] else 0.0,
+        }
+
+
+def pin_threads(threads: int) -> int:
+    # must run before torch / onnxruntime are imported: the OpenMP pools size
+    # themselves from these on first use
+    n = threads if threads > 0 else available_cores()
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "LAW_MATE_ONNX_THREADS"):
+        os.environ[var] = str(n)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    return n
+
+
+class ModelServer:
+
+    def __init__(self, path: str = SIDECAR_SOCKET, threads: int = SIDECAR_THREADS, models: Sequence[str] = ("embed", "rerank")) -> None:
+        self.path = path
+        self.threads = pin_threads(threads)
+        self.models = list(models)
+        # one inference thread: each model call already uses every pinned core
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lawmate-inference")
+        self.batchers: Dict[str, _Batcher] = {}
+        self.started_at = time.time()
+
+    def _load(self) -> None:
+        from src.pipelines.embedder import EMBED_BATCH_SIZE, load_model
+        from src.retrieval.ranker import RERANK_BATCH_SIZE, _score_batch, load_cross_encoder
+
+        try:
+            import torch
+            torch.set_num_threads(self.threads)
+            torch.set_num_interop_threads(1)
+        except (ImportError, RuntimeError):
+            pass
+
+        if "embed" in self.models:
+            embedder = load_model()
+            embedder.encode(["warm up"])
+
+            def embed_batch(requests: List[Dict[str, Any]]) -> List[np.ndarray]:
+                texts = [t for r in requests for t in r["texts"]]
+                vectors = np.asarray(embedder.encode(texts, batch_size=EMBED_BATCH_SIZE), dtype=np.float32)
+                return _split(vectors, [len(r["texts"]) for r in requests])
+
+            self.batchers["embed"] = _Batcher("embed", embed_batch, lambda r: len(r["texts"]), self.executor)
+
+        if "rerank" in self.models:
+            cross_encoder = load_cross_encoder()
+            _score_batch(cross_encoder, ["warm up"], ["warm up"])
+
+            def rerank_batch(requests: List[Dict[str, Any]]) -> List[np.ndarray]:
+                queries = [q for r in requests for q in r["queries"]]
+                texts = [t for r in requests for t in r["texts"]]
+                scores = np.zeros(len(texts), dtype=np.float32)
+                # pairs of all workers share length-sorted batches
+                order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+                for start in range(0, len(order), RERANK_BATCH_SIZE):
+                    idx = order[start:start + RERANK_BATCH_SIZE]
+                    scores[idx] = _score_batch(cross_encoder, [queries[i] for i in idx], [texts[i] for i in idx])
+                return _split(scores, [len(r["texts"]) for r in requests])
+
+            self.batchers["rerank"] = _Batcher("rerank", rerank_batch, lambda r: len(r["texts"]), self.executor)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            **{name: b.stats() for name, b in self.batchers.items()},
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head_len, body_len = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                    request = json.loads(await reader.readexactly(head_len))
+                    if body_len:
+                        await reader.readexactly(body_len)
+                except asyncio.IncompleteReadError:
+                    return
+                op = request.get("op")
+                try:
+                    if op == "stats":
+                        frame = _encode_frame({"ok": True, "stats": self.stats()})
+                    elif op in self.batchers:
+                        if op == "rerank" and len(request["queries"]) != len(request["texts"]):
+                            raise ValueError("queries and texts differ in length")
+                        out = np.ascontiguousarray(await self.batchers[op].submit(request), dtype=np.float32)
+                        frame = _encode_frame({"ok": True, "shape": list(out.shape)}, out.tobytes())
+                    else:
+                        raise ValueError(f"unknown op {op!r}")
+                except Exception as e:
+                    frame = _encode_frame({"ok": False, "error": f"{type(e).__name__}: {e}"})
+                writer.write(frame)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        t0 = time.perf_counter()
+        self._load()
+        print(f"[sidecar] models {self.models} loaded in {time.perf_counter() - t0:.1f}s, {self.threads} threads")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o660)
+        tasks = [asyncio.create_task(b.run()) for b in self.batchers.values()]
+        print(f"[sidecar] listening on {self.path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tasks:
+                t.cancel()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def _split(values: np.ndarray, counts: List[int]) -> List[np.ndarray]:
+    return np.split(values, np.cumsum(counts)[:-1]) if counts else []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Shared embedding/rerank model server for all API workers")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve")
+    serve.add_argument("--socket", default=SIDECAR_SOCKET)
+    serve.add_argument("--threads", type=int, default=SIDECAR_THREADS, help="0 -> all cores available to this process")
+    serve.add_argument("--models", default="embed,rerank")
+    stats = sub.add_parser("stats")
+    stats.add_argument("--socket", default=SIDECAR_SOCKET)
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        server = ModelServer(args.socket, args.threads, [m for m in args.models.split(",") if m])
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(SidecarClient(args.socket).stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
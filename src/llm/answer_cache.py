@@ -0,0 +1,262 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.llm.answerer import LLMAnswer
+from src.retrieval.citation_index import get_citation_index, parse_section_refs
+from src.utils.telemetry import cache_events
+from src.vectorstore.index_version import get_index_version
+
+ANSWER_CACHE_SIZE = int(os.getenv("LAW_MATE_ANSWER_CACHE_SIZE", "1024"))  # 0 disables the cache
+ANSWER_CACHE_SIMILARITY = float(os.getenv("LAW_MATE_ANSWER_CACHE_SIM", "0.97"))
+ANSWER_CACHE_DB = os.getenv("LAW_MATE_ANSWER_CACHE_DB", "")  # e.g. data/answer_cache.db, empty -> memory only
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+  key            TEXT PRIMARY KEY,
+  index_version  TEXT NOT NULL,
+  params         TEXT NOT NULL,
+  embedding      BLOB,
+  citations      TEXT NOT NULL DEFAULT '',
+  answer_json    TEXT NOT NULL,
+  last_used      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_answers_version ON answers(index_version, last_used);
+"""
+
+
+_NUMBER_RE = re.compile(r"\d+[a-z]?")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split()).rstrip("?.! ")
+
+
+def citation_signature(query: str) -> str:
+    # what the question cites: section refs, recognised acts and every number
+    # (years, act numbers, clauses). "Section 3 of X" and "Section 4 of X" embed
+    # above any usable threshold, so a semantic hit must agree on this exactly.
+    refs = parse_section_refs(query)
+    acts = get_citation_index().match_acts(query)
+    numbers = sorted(set(_NUMBER_RE.findall(query.lower())))
+    return json.dumps([refs, acts, numbers])
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    n = float(np.linalg.norm(v))
+    return v / n if n else v
+
+
+class _Entry:
+    __slots__ = ("answer", "vector", "params", "citations")
+
+    def __init__(self, answer: LLMAnswer, vector: Optional[np.ndarray], params: str, citations: str = "") -> None:
+        self.answer = answer
+        self.vector = vector
+        self.params = params
+        self.citations = citations
+
+
+# Two lookups: `get_exact` on (normalized query, retrieved chunk-id set) right
+# before the LLM call, and `get_similar` on the query embedding before
+# retrieval, which only answers for the same request params (top_k, rerank_k,
+# filters, model) and the same citation_signature. Everything is dropped when
+# the index version changes.
+class AnswerCache:
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+        disk_path: Optional[str | Path] = ANSWER_CACHE_DB or None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.disk_path = Path(disk_path) if disk_path else None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self.counters: Dict[str, int] = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+        if self.disk_path is not None:
+            self.disk_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._conn() as conn:
+                conn.executescript(_SCHEMA)
+                present = {r[1] for r in conn.execute("PRAGMA table_info(answers)")}
+                if "citations" not in present:
+                    conn.execute("ALTER TABLE answers ADD COLUMN citations TEXT NOT NULL DEFAULT ''")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.disk_path, timeout=5)
+
+    @staticmethod
+    def exact_key(query: str, chunk_ids: Sequence[str], params: str) -> str:
+        raw = json.dumps([normalize_query(query), sorted(chunk_ids), params])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _check_version(self) -> str:
+        version = get_index_version()
+        if version != self._version:
+            if self._version is not None:
+                self.counters["invalidations"] += 1
+            self._entries.clear()
+            self._version = version
+            self._load_from_disk()
+        return version
+
+    def _load_from_disk(self) -> None:
+        # warm the memory tier with the most recently used answers for this index version
+        if self.disk_path is None:
+            return
+        with self._conn() as conn:
+            conn.execute("DELETE FROM answers WHERE index_version != ?", (self._version,))
+            rows = conn.execute(
+                "SELECT key, params, embedding, citations, answer_json FROM answers "
+                "WHERE index_version = ? ORDER BY last_used DESC LIMIT ?",
+                (self._version, self.max_entries),
+            ).fetchall()
+        for key, params, emb, citations, answer_json in reversed(rows):
+            # rows written before citations were recorded never serve semantic hits
+            vector = np.frombuffer(emb, dtype=np.float32) if emb and citations else None
+            self._entries[key] = _Entry(LLMAnswer.model_validate_json(answer_json), vector, params, citations)
+
+    def _touch(self, key: str) -> None:
+        self._entries.move_to_end(key)
+
+    def get_exact(self, query: str, chunk_ids: Sequence[str], params: str) -> Optional[LLMAnswer]:
+        if not self.enabled:
+            return None
+        key = self.exact_key(query, chunk_ids, params)
+        with self._lock:
+            version = self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._touch(key)
+                self.counters["exact_hits"] += 1
+                cache_events.inc(cache="answer", result="exact_hits")
+                return entry.answer
+
+        if self.disk_path is not None:
+            with self._conn() as conn:
+                row = conn.execute(
+                    "SELECT answer_json FROM answers WHERE key = ? AND index_version = ?", (key, version)
+                ).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), key))
+            if row is not None:
+                answer = LLMAnswer.model_validate_json(row[0])
+                with self._lock:
+                    self._insert(key, _Entry(answer, None, params))
+                    self.counters["disk_hits"] += 1
+                cache_events.inc(cache="answer", result="disk_hits")
+                return answer
+
+        with self._lock:
+            self.counters["misses"] += 1
+        cache_events.inc(cache="answer", result="misses")
+        return None
+
+    def get_similar(self, query: str, query_vector: Sequence[float], params: str) -> Optional[LLMAnswer]:
+        if not self.enabled or self.similarity_threshold > 1.0:
+            return None
+        q = _unit(query_vector)
+        citations = citation_signature(query)
+        with self._lock:
+            self._check_version()
+            keys: List[str] = []
+            vectors: List[np.ndarray] = []
+            for key, entry in self._entries.items():
+                if entry.vector is not None and entry.params == params and entry.citations == citations:
+                    keys.append(key)
+                    vectors.append(entry.vector)
+            if not vectors:
+                return None
+            sims = np.stack(vectors) @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.similarity_threshold:
+                return None
+            self._touch(keys[best])
+            self.counters["semantic_hits"] += 1
+            cache_events.inc(cache="answer", result="semantic_hits")
+            return self._entries[keys[best]].answer
+
+    def _insert(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def put(
+        self,
+        query: str,
+        chunk_ids: Sequence[str],
+        params: str,
+        answer: LLMAnswer,
+        query_vector: Optional[Sequence[float]] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        key = self.exact_key(query, chunk_ids, params)
+        vector = _unit(query_vector) if query_vector is not None else None
+        citations = citation_signature(query)
+        with self._lock:
+            version = self._check_version()
+            self._insert(key, _Entry(answer, vector, params, citations))
+
+        if self.disk_path is not None:
+            with self._conn() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, index_version, params, embedding, citations, answer_json, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        version,
+                        params,
+                        vector.tobytes() if vector is not None else None,
+                        citations,
+                        answer.model_dump_json(),
+                        time.time(),
+                    ),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk_path is not None:
+            with self._conn() as conn:
+                conn.execute("DELETE FROM answers")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.counters["exact_hits"] + self.counters["semantic_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "index_version": self._version or "",
+        }
+
+
+answer_cache = AnswerCache()
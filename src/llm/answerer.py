@@ -1,7 +1,12 @@
 from __future__ import annotations
-from typing import Any, List, Optional, Sequence
+import math
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from pydantic import BaseModel
-import ollama
+
+from src.llm.client import LLM_MODEL, LLMTimings, achat, chat, timings_from_response
+from src.utils.telemetry import prompt_tokens_hist, record_stage, span, traced
 
 
 class SectionCitation(BaseModel):
@@ -12,9 +17,31 @@ class SectionCitation(BaseModel):
     page_end: int
 
 
+class PromptUsage(BaseModel):
+    chunks_in: int
+    chunks_used: int  # context blocks after merging neighbours
+    chunks_dropped: int  # did not fit the token budget
+    overlap_chars_removed: int
+    context_tokens: int  # estimates, see estimate_tokens
+    prompt_tokens: int
+    prompt_eval_count: Optional[int] = None  # as counted by Ollama
+
+
 class LLMAnswer(BaseModel):
     answer: str
     citations: List[SectionCitation]
+    usage: Optional[PromptUsage] = None
+    timings: Optional[LLMTimings] = None
+
+
+# Budget for the context passages only; the instructions and question come on top
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LAW_MATE_CONTEXT_TOKEN_BUDGET", "1500"))
+# llama tokenizers average ~4 chars per token on English statute text
+CHARS_PER_TOKEN = float(os.getenv("LAW_MATE_CHARS_PER_TOKEN", "4.0"))
+# the chunker repeats up to OVERLAP_CHARS (200) between neighbours; shorter
+# suffix/prefix matches are treated as coincidence
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
 
 
 def _get(obj: Any, key: str, default=None):
@@ -33,6 +60,111 @@ def _chunk_to_citation(chunk: Any) -> SectionCitation:
     )
 
 
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _chunk_index(chunk: Any) -> Optional[int]:
+    idx = _get(chunk, "chunk_index", None)
+    if idx is not None:
+        return int(idx)
+    # rows indexed before chunk_index was stored: chunk ids end in "-<index>"
+    tail = str(_get(chunk, "chunk_id", "") or "").rsplit("-", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def _rank_score(chunk: Any) -> float:
+    score = _get(chunk, "rerank_score", None)
+    if score is None:
+        score = _get(chunk, "score", 0.0)
+    return float(score or 0.0)
+
+
+def _overlap_len(prev: str, nxt: str) -> int:
+    # longest suffix of prev that is also a prefix of nxt
+    for k in range(min(len(prev), len(nxt), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if prev.endswith(nxt[:k]):
+            return k
+    return 0
+
+
+def merge_adjacent_chunks(chunks: Sequence[Any]) -> Tuple[List[Dict[str, Any]], int]:
+    # chunks with consecutive chunk_index in the same section become one block
+    # with the repeated overlap cut out; a block scores as its best chunk
+    groups: Dict[Tuple[str, Any], List[Tuple[int, Any]]] = {}
+    singles: List[Dict[str, Any]] = []
+    for ch in chunks:
+        idx = _chunk_index(ch)
+        section_id = _get(ch, "section_id", None)
+        if idx is None or not section_id:
+            singles.append({**_as_dict(ch), "rank_score": _rank_score(ch)})
+            continue
+        groups.setdefault((str(_get(ch, "doc_id", "")), section_id), []).append((idx, ch))
+
+    merged: List[Dict[str, Any]] = []
+    removed = 0
+    for members in groups.values():
+        members.sort(key=lambda m: m[0])
+        block: Optional[Dict[str, Any]] = None
+        last_idx = None
+        for idx, ch in members:
+            text = (_get(ch, "text", "") or "").strip()
+            if block is not None and idx == last_idx + 1:
+                cut = _overlap_len(block["text"], text)
+                removed += cut
+                block["text"] = f"{block['text']} {text[cut:].lstrip()}".rstrip()
+                block["page_start"] = min(block["page_start"], int(_get(ch, "page_start", 0)))
+                block["page_end"] = max(block["page_end"], int(_get(ch, "page_end", 0)))
+                block["rank_score"] = max(block["rank_score"], _rank_score(ch))
+            else:
+                if block is not None:
+                    merged.append(block)
+                block = {**_as_dict(ch), "text": text, "rank_score": _rank_score(ch)}
+            last_idx = idx
+        if block is not None:
+            merged.append(block)
+
+    merged.extend(singles)
+    merged.sort(key=lambda b: b["rank_score"], reverse=True)
+    return merged, removed
+
+
+def _as_dict(chunk: Any) -> Dict[str, Any]:
+    if isinstance(chunk, dict):
+        return dict(chunk)
+    return chunk.model_dump() if hasattr(chunk, "model_dump") else dict(vars(chunk))
+
+
+def assemble_context(
+    chunks: Sequence[Any],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[List[Dict[str, Any]], PromptUsage]:
+    blocks, removed = merge_adjacent_chunks(chunks)
+
+    packed: List[Dict[str, Any]] = []
+    used = 0
+    for block in blocks:
+        cost = estimate_tokens(block["text"])
+        if used + cost <= token_budget:
+            packed.append(block)
+            used += cost
+        elif not packed:
+            # the best block alone is over budget: keep its head rather than nothing
+            block["text"] = block["text"][: int(token_budget * CHARS_PER_TOKEN)]
+            packed.append(block)
+            used += estimate_tokens(block["text"])
+
+    usage = PromptUsage(
+        chunks_in=len(chunks),
+        chunks_used=len(packed),
+        chunks_dropped=len(blocks) - len(packed),
+        overlap_chars_removed=removed,
+        context_tokens=used,
+        prompt_tokens=0,
+    )
+    return packed, usage
+
+
 def build_context_block(chunks: Sequence[Any]) -> str:
     lines: List[str] = []
     for i, ch in enumerate(chunks, start=1):
@@ -84,26 +216,91 @@ If the context does not contain enough information, say:
 """.strip()
 
 
-def call_llama(prompt: str, model: str = "llama3.2:3b") -> str:
-    resp = ollama.chat(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a precise Indian legal assistant."},
-            {"role": "user", "content": prompt},
-        ],
-    )
-    return resp["message"]["content"].strip()
+@traced("prompt_build")
+def build_answer_prompt(
+    query: str,
+    chunks: Sequence[Any],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> Tuple[str, List[Dict[str, Any]], PromptUsage]:
+    # reranked chunks -> (prompt, context blocks actually used, usage)
+    blocks, usage = assemble_context(chunks, token_budget)
+    prompt = build_prompt(query, blocks)
+    usage.prompt_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt)
+    prompt_tokens_hist.observe(usage.prompt_tokens)
+    return prompt, blocks, usage
 
 
-def answer_with_llm(query: str, chunks: Sequence[Any], model: str = "llama3.2:3b") -> LLMAnswer:
-    if not chunks:
-        text = "I could not retrieve any relevant statutory text to answer this question from the index."
-        return LLMAnswer(answer=text, citations=[])
-    prompt = build_prompt(query, chunks)
-    answer_text = call_llama(prompt, model=model)
+SYSTEM_PROMPT = "You are a precise Indian legal assistant."
+NO_CONTEXT_ANSWER = "I could not retrieve any relevant statutory text to answer this question from the index."
+
+def _messages(prompt: str) -> List[dict]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def call_llama(prompt: str, model: str = LLM_MODEL) -> str:
+    with span("llm"):
+        return chat(_messages(prompt), model)["message"]["content"].strip()
+
+
+async def acall_llama(prompt: str, model: str = LLM_MODEL) -> str:
+    with span("llm"):
+        return (await achat(_messages(prompt), model))["message"]["content"].strip()
+
+
+async def astream_llama(prompt: str, model: str = LLM_MODEL) -> AsyncIterator[str]:
+    t0 = time.perf_counter()
+    stream = await achat(_messages(prompt), model, stream=True)
+    try:
+        async for part in stream:
+            token = part["message"]["content"]
+            if token:
+                yield token
+            if _get(part, "done", False):
+                timings_from_response(part)
+    finally:
+        # closing the stream drops the HTTP response, which makes Ollama stop generating
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        record_stage("llm_stream", time.perf_counter() - t0)
+
+
+def build_citations(chunks: Sequence[Any]) -> List[SectionCitation]:
     citations_map: dict[tuple, SectionCitation] = {}
     for ch in chunks:
         cit = _chunk_to_citation(ch)
         key = (cit.doc_id, cit.section_id, cit.page_start, cit.page_end)
         citations_map[key] = cit
-    return LLMAnswer(answer=answer_text, citations=list(citations_map.values()))
\ No newline at end of file
+    return list(citations_map.values())
+
+
+def _answer(resp: Any, blocks: List[Dict[str, Any]], usage: PromptUsage) -> LLMAnswer:
+    timings = timings_from_response(resp, record=False)  # chat() already recorded it
+    usage.prompt_eval_count = timings.prompt_eval_count
+    return LLMAnswer(
+        answer=resp["message"]["content"].strip(),
+        citations=build_citations(blocks),
+        usage=usage,
+        timings=timings,
+    )
+
+
+def answer_with_llm(query: str, chunks: Sequence[Any], model: str = LLM_MODEL) -> LLMAnswer:
+    if not chunks:
+        return LLMAnswer(answer=NO_CONTEXT_ANSWER, citations=[])
+    prompt, blocks, usage = build_answer_prompt(query, chunks)
+    with span("llm"):
+        resp = chat(_messages(prompt), model)
+    return _answer(resp, blocks, usage)
+
+
+async def aanswer_with_llm(query: str, chunks: Sequence[Any], model: str = LLM_MODEL) -> LLMAnswer:
+    if not chunks:
+        return LLMAnswer(answer=NO_CONTEXT_ANSWER, citations=[])
+    prompt, blocks, usage = build_answer_prompt(query, chunks)
+    with span("llm"):
+        resp = await achat(_messages(prompt), model)
+    return _answer(resp, blocks, usage)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.llm.answerer import NO_CONTEXT_ANSWER, LLMAnswer, aanswer_with_llm
+from src.llm.scheduler import PRIORITY_LOW, LLMScheduler, llm_scheduler
+from src.retrieval.hybrid_retriever import embed_queries, search_similar_chunks_batch
+from src.retrieval.ranker import rerank_chunks_batch
+from src.vectorstore.base import SearchFilter
+
+# generations one batch keeps queued or running at a time; 0 -> the scheduler's
+# max_in_flight, capped at a quarter of its queue so a large batch never fills
+# the queue interactive /ask shares
+BATCH_LLM_IN_FLIGHT = int(os.getenv("LAW_MATE_BATCH_LLM_IN_FLIGHT", "0"))
+
+
+class BatchAnswer(BaseModel):
+    # one NDJSON line of /ask_batch output
+    index: int
+    question: str
+    answer: Optional[LLMAnswer] = None
+    error: Optional[str] = None
+
+
+def retrieve_batch(
+    questions: List[str],
+    top_k: int = 20,
+    filters: Optional[SearchFilter] = None,
+) -> Tuple[List[List[float]], List[List[Dict[str, Any]]]]:
+    vectors = embed_queries(questions)
+    return vectors, search_similar_chunks_batch(questions, top_k=top_k, filters=filters, query_vectors=vectors)
+
+
+def rerank_batch(
+    questions: List[str],
+    candidate_lists: List[List[Dict[str, Any]]],
+    rerank_k: int = 5,
+) -> List[List[Dict[str, Any]]]:
+    return rerank_chunks_batch(questions, candidate_lists, top_k=rerank_k)
+
+
+def batch_in_flight(scheduler: LLMScheduler) -> int:
+    if BATCH_LLM_IN_FLIGHT > 0:
+        return BATCH_LLM_IN_FLIGHT
+    return max(1, min(scheduler.max_in_flight, scheduler.queue_size // 4))
+
+
+async def agenerate_batch(
+    questions: List[str],
+    reranked: List[List[Dict[str, Any]]],
+    *,
+    scheduler: LLMScheduler = llm_scheduler,
+    deadline_s: Optional[float] = None,
+) -> AsyncIterator[BatchAnswer]:
+    # yields answers as they finish, not in input order; bulk work queues
+    # behind interactive /ask requests at low priority, batch_in_flight() at a time
+    gate = asyncio.Semaphore(batch_in_flight(scheduler))
+
+    async def one(i: int) -> BatchAnswer:
+        if not reranked[i]:
+            return BatchAnswer(index=i, question=questions[i], answer=LLMAnswer(answer=NO_CONTEXT_ANSWER, citations=[]))
+        try:
+            async with gate:
+                answer = await scheduler.run(
+                    aanswer_with_llm, questions[i], reranked[i], priority=PRIORITY_LOW, deadline_s=deadline_s
+                )
+            return BatchAnswer(index=i, question=questions[i], answer=answer)
+        except Exception as exc:
+            return BatchAnswer(index=i, question=questions[i], error=str(exc) or type(exc).__name__)
+
+    tasks = [asyncio.ensure_future(one(i)) for i in range(len(questions))]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for t in tasks:
+            t.cancel()
+
+
+async def answer_questions(
+    questions: List[str],
+    top_k: int = 20,
+    rerank_k: int = 5,
+    filters: Optional[SearchFilter] = None,
+) -> AsyncIterator[BatchAnswer]:
+    _, candidates = retrieve_batch(questions, top_k=top_k, filters=filters)
+    reranked = rerank_batch(questions, candidates, rerank_k=rerank_k)
+    async for result in agenerate_batch(questions, reranked):
+        yield result
+
+
+async def _main(args: argparse.Namespace) -> None:
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        async for result in answer_questions(questions, top_k=args.top_k, rerank_k=args.rerank_k):
+            out.write(result.model_dump_json() + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    # python -m src.llm.batch_answerer questions.txt --out answers.ndjson
+    parser = argparse.ArgumentParser(description="Answer one question per line, NDJSON out")
+    parser.add_argument("questions")
+    parser.add_argument("--out", default="")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--rerank-k", type=int, default=5)
+    asyncio.run(_main(parser.parse_args()))
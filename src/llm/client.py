@@ -0,0 +1,129 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.utils.stats import latency_summary
+
+if TYPE_CHECKING:
+    import ollama
+
+# "ollama" (default) or "fake" (src.llm.fake_client, no server needed)
+LLM_BACKEND = os.getenv("LAW_MATE_LLM_BACKEND", "ollama").lower()
+LLM_MODEL = os.getenv("LAW_MATE_LLM_MODEL", "llama3.2:3b")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+# how long Ollama keeps the model loaded after a call ("30m", "-1" = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("LAW_MATE_OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_TIMEOUT_S = float(os.getenv("LAW_MATE_OLLAMA_TIMEOUT_S", "300"))
+
+_client: Optional[ollama.Client] = None
+_async_client: Optional[ollama.AsyncClient] = None
+_client_lock = threading.Lock()
+
+_timings_lock = threading.Lock()
+_recent_timings: deque = deque(maxlen=2000)
+
+
+class LLMTimings(BaseModel):
+    # from the final Ollama response, all durations in ms
+    load_ms: float = 0.0
+    prompt_eval_ms: float = 0.0
+    eval_ms: float = 0.0
+    total_ms: float = 0.0
+    prompt_eval_count: Optional[int] = None
+    eval_count: Optional[int] = None
+
+    @property
+    def eval_tokens_per_s(self) -> float:
+        return self.eval_count / (self.eval_ms / 1000) if self.eval_count and self.eval_ms else 0.0
+
+
+def _get(obj: Any, key: str, default=None):
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def timings_from_response(resp: Any, *, record: bool = True) -> LLMTimings:
+    def ms(key: str) -> float:
+        return round((_get(resp, key, 0) or 0) / 1e6, 3)
+
+    timings = LLMTimings(
+        load_ms=ms("load_duration"),
+        prompt_eval_ms=ms("prompt_eval_duration"),
+        eval_ms=ms("eval_duration"),
+        total_ms=ms("total_duration"),
+        prompt_eval_count=_get(resp, "prompt_eval_count", None),
+        eval_count=_get(resp, "eval_count", None),
+    )
+    if record:
+        with _timings_lock:
+            _recent_timings.append(timings)
+    return timings
+
+
+def llm_timing_report() -> Dict[str, Any]:
+    with _timings_lock:
+        recent = list(_recent_timings)
+    return {
+        "load": latency_summary([t.load_ms / 1000 for t in recent]),
+        "prompt_eval": latency_summary([t.prompt_eval_ms / 1000 for t in recent]),
+        "eval": latency_summary([t.eval_ms / 1000 for t in recent]),
+        "cold_loads": sum(1 for t in recent if t.load_ms > 1000),
+    }
+
+
+def _new_client(*, asynchronous: bool) -> ollama.Client | ollama.AsyncClient:
+    # the one place LLM_BACKEND is looked at, so sync and async callers agree
+    if LLM_BACKEND == "fake":
+        from src.llm.fake_client import FakeOllamaClient, FakeOllamaSyncClient
+        return FakeOllamaClient() if asynchronous else FakeOllamaSyncClient()
+    if LLM_BACKEND != "ollama":
+        raise ValueError(f"Unknown LAW_MATE_LLM_BACKEND={LLM_BACKEND!r}")
+    import ollama
+    cls = ollama.AsyncClient if asynchronous else ollama.Client
+    return cls(host=OLLAMA_HOST, timeout=OLLAMA_TIMEOUT_S)
+
+
+def get_client() -> ollama.Client:
+    # one client, one pooled HTTP connection set, for the whole process
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = _new_client(asynchronous=False)
+    return _client
+
+
+def get_async_client() -> ollama.AsyncClient:
+    global _async_client
+    if _async_client is None:
+        _async_client = _new_client(asynchronous=True)
+    return _async_client
+
+
+def chat(messages: List[Dict[str, str]], model: str = LLM_MODEL) -> Any:
+    resp = get_client().chat(model=model, messages=messages, keep_alive=OLLAMA_KEEP_ALIVE)
+    timings_from_response(resp)
+    return resp
+
+
+async def achat(messages: List[Dict[str, str]], model: str = LLM_MODEL, *, stream: bool = False) -> Any:
+    # streaming callers record timings themselves from the final (done) part
+    resp = await get_async_client().chat(model=model, messages=messages, stream=stream, keep_alive=OLLAMA_KEEP_ALIVE)
+    if not stream:
+        timings_from_response(resp)
+    return resp
+
+
+async def warm_up(model: str = LLM_MODEL) -> LLMTimings:
+    # an empty chat makes Ollama load the model and pin it for keep_alive
+    t0 = time.perf_counter()
+    resp = await get_async_client().chat(model=model, messages=[], keep_alive=OLLAMA_KEEP_ALIVE)
+    timings = timings_from_response(resp)
+    if not timings.total_ms:
+        timings.total_ms = round((time.perf_counter() - t0) * 1000, 3)
+    return timings
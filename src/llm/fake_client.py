@@ -0,0 +1,117 @@
+from __future__ import annotations
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+# Stand-ins for ollama.AsyncClient / ollama.Client so the API and CLIs can be
+# exercised without an Ollama server: LAW_MATE_LLM_BACKEND=fake. Tokens are emitted at a fixed rate.
+FAKE_TOKENS_PER_S = float(os.getenv("LAW_MATE_FAKE_LLM_TOKENS_PER_S", "50"))
+FAKE_PREFILL_S = float(os.getenv("LAW_MATE_FAKE_LLM_PREFILL_S", "0.05"))
+FAKE_LOAD_S = float(os.getenv("LAW_MATE_FAKE_LLM_LOAD_S", "0"))  # charged once, on the first call
+FAKE_REPLY = os.getenv(
+    "LAW_MATE_FAKE_LLM_REPLY",
+    "Based on the provided sections, the answer is set out in the cited provisions of the Act.",
+)
+
+
+class FakeOllamaClient:
+
+    def __init__(
+        self,
+        *,
+        reply: str = FAKE_REPLY,
+        tokens_per_s: float = FAKE_TOKENS_PER_S,
+        prefill_s: float = FAKE_PREFILL_S,
+        load_s: float = FAKE_LOAD_S,
+    ) -> None:
+        self.reply = reply
+        self.tokens_per_s = tokens_per_s
+        self.prefill_s = prefill_s
+        self.load_s = load_s
+        self.loaded = False
+        self.calls = 0
+        self.cancelled = 0
+
+    def _tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    async def _load(self) -> float:
+        if self.loaded:
+            return 0.0
+        await asyncio.sleep(self.load_s)
+        self.loaded = True
+        return self.load_s
+
+    def _final(self, prompt_chars: int, started: float, content: str, load_s: float = 0.0) -> Dict[str, Any]:
+        total_ns = int((time.perf_counter() - started) * 1e9)
+        n_tokens = len(self._tokens())
+        return {
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "total_duration": total_ns,
+            "load_duration": int(load_s * 1e9),
+            "prompt_eval_count": prompt_chars // 4,
+            "prompt_eval_duration": int(self.prefill_s * 1e9),
+            "eval_count": n_tokens,
+            "eval_duration": max(total_ns - int((self.prefill_s + load_s) * 1e9), 0),
+        }
+
+    async def _stream(self, prompt_chars: int) -> AsyncIterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            load_s = await self._load()
+            await asyncio.sleep(self.prefill_s)
+            for tok in self._tokens():
+                await asyncio.sleep(1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0)
+                yield {"message": {"role": "assistant", "content": tok}, "done": False}
+            yield self._final(prompt_chars, started, "", load_s)
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+
+    async def chat(self, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs: Any):
+        self.calls += 1
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        if stream:
+            return self._stream(prompt_chars)
+        started = time.perf_counter()
+        load_s = await self._load()
+        if not messages:
+            # like Ollama: an empty chat only loads the model
+            return {"message": {"role": "assistant", "content": ""}, "done": True, "load_duration": int(load_s * 1e9)}
+        await asyncio.sleep(self.prefill_s + len(self._tokens()) / max(self.tokens_per_s, 1e-9))
+        return self._final(prompt_chars, started, self.reply, load_s)
+
+
+class FakeOllamaSyncClient(FakeOllamaClient):
+    # blocking twin for ollama.Client callers (answer_with_llm, the CLIs)
+
+    def _load_sync(self) -> float:
+        if self.loaded:
+            return 0.0
+        time.sleep(self.load_s)
+        self.loaded = True
+        return self.load_s
+
+    def _stream_sync(self, prompt_chars: int) -> Iterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        load_s = self._load_sync()
+        time.sleep(self.prefill_s)
+        for tok in self._tokens():
+            time.sleep(1.0 / self.tokens_per_s if self.tokens_per_s > 0 else 0)
+            yield {"message": {"role": "assistant", "content": tok}, "done": False}
+        yield self._final(prompt_chars, started, "", load_s)
+
+    def chat(self, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs: Any):
+        self.calls += 1
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        if stream:
+            return self._stream_sync(prompt_chars)
+        started = time.perf_counter()
+        load_s = self._load_sync()
+        if not messages:
+            return {"message": {"role": "assistant", "content": ""}, "done": True, "load_duration": int(load_s * 1e9)}
+        time.sleep(self.prefill_s + len(self._tokens()) / max(self.tokens_per_s, 1e-9))
+        return self._final(prompt_chars, started, self.reply, load_s)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from src.api.concurrency import LLM_CONCURRENCY, LLM_QUEUE, Overloaded
+from src.utils.stats import latency_summary
+from src.utils.telemetry import record_stage
+
+T = TypeVar("T")
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+# a request one priority level lower is served as if it arrived this much later,
+# so low-priority work waits behind newer interactive requests but never starves
+PRIORITY_STEP_S = float(os.getenv("LAW_MATE_LLM_PRIORITY_STEP_S", "10"))
+LLM_DEADLINE_S = float(os.getenv("LAW_MATE_LLM_DEADLINE_S", "120"))
+DISCONNECT_POLL_S = 0.25
+
+
+class DeadlineExceeded(Overloaded):
+    def __init__(self, stage: str) -> None:
+        super().__init__(stage, status_code=504)
+        self.args = (f"{stage} deadline exceeded",)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class _Ticket:
+    __slots__ = ("priority", "deadline", "enqueued_at", "granted", "done")
+
+    def __init__(self, priority: int, deadline: float) -> None:
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.done = False  # left the queue: granted, cancelled or expired
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+# Admits at most max_in_flight generations to Ollama at a time. Waiters are
+# served earliest-first by arrival time shifted by PRIORITY_STEP_S per
+# priority level; each has a deadline covering queue wait plus generation.
+# Like the rest of the API concurrency code, state is only touched from the
+# event loop, so no locks.
+class LLMScheduler:
+
+    def __init__(
+        self,
+        name: str = "llm",
+        max_in_flight: int = LLM_CONCURRENCY,
+        queue_size: int = LLM_QUEUE,
+        default_deadline_s: float = LLM_DEADLINE_S,
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.default_deadline_s = default_deadline_s
+        self.in_flight = 0
+        self._heap: List[tuple] = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self._waits: deque = deque(maxlen=2000)
+        self._generations: deque = deque(maxlen=2000)
+        self.counters: Dict[str, int] = {"completed": 0, "rejected": 0, "expired": 0, "cancelled": 0}
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def ensure_capacity(self) -> None:
+        if self._queued >= self.queue_size and self.in_flight >= self.max_in_flight:
+            self.counters["rejected"] += 1
+            raise Overloaded(self.name)
+
+    def _dispatch(self) -> None:
+        while self._heap and self.in_flight < self.max_in_flight:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.done:
+                continue
+            ticket.done = True
+            self._queued -= 1
+            if ticket.remaining() <= 0:
+                self.counters["expired"] += 1
+                ticket.granted.set_exception(DeadlineExceeded(self.name))
+                continue
+            # the slot is reserved here, the waiter takes it over when it wakes up
+            self.in_flight += 1
+            ticket.granted.set_result(None)
+
+    async def _acquire(self, ticket: _Ticket) -> None:
+        if self.in_flight < self.max_in_flight and not self._queued:
+            self.in_flight += 1
+            return
+        self.ensure_capacity()
+        key = ticket.enqueued_at + ticket.priority * PRIORITY_STEP_S
+        heapq.heappush(self._heap, (key, next(self._seq), ticket))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.granted), timeout=max(ticket.remaining(), 0))
+        except BaseException as exc:
+            if not ticket.done:
+                ticket.done = True
+                self._queued -= 1
+            elif ticket.granted.done() and not ticket.granted.cancelled() and ticket.granted.exception() is None:
+                # granted while we were being cancelled: hand the slot on
+                self.in_flight -= 1
+                self._dispatch()
+            if isinstance(exc, asyncio.TimeoutError):
+                self.counters["expired"] += 1
+                raise DeadlineExceeded(self.name) from None
+            if isinstance(exc, asyncio.CancelledError):
+                self.counters["cancelled"] += 1
+            raise
+
+    @asynccontextmanager
+    async def slot(self, *, priority: int = PRIORITY_NORMAL, deadline_s: Optional[float] = None) -> AsyncIterator[_Ticket]:
+        ticket = _Ticket(priority, time.monotonic() + (deadline_s or self.default_deadline_s))
+        await self._acquire(ticket)
+        started = time.monotonic()
+        self._waits.append(started - ticket.enqueued_at)
+        record_stage("llm_queue", started - ticket.enqueued_at)
+        try:
+            yield ticket
+            self.counters["completed"] += 1
+        except DeadlineExceeded:
+            self.counters["expired"] += 1
+            raise
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            raise
+        finally:
+            self._generations.append(time.monotonic() - started)
+            self.in_flight -= 1
+            self._dispatch()
+
+    async def run(
+        self,
+        fn: Callable[..., Awaitable[T]],
+        *args: Any,
+        priority: int = PRIORITY_NORMAL,
+        deadline_s: Optional[float] = None,
+        **kwargs: Any,
+    ) -> T:
+        # queue wait and generation share one deadline
+        async with self.slot(priority=priority, deadline_s=deadline_s) as ticket:
+            try:
+                return await asyncio.wait_for(fn(*args, **kwargs), timeout=max(ticket.remaining(), 0.001))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(self.name) from None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            **self.counters,
+            "queue_wait": latency_summary(list(self._waits)),
+            "generation": latency_summary(list(self._generations)),
+        }
+
+
+async def cancel_on_disconnect(aw: Awaitable[T], is_disconnected: Callable[[], Awaitable[bool]]) -> T:
+    # runs aw, cancelling it (and whatever queue slot or Ollama request it
+    # holds) as soon as is_disconnected() reports the client is gone
+    task = asyncio.ensure_future(aw)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_S)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+llm_scheduler = LLMScheduler()
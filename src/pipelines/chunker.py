@@ -8,6 +8,8 @@ from .legal_sectionizer import LegalSection, sectionize_document
 
 MAX_CHARS_PER_CHUNK = 1200
 OVERLAP_CHARS = 200
+# bump when chunk boundaries, ids or text change; index snapshots record it
+CHUNKER_VERSION = "1"
 
 
 class Chunk(BaseModel):
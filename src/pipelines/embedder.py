@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from typing import List
+from typing import TYPE_CHECKING, List
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 
 from .chunker import Chunk, chunk_sections
 from .preprocessor import load_all_parsed_docs, ExtractedTextData
 from .legal_sectionizer import LegalSection, sectionize_document
 
+from src.inference.sidecar import MODEL_SIDECAR, SidecarEmbedder
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 EMBED_BATCH_SIZE = 32
 
@@ -26,12 +30,26 @@ class EmbeddedChunk(BaseModel):
 
     embedding:List[float]
 
+    # act-level metadata, filled in by the indexer from the acts table
+    ministry_slug:str|None = None
+    act_title:str|None = None
+    enactment_date:int|None = None
+
 _model:SentenceTransformer|None = None
 
+def load_model() -> SentenceTransformer:
+    # imported here: sentence_transformers pulls in torch and transformers (seconds)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL_NAME)
+
 def get_model() ->SentenceTransformer:
     global _model
     if _model is None:
-        _model = SentenceTransformer(EMBED_MODEL_NAME)
+        if MODEL_SIDECAR:
+            # shared model process, see src/inference/sidecar.py
+            _model = SidecarEmbedder()
+        else:
+            _model = load_model()
     return _model
 
 def embed_chunk(chunks: List[Chunk])->List[EmbeddedChunk]:
@@ -1,173 +1,373 @@
 from __future__ import annotations
+import hashlib
 import os
-from typing import List, Optional, Dict
+import sqlite3
+import time
+from typing import Any, Callable, List, Optional, Dict
 from pydantic import BaseModel
 
 from .preprocessor import ExtractedTextData, load_all_parsed_docs
 from .chunker import Chunk, chunk_sections
 from .legal_sectionizer import LegalSection, sectionize_document
 from .embedder import EmbeddedChunk, embed_chunk
+from .section_index import SECTION_INDEX, delete_doc_sections, index_sections
 
-from pymilvus import FieldSchema, Collection, CollectionSchema, DataType, connections, utility
-
-MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
-MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
-MILVUS_ALIAS = "default"
-COLLECTION_NAME = os.getenv("LAW_MATE_COLLECTION", "lawmate_india_acts")
-EMBED_DIM = int(os.getenv("LAW_MATE_EMBED_DIM", "384"))
-
-INDEX_PARAMS: Dict = {
-    "metric_type": "COSINE",      
-    "index_type": "IVF_FLAT",
-    "params": {"nlist": 1024},
-}
-
-def connect_milvus()->None:
-    if not connections.has_connection(MILVUS_ALIAS):
-        connections.connect(
-            alias = MILVUS_ALIAS,
-            host = MILVUS_HOST,
-            port = MILVUS_PORT
-    )
-        
-
-def get_or_create_collection() -> Collection:
-    
-    connect_milvus()
-    existing = utility.list_collections(using=MILVUS_ALIAS)
-    if COLLECTION_NAME in existing:
-        coll = Collection(name = COLLECTION_NAME, using = MILVUS_ALIAS)
-        coll.load()
-        return coll
-    
-    fields = [
-        FieldSchema(
-            name = 'chunk_id',
-            dtype = DataType.VARCHAR,
-            is_primary = True,
-            auto_id = False,
-            max_length = 128
-        ),
-        FieldSchema(
-            name="doc_id",
-            dtype = DataType.VARCHAR,
-            max_length = 64          
-        ),
-          FieldSchema(
-            name="section_id",
-            dtype=DataType.VARCHAR,
-            max_length=32,
-        ),
-        FieldSchema(
-            name="section_heading",
-            dtype=DataType.VARCHAR,
-            max_length=512,
-        ),
-        FieldSchema(
-            name="part",
-            dtype=DataType.VARCHAR,
-            max_length=64,
-        ),
-        FieldSchema(
-            name="chapter",
-            dtype=DataType.VARCHAR,
-            max_length=64,
-        ),
-        FieldSchema(
-            name="page_start",
-            dtype=DataType.INT32,
-        ),
-        FieldSchema(
-            name="page_end",
-            dtype=DataType.INT32,
-        ),
-        FieldSchema(
-            name="text",
-            dtype=DataType.VARCHAR,
-            max_length=8192,  #can be changed according tot the size of the chunk
-        ),
-        FieldSchema(
-            name="embedding",
-            dtype=DataType.FLOAT_VECTOR,
-            dim=EMBED_DIM,
-        ),
-    ]
-    
-    schema = CollectionSchema(
-        fields = fields,
-        description =  "LawMate India - legal act chunks"
-    )
+from src.db.acts_dao import load_act_metadata_by_asset, parse_enactment_date
+from src.retrieval.citation_index import act_aliases, get_citation_index
+from src.vectorstore.base import CHUNK_FIELDS, SearchFilter, VectorStore, date_to_int
+from src.vectorstore.chunk_store import ChunkTextStore, get_chunk_store
+from src.vectorstore.factory import get_section_store, get_vector_store
+from src.vectorstore.index_version import bump_index_version
+
+INSERT_BATCH_ROWS = int(os.getenv("LAW_MATE_INSERT_BATCH_ROWS", "2000"))
+INSERT_BATCH_BYTES = int(os.getenv("LAW_MATE_INSERT_BATCH_BYTES", str(32 * 1024 * 1024)))
+FLUSH_INTERVAL_S = float(os.getenv("LAW_MATE_FLUSH_INTERVAL_S", "0"))  # 0 -> flush only on close
+ACT_FIELDS = ["ministry_slug", "act_title", "enactment_date"]
+# reindex by diffing chunk hashes against the store instead of delete + reinsert
+INDEX_DIFF = os.getenv("LAW_MATE_INDEX_DIFF", "1") == "1"
+
+
+def delete_doc_chunks(doc_id: str, *, flush: bool = True) -> int:
+    store = get_vector_store()
+    deleted = store.delete(doc_ids=[doc_id])
+    get_chunk_store().delete(doc_ids=[doc_id])
+    get_citation_index().delete_doc(doc_id)
+    if SECTION_INDEX:
+        delete_doc_sections(doc_id)
+    if flush:
+        store.flush()
+    return deleted
+
+
+class WriterStats(BaseModel):
+    rows_inserted: int = 0
+    rows_upserted: int = 0
+    rows_unchanged: int = 0
+    rows_deleted: int = 0
+    bytes_inserted: int = 0
+    insert_batches: int = 0
+    delete_batches: int = 0
+    flushes: int = 0
+    insert_s: float = 0.0
+    delete_s: float = 0.0
+    flush_s: float = 0.0
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    def elapsed_s(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return max(end - self.started_at, 1e-9)
+
+    def summary(self) -> Dict:
+        elapsed = self.elapsed_s()
+        written = self.rows_inserted + self.rows_upserted
+        return {
+            **self.model_dump(exclude={"started_at", "finished_at"}),
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(written / elapsed, 1),
+            "mb_per_s": round(self.bytes_inserted / elapsed / (1024 * 1024), 3),
+        }
+
+
+_act_metadata: Optional[Dict[str, dict]] = None
+
+
+def _act_record(doc_id: str) -> Dict[str, Any]:
+    global _act_metadata
+    if _act_metadata is None:
+        try:
+            _act_metadata = load_act_metadata_by_asset()
+        except sqlite3.Error as e:
+            print(f"[indexer] could not read acts metadata ({e}), indexing without it")
+            _act_metadata = {}
+    return _act_metadata.get(doc_id) or {}
+
+
+def get_act_fields(doc_id: str) -> Dict[str, Any]:
+    act = _act_record(doc_id)
+    enacted = date_to_int(parse_enactment_date(act.get("enactment_date_raw")))
+    return {
+        "ministry_slug": act.get("ministry_slug") or "",
+        "act_title": act.get("act_title") or "",
+        "enactment_date": enacted or 0,
+    }
 
-    coll = Collection(
-        name = COLLECTION_NAME,
-        schema = schema,
-        using = MILVUS_ALIAS,
-        shards_num = 2
-    )
 
-    coll.create_index(
-        field_name = "embedding",
-        index_params = INDEX_PARAMS
+def chunk_content_hash(chunk: Chunk | EmbeddedChunk, act_fields: Optional[Dict[str, Any]] = None) -> str:
+    # anything that ends up in the stored row, so metadata-only edits are picked up too
+    if act_fields is None:
+        act_fields = {f: getattr(chunk, f, None) for f in ACT_FIELDS}
+    payload = "\x1f".join(
+        str(v or "") for v in (
+            chunk.text,
+            chunk.section_id,
+            chunk.section_heading,
+            chunk.part,
+            chunk.chapter,
+            chunk.page_start,
+            chunk.page_end,
+            *(act_fields.get(f) for f in ACT_FIELDS),
+        )
     )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
-    utility.index_building_progress(COLLECTION_NAME, using = MILVUS_ALIAS)
-    coll.flush()
-    coll.load()
-    return coll
 
+def _with_act_fields(embedded: List[EmbeddedChunk], act_fields: Dict[str, Any]) -> List[EmbeddedChunk]:
+    return [ec.model_copy(update=act_fields) for ec in embedded]
 
-def delete_doc_chunks(doc_id: str) -> int:
-    coll = get_or_create_collection()
-    expr = f"doc_id == '{doc_id}'"
-    res = coll.delete(expr)
-    coll.flush()
 
-    try:
-        return res.delete_count
-    except AttributeError:
-        return 0
+def _empty_columns() -> Dict[str, List]:
+    return {name: [] for name in CHUNK_FIELDS}
+
+
+def _append_row(cols: Dict[str, List], ec: EmbeddedChunk) -> None:
+    cols["chunk_id"].append(ec.chunk_id)
+    cols["doc_id"].append(ec.doc_id)
+    cols["section_id"].append(ec.section_id or "")
+    cols["section_heading"].append(ec.section_heading or "")
+    cols["part"].append(ec.part or "")
+    cols["chapter"].append(ec.chapter or "")
+    cols["page_start"].append(ec.page_start)
+    cols["page_end"].append(ec.page_end)
+    cols["chunk_index"].append(ec.chunk_index)
+    cols["text"].append(ec.text)
+    cols["content_hash"].append(chunk_content_hash(ec))
+    cols["ministry_slug"].append(ec.ministry_slug or "")
+    cols["act_title"].append(ec.act_title or "")
+    cols["enactment_date"].append(ec.enactment_date or 0)
+    cols["embedding"].append(ec.embedding)
+
+
+# Buffers chunk rows column-wise and writes them in large batches. Queued doc
+# deletes go out as one batched delete right before the next insert batch, so
+# old chunks are gone before the new ones land. Diff updates (upserts plus
+# vanished chunk ids) are only cut at document boundaries and applied through
+# store.apply_diff, so each document flips over in one step. Flushes once on
+# close(), or every flush_interval_s seconds if set (checked on each write).
+# Text and metadata go to the chunk store before the vectors, so a search never
+# returns an id that cannot be hydrated. Callbacks queued with after_write run
+# once everything added before them has been written.
+class VectorBatchWriter:
+
+    def __init__(
+        self,
+        store: Optional[VectorStore] = None,
+        *,
+        chunk_store: Optional[ChunkTextStore] = None,
+        max_rows: int = INSERT_BATCH_ROWS,
+        max_bytes: int = INSERT_BATCH_BYTES,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ) -> None:
+        self.store = store if store is not None else get_vector_store()
+        self.chunk_store = chunk_store if chunk_store is not None else get_chunk_store()
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.flush_interval_s = flush_interval_s
+
+        self.stats = WriterStats(started_at=time.perf_counter())
+        self._columns: Dict[str, List] = _empty_columns()
+        self._upserts: Dict[str, List] = _empty_columns()
+        self._pending_bytes = 0
+        self._pending_deletes: List[str] = []
+        self._pending_chunk_deletes: List[str] = []
+        self._after_write: List[Callable[[], None]] = []
+        self._last_flush = time.perf_counter()
+        self._dirty = False
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._columns["chunk_id"]) + len(self._upserts["chunk_id"])
+
+    def _batch_full(self) -> bool:
+        return self.pending_rows >= self.max_rows or self._pending_bytes >= self.max_bytes
+
+    def delete_docs(self, doc_ids: List[str]) -> None:
+        for doc_id in doc_ids:
+            if doc_id not in self._pending_deletes:
+                self._pending_deletes.append(doc_id)
+
+    def after_write(self, fn: Callable[[], None]) -> None:
+        self._after_write.append(fn)
+
+    def add(self, embedded_chunks: List[EmbeddedChunk]) -> int:
+        for ec in embedded_chunks:
+            _append_row(self._columns, ec)
+            self._pending_bytes += _estimate_row_bytes(ec)
+
+            if self._batch_full():
+                self._write_batch()
+                self._maybe_timed_flush()
+
+        return len(embedded_chunks)
+
+    def add_diff(self, changed: List[EmbeddedChunk], vanished_chunk_ids: List[str]) -> int:
+        for ec in changed:
+            _append_row(self._upserts, ec)
+            self._pending_bytes += _estimate_row_bytes(ec)
+        self._pending_chunk_deletes.extend(vanished_chunk_ids)
 
-def index_chunks(embedded_chunks: List[EmbeddedChunk]) ->int:
+        if self._batch_full():
+            self._write_batch()
+            self._maybe_timed_flush()
+        return len(changed)
+
+    def _issue_deletes(self) -> None:
+        if not self._pending_deletes:
+            return
+        t0 = time.perf_counter()
+        deleted = self.store.delete(doc_ids=self._pending_deletes)
+        self.chunk_store.delete(doc_ids=self._pending_deletes)
+        self.stats.delete_s += time.perf_counter() - t0
+        self.stats.delete_batches += 1
+        self.stats.rows_deleted += deleted
+        self._pending_deletes = []
+        self._dirty = True
+
+    def _write_batch(self) -> None:
+        self._issue_deletes()
+        rows = len(self._columns["chunk_id"])
+        if rows:
+            t0 = time.perf_counter()
+            self.chunk_store.put(self._columns)
+            self.store.insert(self._columns)
+            self.stats.insert_s += time.perf_counter() - t0
+            self.stats.insert_batches += 1
+            self.stats.rows_inserted += rows
+            self._columns = _empty_columns()
+            self._dirty = True
+
+        upserts = len(self._upserts["chunk_id"])
+        if upserts or self._pending_chunk_deletes:
+            t0 = time.perf_counter()
+            self.chunk_store.put(self._upserts)
+            _, deleted = self.store.apply_diff(self._upserts, self._pending_chunk_deletes)
+            self.chunk_store.delete(chunk_ids=self._pending_chunk_deletes)
+            self.stats.insert_s += time.perf_counter() - t0
+            self.stats.insert_batches += 1
+            self.stats.rows_upserted += upserts
+            self.stats.rows_deleted += deleted
+            self._upserts = _empty_columns()
+            self._pending_chunk_deletes = []
+            self._dirty = True
+
+        self.stats.bytes_inserted += self._pending_bytes
+        self._pending_bytes = 0
+
+        callbacks, self._after_write = self._after_write, []
+        for fn in callbacks:
+            fn()
+
+    def _maybe_timed_flush(self) -> None:
+        if self.flush_interval_s > 0 and time.perf_counter() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self) -> None:
+        self._write_batch()
+        if not self._dirty:
+            return
+        t0 = time.perf_counter()
+        self.store.flush()
+        self.stats.flush_s += time.perf_counter() - t0
+        self.stats.flushes += 1
+        self._last_flush = time.perf_counter()
+        self._dirty = False
+
+    def close(self) -> WriterStats:
+        self.flush()
+        self.stats.finished_at = time.perf_counter()
+        return self.stats
+
+    def __enter__(self) -> "VectorBatchWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def _estimate_row_bytes(ec: EmbeddedChunk) -> int:
+    scalars = (ec.chunk_id, ec.doc_id, ec.section_id, ec.section_heading, ec.part, ec.chapter, ec.text)
+    return sum(len(v) for v in scalars if v) + 8 + 64 + 4 * len(ec.embedding)
+
+
+def index_chunks(embedded_chunks: List[EmbeddedChunk], writer: Optional[VectorBatchWriter] = None) -> int:
     if not embedded_chunks:
         return 0
 
-    coll: Collection = get_or_create_collection()
-
-    rows = []
-    for ec in embedded_chunks:
-        rows.append(
-            {
-                "chunk_id": ec.chunk_id,
-                "doc_id": ec.doc_id,
-                "section_id": ec.section_id or "",
-                "section_heading": ec.section_heading or "",
-                "part": ec.part or "",
-                "chapter": ec.chapter or "",
-                "page_start": ec.page_start,
-                "page_end": ec.page_end,
-                "text": ec.text,
-                "embedding": ec.embedding,  # this is a List[float]
-            }
-        )
+    if writer is not None:
+        return writer.add(embedded_chunks)
 
-    insert_result = coll.insert(rows)
-    coll.flush()
+    with VectorBatchWriter() as one_off:
+        one_off.add(embedded_chunks)
+    return one_off.stats.rows_inserted
 
-    try:
-        return len(insert_result.primary_keys)
-    except AttributeError:
-        return len(rows)
-    
-def index_document(doc: ExtractedTextData, *, reindex: bool = True) -> int:
-    if reindex:
-        deleted = delete_doc_chunks(doc.doc_id)
-        if deleted:
-            print(f"Deleted {deleted} chunks for Document {doc.doc_id} from Milvus Database")
+
+def fetch_stored_hashes(doc_id: str, store: Optional[VectorStore] = None) -> Dict[str, str]:
+    store = store if store is not None else get_vector_store()
+    rows = store.query(SearchFilter(doc_ids=[doc_id]), output_fields=["chunk_id", "content_hash"])
+    return {r["chunk_id"]: (r.get("content_hash") or "") for r in rows}
+
+
+def _index_document_diff(
+    chunks: List[Chunk],
+    doc_id: str,
+    act_fields: Dict[str, Any],
+    writer: VectorBatchWriter,
+) -> Dict[str, int]:
+    stored = fetch_stored_hashes(doc_id, writer.store)
+    changed = [c for c in chunks if stored.get(c.chunk_id) != chunk_content_hash(c, act_fields)]
+    live_ids = {c.chunk_id for c in chunks}
+    vanished = [cid for cid in stored if cid not in live_ids]
+
+    # unchanged chunks are not even re-embedded
+    writer.add_diff(_with_act_fields(embed_chunk(changed), act_fields), vanished)
+    writer.stats.rows_unchanged += len(chunks) - len(changed)
+    return {"upserted": len(changed), "deleted": len(vanished), "unchanged": len(chunks) - len(changed)}
+
+
+def index_document(
+    doc: ExtractedTextData,
+    *,
+    reindex: bool = True,
+    diff: bool = INDEX_DIFF,
+    writer: Optional[VectorBatchWriter] = None,
+) -> int:
+    if writer is None:
+        with VectorBatchWriter() as one_off:
+            return index_document(doc, reindex=reindex, diff=diff, writer=one_off)
 
     sections = sectionize_document(doc)
     chunks = chunk_sections(sections)
-    embedded = embed_chunk(chunks)
-    inserted = index_chunks(embedded)
+    act_fields = get_act_fields(doc.doc_id)
+    act = _act_record(doc.doc_id)
+    enacted = parse_enactment_date(act.get("enactment_date_raw"))
+
+    def publish() -> None:
+        # section rows and citation lookups point at chunk ids, so they only go
+        # out once this document's chunks are in the chunk store and the index
+        if SECTION_INDEX:
+            counts = index_sections(doc.doc_id, sections, act_fields)
+            print(f"[indexer] doc_id={doc.doc_id}: section index upserted={counts['upserted']}, deleted={counts['deleted']}")
+        get_citation_index().put_doc(
+            doc.doc_id,
+            act_aliases(act.get("act_title") or "", act.get("act_number"), str(enacted.year) if enacted else None),
+            [(c.section_id, c.chunk_index, c.chunk_id) for c in chunks],
+        )
+
+    if reindex and diff:
+        counts = _index_document_diff(chunks, doc.doc_id, act_fields, writer)
+        writer.after_write(publish)
+        print(
+            f"[indexer] doc_id={doc.doc_id}: sections={len(sections)}, chunks={len(chunks)}, "
+            f"upserted={counts['upserted']}, deleted={counts['deleted']}, unchanged={counts['unchanged']}"
+        )
+        return counts["upserted"]
+
+    if reindex:
+        writer.delete_docs([doc.doc_id])
+
+    embedded = _with_act_fields(embed_chunk(chunks), act_fields)
+    inserted = index_chunks(embedded, writer=writer)
+    writer.after_write(publish)
 
     print(
         f"[indexer] doc_id={doc.doc_id}: sections={len(sections)}, "
@@ -176,7 +376,7 @@ def index_document(doc: ExtractedTextData, *, reindex: bool = True) -> int:
     return inserted
 
 
-def index_all_documents(max_docs: int | None = None, *, reindex: bool = True) -> None:
+def index_all_documents(max_docs: int | None = None, *, reindex: bool = True, diff: bool = INDEX_DIFF) -> None:
     print("Loading parsed documents...")
     docs = load_all_parsed_docs()
     print(f"Found {len(docs)} documents")
@@ -185,12 +385,21 @@ def index_all_documents(max_docs: int | None = None, *, reindex: bool = True) ->
         docs = docs[:max_docs]
 
     total_inserted = 0
-    for i, doc in enumerate(docs, start=1):
-        print(f"\n[{i}/{len(docs)}] Indexing doc_id={doc.doc_id} ...")
-        inserted = index_document(doc, reindex=reindex)
-        total_inserted += inserted
+    with VectorBatchWriter() as writer:
+        for i, doc in enumerate(docs, start=1):
+            print(f"\n[{i}/{len(docs)}] Indexing doc_id={doc.doc_id} ...")
+            inserted = index_document(doc, reindex=reindex, diff=diff, writer=writer)
+            total_inserted += inserted
+
+    if SECTION_INDEX:
+        get_section_store().flush()
+
+    print(f"\n[indexer] Total written chunks across docs: {total_inserted}")
+    print(f"[indexer] Writer stats: {writer.stats.summary()}")
 
-    print(f"\n[indexer] Total inserted chunks across docs: {total_inserted}")
+    stats = writer.stats
+    if stats.rows_inserted or stats.rows_upserted or stats.rows_deleted:
+        print(f"[indexer] Index version -> {bump_index_version()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import hashlib
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .chunker import _split_to_sentences
+from .embedder import EMBED_BATCH_SIZE, get_model
+from .legal_sectionizer import LegalSection
+
+from src.vectorstore.base import CHUNK_FIELDS, SearchFilter, VectorStore
+from src.vectorstore.factory import get_section_store
+
+# Coarse index for coarse-to-fine retrieval: per section one vector for the
+# heading ("<act>. Section 5. Extension of powers ...") and one for a short
+# extractive summary of its body. Rows use the chunk schema with
+# chunk_index = position of the section in the act, so hits map straight to
+# (doc_id, section_id) filters for the chunk search.
+SECTION_INDEX = os.getenv("LAW_MATE_SECTION_INDEX", "1") == "1"
+SUMMARY_MAX_CHARS = int(os.getenv("LAW_MATE_SECTION_SUMMARY_CHARS", "600"))
+SUMMARY_MAX_SENTENCES = 3
+
+_WORD_RE = re.compile(r"[a-z]{3,}")
+_STOPWORDS = {
+    "the", "and", "for", "any", "such", "shall", "may", "under", "this", "that", "with", "from", "which",
+    "has", "have", "been", "not", "other", "all", "being", "where", "there", "their", "section", "act",
+}
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def extractive_summary(section: LegalSection, max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    # lead sentence plus the sentences densest in the section's frequent
+    # terms, kept in document order
+    sentences = _split_to_sentences(section.body.replace("\n", " "))
+    if not sentences:
+        return ""
+    freq = Counter(_words(section.body))
+
+    def density(s: str) -> float:
+        words = _words(s)
+        return sum(freq[w] for w in words) / (len(words) + 5)
+
+    ranked = sorted(range(1, len(sentences)), key=lambda i: density(sentences[i]), reverse=True)
+    picked = [0]
+    used = len(sentences[0])
+    for i in ranked:
+        if len(picked) >= SUMMARY_MAX_SENTENCES or used + len(sentences[i]) + 1 > max_chars:
+            continue
+        picked.append(i)
+        used += len(sentences[i]) + 1
+    return " ".join(sentences[i] for i in sorted(picked))[:max_chars]
+
+
+def _heading_text(section: LegalSection, act_title: str) -> str:
+    label = f"Section {section.section_id}" if section.section_type == "SECTION" and section.section_id else (section.section_id or "")
+    return ". ".join(p for p in (act_title, label, section.heading or "") if p)
+
+
+def section_rows(doc_id: str, sections: List[LegalSection], act_fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # rows without embeddings; two per section (heading, summary), summary
+    # skipped when the body is empty
+    rows: List[Dict[str, Any]] = []
+    for pos, s in enumerate(sections):
+        summary = extractive_summary(s)
+        texts = {"h": _heading_text(s, act_fields.get("act_title") or "")}
+        if summary:
+            texts["s"] = f"{s.heading or ''}. {summary}".lstrip(". ")
+        for kind, text in texts.items():
+            if not text:
+                continue
+            row = {
+                "chunk_id": f"{doc_id}-{s.section_id or 'PREAMBLE'}-{pos}-{kind}",
+                "doc_id": doc_id,
+                "section_id": s.section_id or "",
+                "section_heading": s.heading or "",
+                "part": s.part or "",
+                "chapter": s.chapter or "",
+                "page_start": s.page_start,
+                "page_end": s.page_end,
+                "chunk_index": pos,
+                "text": text,
+                "ministry_slug": act_fields.get("ministry_slug") or "",
+                "act_title": act_fields.get("act_title") or "",
+                "enactment_date": act_fields.get("enactment_date") or 0,
+            }
+            row["content_hash"] = hashlib.sha256(
+                "\x1f".join(str(row[f]) for f in ("text", "section_id", "part", "chapter", "page_start", "page_end", "ministry_slug", "enactment_date")).encode("utf-8")
+            ).hexdigest()
+            rows.append(row)
+    return rows
+
+
+def _columns(rows: List[Dict[str, Any]], vectors: List[List[float]]) -> Dict[str, List[Any]]:
+    cols: Dict[str, List[Any]] = {name: [] for name in CHUNK_FIELDS}
+    for row, vec in zip(rows, vectors):
+        for name in CHUNK_FIELDS:
+            cols[name].append(vec if name == "embedding" else row.get(name))
+    return cols
+
+
+def index_sections(
+    doc_id: str,
+    sections: List[LegalSection],
+    act_fields: Dict[str, Any],
+    store: Optional[VectorStore] = None,
+) -> Dict[str, int]:
+    # diffed on content_hash like the chunk index: only new or changed rows are embedded
+    store = store if store is not None else get_section_store()
+    rows = section_rows(doc_id, sections, act_fields)
+    stored = {
+        r["chunk_id"]: r.get("content_hash") or ""
+        for r in store.query(SearchFilter(doc_ids=[doc_id]), output_fields=["chunk_id", "content_hash"])
+    }
+    changed = [r for r in rows if stored.get(r["chunk_id"]) != r["content_hash"]]
+    live = {r["chunk_id"] for r in rows}
+    vanished = [cid for cid in stored if cid not in live]
+
+    vectors: List[List[float]] = []
+    if changed:
+        model = get_model()
+        vectors = [v.tolist() for v in model.encode([r["text"] for r in changed], batch_size=EMBED_BATCH_SIZE)]
+    upserted, deleted = store.apply_diff(_columns(changed, vectors), vanished)
+    return {"sections": len(sections), "upserted": upserted, "deleted": deleted, "unchanged": len(rows) - len(changed)}
+
+
+def delete_doc_sections(doc_id: str, store: Optional[VectorStore] = None) -> int:
+    store = store if store is not None else get_section_store()
+    return store.delete(doc_ids=[doc_id])
@@ -0,0 +1,296 @@
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .chunker import CHUNKER_VERSION, MAX_CHARS_PER_CHUNK, OVERLAP_CHARS
+from .embedder import EMBED_MODEL_NAME
+from .indexer import INSERT_BATCH_ROWS
+
+from src.retrieval.citation_index import CITATION_INDEX_DB
+from src.vectorstore.base import CHUNK_FIELDS, SCALAR_FIELDS, VECTOR_FIELD, VectorStore
+from src.vectorstore.chunk_store import ChunkTextStore, get_chunk_store
+from src.vectorstore.factory import VECTOR_BACKEND, get_section_store, get_vector_store
+from src.vectorstore.index_version import bump_index_version, get_index_version
+
+try:
+    import pyarrow as pa  # optional, metadata is written as JSON lines without it
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Self-contained copy of a built index, so a fresh environment loads it in
+# minutes instead of re-running parse -> chunk -> embed:
+#   manifest.json            model name, dim, chunker version, row counts, checksums
+#   chunks.parquet           chunk metadata and text (chunks.jsonl without pyarrow)
+#   embeddings.npy           float32 (rows, dim), same row order as chunks.*
+#   sections.* / section_embeddings.npy   the section heading/summary index
+#   citation_index.db        the exact-citation index
+#
+#   python -m src.pipelines.snapshot export data/snapshots/2026-10
+#   python -m src.pipelines.snapshot import data/snapshots/2026-10
+SNAPSHOT_FORMAT = 1
+EXPORT_BATCH_ROWS = int(os.getenv("LAW_MATE_SNAPSHOT_BATCH_ROWS", "5000"))
+
+_INT_FIELDS = {"page_start", "page_end", "chunk_index", "enactment_date"}
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _arrow_schema():
+    return pa.schema([(name, pa.int64() if name in _INT_FIELDS else pa.string()) for name in SCALAR_FIELDS])
+
+
+class _MetadataWriter:
+    # parquet when pyarrow is installed, JSON lines otherwise
+
+    def __init__(self, root: Path, name: str) -> None:
+        self.format = "parquet" if pa is not None else "jsonl"
+        self.path = root / f"{name}.{self.format}"
+        self._parquet = pq.ParquetWriter(self.path, _arrow_schema()) if pa is not None else None
+        self._jsonl = open(self.path, "w", encoding="utf-8") if pa is None else None
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self._parquet is not None:
+            cols = {name: [r.get(name) for r in rows] for name in SCALAR_FIELDS}
+            self._parquet.write_table(pa.Table.from_pydict(cols, schema=_arrow_schema()))
+        else:
+            for r in rows:
+                self._jsonl.write(json.dumps({name: r.get(name) for name in SCALAR_FIELDS}, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        else:
+            self._jsonl.close()
+
+
+def _read_metadata(path: Path, batch_rows: int) -> Iterator[Dict[str, List[Any]]]:
+    if path.suffix == ".parquet":
+        if pq is None:
+            raise RuntimeError(f"{path} is parquet but pyarrow is not installed")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield batch.to_pydict()
+        return
+    cols: Dict[str, List[Any]] = {name: [] for name in SCALAR_FIELDS}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            for name in SCALAR_FIELDS:
+                cols[name].append(row.get(name))
+            if len(cols["chunk_id"]) >= batch_rows:
+                yield cols
+                cols = {name: [] for name in SCALAR_FIELDS}
+    if cols["chunk_id"]:
+        yield cols
+
+
+def _export_store(
+    store: VectorStore,
+    root: Path,
+    name: str,
+    embeddings_name: str,
+    chunk_store: Optional[ChunkTextStore] = None,
+) -> Dict[str, Any]:
+    # metadata rows and their vectors, written in the same order; with a chunk
+    # store, text and metadata come from it (Milvus collections have no text).
+    # Rows are counted while iterating: the vectors go to a raw file first and
+    # become the .npy once the shape is known.
+    writer = _MetadataWriter(root, name)
+    emb_path = root / embeddings_name
+    raw_path = emb_path.with_suffix(".f32.part")
+    rows = dim = 0
+    try:
+        with open(raw_path, "wb") as raw:
+            for batch in store.iter_rows(CHUNK_FIELDS, batch_size=EXPORT_BATCH_ROWS):
+                if chunk_store is not None:
+                    records = chunk_store.get_many([r["chunk_id"] for r in batch])
+                    batch = [{**r, **records.get(r["chunk_id"], {})} for r in batch]
+                mat = np.asarray([r[VECTOR_FIELD] for r in batch], dtype=np.float32)
+                if dim and mat.shape[1] != dim:
+                    raise ValueError(f"{name}: vectors of dim {mat.shape[1]} after dim {dim}")
+                dim = mat.shape[1]
+                raw.write(mat.tobytes())
+                writer.write(batch)
+                rows += len(batch)
+        if rows:
+            vectors = np.lib.format.open_memmap(emb_path, mode="w+", dtype=np.float32, shape=(rows, dim))
+            src = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            for start in range(0, rows, EXPORT_BATCH_ROWS):
+                vectors[start:start + EXPORT_BATCH_ROWS] = src[start:start + EXPORT_BATCH_ROWS]
+            vectors.flush()
+            del vectors, src
+        else:
+            np.save(emb_path, np.zeros((0, 0), dtype=np.float32))
+    finally:
+        writer.close()
+        raw_path.unlink(missing_ok=True)
+    return {
+        "rows": rows,
+        "dim": dim,
+        "metadata": writer.path.name,
+        "embeddings": emb_path.name,
+        "sha256": {p.name: _sha256(p) for p in (writer.path, emb_path)},
+    }
+
+
+def export_snapshot(out_dir: str | Path, *, sections: bool = True) -> Dict[str, Any]:
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    if (root / "manifest.json").exists():
+        raise FileExistsError(f"{root} already holds a snapshot")
+    t0 = time.perf_counter()
+
+    parts: Dict[str, Any] = {
+        "chunks": _export_store(get_vector_store(), root, "chunks", "embeddings.npy", chunk_store=get_chunk_store()),
+    }
+    print(f"[snapshot] chunks: {parts['chunks']['rows']} rows")
+    if sections:
+        parts["sections"] = _export_store(get_section_store(), root, "sections", "section_embeddings.npy")
+        print(f"[snapshot] sections: {parts['sections']['rows']} rows")
+    if CITATION_INDEX_DB and Path(CITATION_INDEX_DB).exists():
+        # backup API: a consistent copy even while the indexer is writing
+        dst_path = root / "citation_index.db"
+        with sqlite3.connect(CITATION_INDEX_DB) as src, sqlite3.connect(dst_path) as dst:
+            src.backup(dst)
+        parts["citation_index"] = {"file": dst_path.name, "sha256": {dst_path.name: _sha256(dst_path)}}
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "embed_model": EMBED_MODEL_NAME,
+        "dim": parts["chunks"]["dim"],
+        "chunker_version": CHUNKER_VERSION,
+        "chunker": {"max_chars": MAX_CHARS_PER_CHUNK, "overlap_chars": OVERLAP_CHARS},
+        "source_backend": VECTOR_BACKEND,
+        "index_version": get_index_version(),
+        "parts": parts,
+    }
+    (root / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    print(f"[snapshot] wrote {root} in {time.perf_counter() - t0:.1f}s")
+    return manifest
+
+
+def load_manifest(snapshot_dir: Path, *, verify: bool = True) -> Dict[str, Any]:
+    manifest = json.loads((snapshot_dir / "manifest.json").read_text(encoding="utf-8"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"unsupported snapshot format {manifest.get('format')!r}")
+    if verify:
+        for part in manifest["parts"].values():
+            for name, digest in part["sha256"].items():
+                if _sha256(snapshot_dir / name) != digest:
+                    raise ValueError(f"{snapshot_dir / name} does not match the manifest checksum")
+    return manifest
+
+
+def _batches(snapshot_dir: Path, part: Dict[str, Any]) -> Iterator[Dict[str, List[Any]]]:
+    # column batches with embeddings, ready for VectorStore.insert
+    vectors = np.load(snapshot_dir / part["embeddings"], mmap_mode="r")
+    start = 0
+    for cols in _read_metadata(snapshot_dir / part["metadata"], INSERT_BATCH_ROWS):
+        n = len(cols["chunk_id"])
+        cols[VECTOR_FIELD] = np.asarray(vectors[start:start + n]).tolist()
+        start += n
+        yield cols
+    if start != len(vectors):
+        raise ValueError(f"{part['metadata']} has {start} rows but {part['embeddings']} has {len(vectors)}")
+
+
+def _put_records(batches: Iterator[Dict[str, List[Any]]], chunk_store: ChunkTextStore) -> Iterator[Dict[str, List[Any]]]:
+    # chunk store first, like the indexer: a vector hit must always hydrate
+    for cols in batches:
+        chunk_store.put(cols)
+        yield cols
+
+
+def _insert(store: VectorStore, batches: Iterator[Dict[str, List[Any]]]) -> int:
+    rows = 0
+    for cols in batches:
+        rows += store.insert(cols)
+    store.flush()
+    return rows
+
+
+def import_snapshot(snapshot_dir: str | Path, *, bulk: bool = True, force: bool = False) -> Dict[str, int]:
+    root = Path(snapshot_dir)
+    manifest = load_manifest(root)
+    if manifest["embed_model"] != EMBED_MODEL_NAME and not force:
+        raise ValueError(
+            f"snapshot was embedded with {manifest['embed_model']}, this build queries with {EMBED_MODEL_NAME} "
+            "(--force to load it anyway)"
+        )
+    if manifest["chunker_version"] != CHUNKER_VERSION:
+        print(
+            f"[snapshot] chunker version {manifest['chunker_version']} != {CHUNKER_VERSION}: "
+            "the next indexer run will re-chunk and re-embed changed documents"
+        )
+
+    parts = manifest["parts"]
+    targets = [("chunks", get_vector_store())]
+    if "sections" in parts:
+        targets.append(("sections", get_section_store()))
+    for name, store in targets:
+        if store.count():
+            raise RuntimeError(f"target {name} store is not empty; import into a fresh collection or directory")
+        # before anything is written, not a reshape error halfway through the load
+        if parts[name]["rows"] and parts[name]["dim"] != store.dim:
+            raise ValueError(
+                f"snapshot {name} vectors have dim {parts[name]['dim']} but the target {name} store has dim "
+                f"{store.dim} (LAW_MATE_EMBED_DIM)"
+            )
+
+    t0 = time.perf_counter()
+    counts: Dict[str, int] = {}
+    for name, store in targets:
+        batches = _batches(root, parts[name])
+        if name == "chunks":
+            # text and metadata always go to the local chunk store
+            batches = _put_records(batches, get_chunk_store())
+        counts[name] = store.bulk_load(batches) if bulk else _insert(store, batches)
+        print(f"[snapshot] {name}: loaded {counts[name]} rows")
+
+    if "citation_index" in parts and CITATION_INDEX_DB:
+        Path(CITATION_INDEX_DB).parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(root / parts["citation_index"]["file"]) as src, sqlite3.connect(CITATION_INDEX_DB) as dst:
+            src.backup(dst)
+        print(f"[snapshot] citation index -> {CITATION_INDEX_DB}")
+
+    print(f"[snapshot] Index version -> {bump_index_version()} ({time.perf_counter() - t0:.1f}s)")
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export or bulk-load a self-contained index snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write the current index to a snapshot directory")
+    exp.add_argument("path")
+    exp.add_argument("--no-sections", action="store_true", help="leave out the section index")
+    imp = sub.add_parser("import", help="load a snapshot into the configured (empty) backend")
+    imp.add_argument("path")
+    imp.add_argument("--no-bulk", action="store_true", help="Milvus: batched inserts instead of the bulk import")
+    imp.add_argument("--force", action="store_true", help="load even if the embedding model differs")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_snapshot(args.path, sections=not args.no_sections)
+    else:
+        import_snapshot(args.path, bulk=not args.no_bulk, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.retrieval.hybrid_retriever import hydrate_chunks
+from src.utils.telemetry import traced
+from src.vectorstore.base import SearchFilter
+
+# Exact-citation lookup: "Section 2(1A) of the Essential Commodities Act, 1955"
+# -> the chunk ids of that section, without embedding or vector search. The
+# index maps act aliases (title with/without year, "Act 10 of 1955") to doc ids
+# and (doc_id, section_id) to chunk ids; the indexer writes it next to the
+# chunks. Empty LAW_MATE_CITATION_INDEX_DB disables it.
+CITATION_INDEX_DB = os.getenv("LAW_MATE_CITATION_INDEX_DB", "data/citation_index.db")
+CITATION_FAST_PATH = os.getenv("LAW_MATE_CITATION_FAST_PATH", "1") == "1"
+# more chunks than this and the citation is too broad to answer from directly
+CITATION_MAX_CHUNKS = int(os.getenv("LAW_MATE_CITATION_MAX_CHUNKS", "40"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS aliases (
+  alias   TEXT NOT NULL,
+  doc_id  TEXT NOT NULL,
+  PRIMARY KEY (alias, doc_id)
+);
+CREATE TABLE IF NOT EXISTS section_chunks (
+  doc_id       TEXT NOT NULL,
+  section_id   TEXT NOT NULL,
+  chunk_index  INTEGER NOT NULL,
+  chunk_id     TEXT NOT NULL,
+  PRIMARY KEY (doc_id, chunk_id)
+);
+CREATE INDEX IF NOT EXISTS idx_section_chunks ON section_chunks(doc_id, section_id);
+CREATE TABLE IF NOT EXISTS meta (
+  key    TEXT PRIMARY KEY,
+  value  INTEGER NOT NULL
+);
+"""
+
+# same section number shape as legal_sectionizer.SECTION_NUM_TITLE_RE: 5, 5A, 2(1A)
+_SECTION_NUM = r"\d+[A-Za-z]?(?:\s*\(\s*\d+[A-Za-z]?\s*\))?"
+SECTION_REF_RE = re.compile(
+    rf"\b(?:sections?|secs?\.?|ss?\.|u/s\.?)\s*({_SECTION_NUM}(?:\s*(?:,|and|&|or)\s*{_SECTION_NUM})*)",
+    re.IGNORECASE,
+)
+_SECTION_NUM_RE = re.compile(_SECTION_NUM)
+_YEAR_RE = re.compile(r"\b(1[89]\d\d|20\d\d)\s*$")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    # "The Warehousing Corporations\xa0 Act, 1962" -> "warehousing corporations act 1962"
+    norm = _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+    return norm[4:] if norm.startswith("the ") else norm
+
+
+def _section_key(raw: str) -> str:
+    # "2 (1a)" -> "2(1A)", the form the sectionizer stores
+    return re.sub(r"\s+", "", raw).upper()
+
+
+def act_aliases(act_title: str, act_number: Optional[str] = None, year: Optional[str] = None) -> Set[str]:
+    aliases: Set[str] = set()
+    title = normalize(act_title or "")
+    if not title:
+        return aliases
+    aliases.add(title)
+    m = _YEAR_RE.search(title)
+    if m:
+        year = year or m.group(1)
+        bare = title[:m.start()].strip()
+        if bare.endswith(" act"):
+            aliases.add(bare)
+    number = (act_number or "").strip().lstrip("0")
+    if number.isdigit() and year:
+        aliases.update({f"act {number} of {year}", f"act no {number} of {year}"})
+    return aliases
+
+
+def parse_section_refs(question: str) -> List[str]:
+    # section ids cited in the question, in order, without duplicates
+    refs: List[str] = []
+    for m in SECTION_REF_RE.finditer(question):
+        for num in _SECTION_NUM_RE.findall(m.group(1)):
+            key = _section_key(num)
+            if key not in refs:
+                refs.append(key)
+    return refs
+
+
+class CitationIndex:
+
+    def __init__(self, path: Optional[str | Path] = CITATION_INDEX_DB or None) -> None:
+        self.path = Path(path) if path else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._aliases: Dict[str, Set[str]] = {}
+        self._generation = -1
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._conn()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection) -> None:
+        # readers in other processes reload their alias table when this changes
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES ('generation', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def put_doc(self, doc_id: str, aliases: Iterable[str], chunks: Iterable[Tuple[str, int, str]]) -> int:
+        # replaces everything known about doc_id; chunks are (section_id, chunk_index, chunk_id)
+        if not self.enabled:
+            return 0
+        rows = [(doc_id, sid or "", idx, cid) for sid, idx, cid in chunks]
+        with self._conn() as conn:
+            conn.execute("DELETE FROM aliases WHERE doc_id = ?", (doc_id,))
+            conn.execute("DELETE FROM section_chunks WHERE doc_id = ?", (doc_id,))
+            conn.executemany("INSERT OR IGNORE INTO aliases (alias, doc_id) VALUES (?, ?)", [(a, doc_id) for a in aliases])
+            conn.executemany(
+                "INSERT OR REPLACE INTO section_chunks (doc_id, section_id, chunk_index, chunk_id) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._bump(conn)
+        return len(rows)
+
+    def delete_doc(self, doc_id: str) -> None:
+        if not self.enabled:
+            return
+        with self._conn() as conn:
+            conn.execute("DELETE FROM aliases WHERE doc_id = ?", (doc_id,))
+            conn.execute("DELETE FROM section_chunks WHERE doc_id = ?", (doc_id,))
+            self._bump(conn)
+
+    def _alias_table(self) -> Dict[str, Set[str]]:
+        if not self.enabled:
+            return {}
+        conn = self._conn()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        generation = row[0] if row else 0
+        with self._lock:
+            if generation != self._generation:
+                table: Dict[str, Set[str]] = {}
+                for alias, doc_id in conn.execute("SELECT alias, doc_id FROM aliases"):
+                    table.setdefault(alias, set()).add(doc_id)
+                self._aliases, self._generation = table, generation
+            return self._aliases
+
+    def match_acts(self, question: str) -> List[str]:
+        # doc ids of the longest act alias found in the question; titles shared
+        # by several acts (no year given) return all of them
+        if not self.enabled:
+            return []
+        text = f" {normalize(question)} "
+        table = self._alias_table()
+        best: Optional[str] = None
+        for alias in table:
+            if (best is None or len(alias) > len(best)) and f" {alias} " in text:
+                best = alias
+        return sorted(table[best]) if best else []
+
+    def lookup(self, question: str, doc_ids: Optional[List[str]] = None) -> List[str]:
+        # chunk ids of every cited section of the cited act, in section and
+        # chunk order; [] unless both an act and a section are recognised
+        if not self.enabled:
+            return []
+        refs = parse_section_refs(question)
+        if not refs:
+            return []
+        docs = self.match_acts(question)
+        if doc_ids is not None:
+            docs = [d for d in docs if d in doc_ids]
+        if not docs:
+            return []
+
+        conn = self._conn()
+        marks = ",".join("?" * len(docs))
+        out: List[str] = []
+        for ref in refs:
+            # a subsection cite falls back to its section: 2(1A) -> 2
+            for sid in dict.fromkeys((ref, ref.split("(")[0])):
+                rows = conn.execute(
+                    f"SELECT chunk_id FROM section_chunks WHERE section_id = ? AND doc_id IN ({marks}) "
+                    "ORDER BY doc_id, chunk_index",
+                    (sid, *docs),
+                ).fetchall()
+                if rows:
+                    out.extend(r[0] for r in rows if r[0] not in out)
+                    break
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        conn = self._conn()
+        return {
+            "enabled": True,
+            "aliases": conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0],
+            "docs": conn.execute("SELECT COUNT(DISTINCT doc_id) FROM section_chunks").fetchone()[0],
+            "chunks": conn.execute("SELECT COUNT(*) FROM section_chunks").fetchone()[0],
+        }
+
+
+_citation_index: Optional[CitationIndex] = None
+
+
+def get_citation_index() -> CitationIndex:
+    global _citation_index
+    if _citation_index is None:
+        _citation_index = CitationIndex()
+    return _citation_index
+
+
+@traced("citation_lookup")
+def cited_chunks(question: str, filters: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+    # hydrated chunks for the sections the question cites, [] when it cites
+    # none (or the filters ask for more than doc ids, which the index cannot check)
+    if filters is not None and filters.model_dump(exclude_none=True, exclude={"doc_ids"}):
+        return []
+    ids = get_citation_index().lookup(question, doc_ids=filters.doc_ids if filters is not None else None)
+    if not ids or len(ids) > CITATION_MAX_CHUNKS:
+        return []
+    return hydrate_chunks([(cid, 1.0) for cid in ids])
+
+
+if __name__ == "__main__":
+    import sys
+
+    index = get_citation_index()
+    print(index.stats())
+    for q in sys.argv[1:]:
+        print(q, "->", parse_section_refs(q), index.match_acts(q), index.lookup(q))
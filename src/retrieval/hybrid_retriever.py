@@ -1,75 +1,189 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
-from pymilvus import Collection
+import os
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
 from src.pipelines.embedder import get_model 
-from src.pipelines.indexer import get_or_create_collection
+from src.utils.telemetry import candidates_hist, span, traced
+from src.vectorstore.base import SearchFilter, VectorStore
+from src.vectorstore.chunk_store import get_chunk_store
+from src.vectorstore.factory import get_section_store, get_vector_store
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
+RETURN_FIELDS = [
+    "chunk_id",
+    "doc_id",
+    "section_id",
+    "section_heading",
+    "part",
+    "chapter",
+    "page_start",
+    "page_end",
+    "chunk_index",
+    "text",
+]
+# the vector store only returns ids, text and metadata come from the local chunk store
+SEARCH_FIELDS = ["chunk_id"]
+SEARCH_BATCH_QUERIES = 64  # query vectors per multi-vector search call
+# coarse-to-fine: search section heading/summary vectors first, then chunks
+# only inside the best SECTION_TOP_K sections (pipelines/section_index.py)
+COARSE_TO_FINE = os.getenv("LAW_MATE_COARSE_TO_FINE", "1") == "1"
+SECTION_TOP_K = int(os.getenv("LAW_MATE_SECTION_TOP_K", "8"))
+# a narrowed search with fewer hits than this (or than top_k, if smaller) falls
+# back to the full chunk search; the default matches the default rerank_k
+NARROW_MIN_HITS = int(os.getenv("LAW_MATE_NARROW_MIN_HITS", "5"))
 
+
+@traced("embed")
 def embed_query(text: str) -> List[float]:
     model: SentenceTransformer = get_model()
     emb = model.encode([text]) 
     return emb[0].tolist()
 
 
+@traced("embed")
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    # one encode call for the whole batch
+    if not texts:
+        return []
+    model: SentenceTransformer = get_model()
+    return [e.tolist() for e in model.encode(texts)]
+
+
 def search_similar_chunks(
     query: str,
     top_k: int = 10,
+    filters: Optional[SearchFilter] = None,
+    query_vector: Optional[List[float]] = None,
     ) -> List[Dict[str, Any]]:
     
-    coll: Collection = get_or_create_collection()
-
-    q_emb = embed_query(query)
-
-    search_params = {
-        "metric_type": "COSINE",    
-        "params": {"nprobe": 10},
-    }
-
-    results = coll.search(
-        data=[q_emb],
-        anns_field="embedding",
-        param=search_params,
-        limit=top_k,
-        output_fields=[
-            "chunk_id",
-            "doc_id",
-            "section_id",
-            "section_heading",
-            "part",
-            "chapter",
-            "page_start",
-            "page_end",
-            "text",
-        ],
-    )
-
-    hits = results[0]  # we passed a single query vector
-    out: List[Dict[str, Any]] = []
+    store = get_vector_store()
+
+    q_emb = query_vector if query_vector is not None else embed_query(query)
 
-    for hit in hits:
-        entity = hit.entity
-        out.append(
-            {
-                "chunk_id": entity.get("chunk_id"),
-                "doc_id": entity.get("doc_id"),
-                "section_id": entity.get("section_id"),
-                "section_heading": entity.get("section_heading"),
-                "part": entity.get("part"),
-                "chapter": entity.get("chapter"),
-                "page_start": entity.get("page_start"),
-                "page_end": entity.get("page_end"),
-                "text": entity.get("text"),
-                "score": float(hit.distance),
-            }
+    hits = _search(store, [q_emb], top_k, filters)[0]  # we passed a single query vector
+    candidates_hist.observe(len(hits))
+    return hydrate_chunks([(hit["chunk_id"], float(hit["score"])) for hit in hits])
+
+
+@traced("section_search")
+def section_filters(
+    q_embs: List[List[float]],
+    filters: Optional[SearchFilter] = None,
+    section_top_k: int = SECTION_TOP_K,
+) -> List[Optional[SearchFilter]]:
+    # per query: filters restricted to the best-matching sections, or None to
+    # search unrestricted (no section index, or the caller already pinned
+    # chunks/sections). One multi-vector search on the section store.
+    if not q_embs or (filters is not None and (filters.chunk_ids or filters.sections)):
+        return [None] * len(q_embs)
+    out: List[Optional[SearchFilter]] = []
+    for start in range(0, len(q_embs), SEARCH_BATCH_QUERIES):
+        # heading and summary rows of one section can both hit, so over-fetch
+        results = get_section_store().search(
+            q_embs[start:start + SEARCH_BATCH_QUERIES],
+            top_k=2 * section_top_k,
+            filters=filters,
+            output_fields=["doc_id", "section_id"],
         )
+        for hits in results:
+            sections: List[Tuple[str, str]] = []
+            for hit in hits:
+                key = (hit["doc_id"], hit.get("section_id") or "")
+                if key not in sections:
+                    sections.append(key)
+            sections = sections[:section_top_k]
+            # exact pairs: "Section 3" of one act must not let in Section 3 of every other hit act
+            out.append((filters or SearchFilter()).model_copy(update={"sections": sections}) if sections else None)
+    return out
+
+
+def section_filter(
+    q_emb: List[float],
+    filters: Optional[SearchFilter] = None,
+    section_top_k: int = SECTION_TOP_K,
+) -> Optional[SearchFilter]:
+    return section_filters([q_emb], filters, section_top_k)[0]
+
 
+def _search(
+    store: VectorStore,
+    vectors: List[List[float]],
+    top_k: int,
+    filters: Optional[SearchFilter] = None,
+) -> List[List[Dict[str, Any]]]:
+    # coarse-to-fine per query when enabled. A narrowed search that comes back
+    # with fewer than NARROW_MIN_HITS hits (the best sections hold almost no
+    # chunks, or the section index is out of step) also runs the unrestricted
+    # search, which serves every query the section index could not narrow too;
+    # the two hit lists are merged by score.
+    narrowed = section_filters(vectors, filters) if COARSE_TO_FINE else [None] * len(vectors)
+    results: List[List[Dict[str, Any]]] = [[] for _ in vectors]
+    floor = min(NARROW_MIN_HITS, top_k)
+    with span("vector_search"):
+        for i, f in enumerate(narrowed):
+            if f is not None:
+                results[i] = store.search([vectors[i]], top_k=top_k, filters=f, output_fields=SEARCH_FIELDS)[0]
+        short = [i for i, (f, hits) in enumerate(zip(narrowed, results)) if f is None or len(hits) < floor]
+        for start in range(0, len(short), SEARCH_BATCH_QUERIES):
+            idx = short[start:start + SEARCH_BATCH_QUERIES]
+            full = store.search([vectors[i] for i in idx], top_k=top_k, filters=filters, output_fields=SEARCH_FIELDS)
+            for i, hits in zip(idx, full):
+                merged = {h["chunk_id"]: h for h in hits}
+                merged.update({h["chunk_id"]: h for h in results[i]})
+                results[i] = sorted(merged.values(), key=lambda h: -float(h["score"]))[:top_k]
+    return results
+
+
+def search_similar_chunks_batch(
+    queries: List[str],
+    top_k: int = 10,
+    filters: Optional[SearchFilter] = None,
+    query_vectors: Optional[List[List[float]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+    # one hit list per query, retrieved like search_similar_chunks; one hydration pass
+    if not queries:
+        return []
+    store = get_vector_store()
+    vectors = query_vectors if query_vectors is not None else embed_queries(queries)
+
+    results = _search(store, vectors, top_k, filters)
+    for hits in results:
+        candidates_hist.observe(len(hits))
+
+    per_query = [[(hit["chunk_id"], float(hit["score"])) for hit in hits] for hits in results]
+    records = _load_records(list({cid for hits in per_query for cid, _ in hits}))
+    return [_to_chunks(hits, records) for hits in per_query]
+
+
+@traced("hydrate")
+def _load_records(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    # ids the chunk store does not know yet (indexed before it existed) are
+    # read from the vector store instead
+    records = get_chunk_store().get_many(ids)
+    missing = [cid for cid in ids if cid not in records]
+    if missing:
+        rows = get_vector_store().query(SearchFilter(chunk_ids=missing), output_fields=RETURN_FIELDS)
+        records.update({r["chunk_id"]: r for r in rows})
+    return records
+
+
+def _to_chunks(hits: List[Tuple[str, float]], records: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    for cid, score in hits:
+        rec = records.get(cid)
+        if rec is not None:
+            out.append({**{f: rec.get(f) for f in RETURN_FIELDS}, "score": score})
     return out
 
 
+def hydrate_chunks(hits: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+    # (chunk_id, score) pairs -> full chunk dicts, in the same order
+    return _to_chunks(hits, _load_records([cid for cid, _ in hits]))
+
+
 if __name__ == "__main__":
     q = "What are the powers and jurisdiction of the Delhi Special Police Establishment"
     chunks = search_similar_chunks(q, top_k=5)
@@ -1,40 +1,420 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
-from sentence_transformers import CrossEncoder
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Sequence, Tuple
 
-_cross_encoder: Optional[CrossEncoder] = None
+import numpy as np
+
+from src.inference.sidecar import MODEL_SIDECAR, SidecarCrossEncoder
+from src.utils.cache import LRUCache
+from src.utils.stats import latency_summary
+from src.utils.telemetry import traced
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+_cross_encoder: Optional[CrossEncoder | OnnxCrossEncoder | SidecarCrossEncoder] = None
 CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"  # can swap 
 
+# "torch" (default) or "onnx" (ONNX Runtime, int8 dynamic quantization by default)
+RERANKER_BACKEND = os.getenv("LAW_MATE_RERANKER_BACKEND", "torch").lower()
+ONNX_DIR = Path(os.getenv("LAW_MATE_ONNX_DIR", "data/models/onnx"))
+ONNX_QUANTIZE = os.getenv("LAW_MATE_ONNX_QUANTIZE", "1") == "1"
+ONNX_THREADS = int(os.getenv("LAW_MATE_ONNX_THREADS", "0"))  # 0 -> onnxruntime picks
+
+RERANK_BATCH_SIZE = int(os.getenv("LAW_MATE_RERANK_BATCH_SIZE", "16"))
+RERANK_SCORE_CACHE_SIZE = int(os.getenv("LAW_MATE_RERANK_CACHE_SIZE", "20000"))
+RERANK_TOKEN_CACHE_SIZE = int(os.getenv("LAW_MATE_RERANK_TOKEN_CACHE_SIZE", "20000"))
+# 0 disables the cascade; otherwise keep this many candidates after the cheap pass
+RERANK_CASCADE_KEEP = int(os.getenv("LAW_MATE_RERANK_CASCADE_KEEP", "0"))
+
+_score_cache: LRUCache[float] = LRUCache(RERANK_SCORE_CACHE_SIZE)
+_token_cache: LRUCache[List[int]] = LRUCache(RERANK_TOKEN_CACHE_SIZE)
+
+_latency_lock = threading.Lock()
+_latencies: Dict[int, deque] = defaultdict(lambda: deque(maxlen=2000))
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _onnx_model_dir(model_name: str) -> Path:
+    return ONNX_DIR / model_name.replace("/", "__")
+
+
+def export_onnx(model_name: str = CROSS_ENCODER_MODEL, *, quantize: bool = ONNX_QUANTIZE) -> Path:
+    # one-off export of the HF checkpoint to ONNX, optionally int8 dynamic-quantized
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_dir = _onnx_model_dir(model_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = out_dir / "model.onnx"
+    int8_path = out_dir / "model.int8.onnx"
+
+    if not fp32_path.exists():
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        sample = tokenizer(["query"], ["passage text"], return_tensors="pt")
+        input_names = list(sample.keys())
+
+        class _ByName(torch.nn.Module):
+            # export traces positional args; map them back onto keyword names
+            def __init__(self) -> None:
+                super().__init__()
+                self.inner = model
+
+            def forward(self, *inputs):
+                return self.inner(**dict(zip(input_names, inputs))).logits
+
+        axes = {name: {0: "batch", 1: "seq"} for name in input_names}
+        axes["logits"] = {0: "batch"}
+        export_kwargs = dict(
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=axes,
+            opset_version=17,
+        )
+        try:
+            torch.onnx.export(_ByName(), tuple(sample[n] for n in input_names), str(fp32_path), dynamo=False, **export_kwargs)
+        except TypeError:
+            # older torch has no dynamo flag
+            torch.onnx.export(_ByName(), tuple(sample[n] for n in input_names), str(fp32_path), **export_kwargs)
+        tokenizer.save_pretrained(out_dir)
+        model.config.save_pretrained(out_dir)
+
+    if not quantize:
+        return fp32_path
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
 
-def get_cross_encoder() -> CrossEncoder:
+class OnnxCrossEncoder:
+    # Same scoring contract as CrossEncoder (sigmoid for single-label models),
+    # run through ONNX Runtime with a configurable intra-op thread count.
+
+    def __init__(
+        self,
+        model_name: str = CROSS_ENCODER_MODEL,
+        *,
+        quantize: bool = ONNX_QUANTIZE,
+        intra_op_threads: int = ONNX_THREADS,
+    ) -> None:
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        self.model_path = export_onnx(model_name, quantize=quantize)
+        model_dir = self.model_path.parent
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.num_labels = AutoConfig.from_pretrained(model_dir).num_labels
+        self.max_length = min(int(self.tokenizer.model_max_length or 512), 512)
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            opts.intra_op_num_threads = intra_op_threads
+        opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(self.model_path), opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, queries: List[str], texts: List[str]) -> np.ndarray:
+        batch = self.tokenizer(
+            queries,
+            texts,
+            padding=True,
+            truncation="longest_first",
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        feed = {k: v.astype(np.int64) for k, v in batch.items() if k in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        if self.num_labels == 1:
+            return 1.0 / (1.0 + np.exp(-logits[:, 0]))
+        return logits[:, 0]
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        return self._run([query] * len(texts), texts)
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = RERANK_BATCH_SIZE) -> np.ndarray:
+        out = [
+            self._run([q for q, _ in pairs[i:i + batch_size]], [t for _, t in pairs[i:i + batch_size]])
+            for i in range(0, len(pairs), batch_size)
+        ]
+        return np.concatenate(out).astype(np.float32) if out else np.zeros(0, dtype=np.float32)
+
+
+def load_cross_encoder() -> CrossEncoder | OnnxCrossEncoder:
+    if RERANKER_BACKEND == "onnx":
+        return OnnxCrossEncoder(CROSS_ENCODER_MODEL)
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(CROSS_ENCODER_MODEL)
+
+
+def get_cross_encoder() -> CrossEncoder | OnnxCrossEncoder | SidecarCrossEncoder:
     global _cross_encoder
     if _cross_encoder is None:
-        _cross_encoder = CrossEncoder(CROSS_ENCODER_MODEL)
+        # with a sidecar the weights live in that process, see src/inference/sidecar.py
+        _cross_encoder = SidecarCrossEncoder() if MODEL_SIDECAR else load_cross_encoder()
     return _cross_encoder
 
 
+def _query_hash(query: str) -> str:
+    # backend is part of the key: int8 scores differ slightly from fp32 ones
+    norm = " ".join(query.lower().split())
+    return hashlib.sha1(f"{RERANKER_BACKEND}\x1f{norm}".encode("utf-8")).hexdigest()
+
+
+def _passage_key(candidate: Dict[str, Any]) -> Tuple[str, int]:
+    # chunk_ids are stable across reindexing, so pair them with the text they scored
+    text = candidate.get("text") or ""
+    return (candidate.get("chunk_id") or "", hash(text))
+
+
+def _passage_offsets(tokenizer, candidate: Dict[str, Any]) -> List[int]:
+    # end char offset of every passage token, computed once per chunk text
+    key = _passage_key(candidate)
+    ends = _token_cache.get(key) if key[0] else None
+    if ends is None:
+        text = candidate.get("text") or ""
+        try:
+            enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+            ends = [end for _, end in enc["offset_mapping"]]
+        except NotImplementedError:
+            # slow tokenizers have no offsets; fall back to whitespace words
+            ends = [m.end() for m in re.finditer(r"\S+", text)]
+        if key[0]:
+            _token_cache.put(key, ends)
+    return ends
+
+
+def _activation(model: CrossEncoder):
+    # CrossEncoder.predict applies this (sigmoid for single-label models); the
+    # attribute was renamed between sentence-transformers releases
+    return getattr(model, "activation_fn", None) or getattr(model, "activation_fct", None)
+
+
+def _score_batch(model: CrossEncoder | OnnxCrossEncoder, query: str | List[str], texts: List[str]) -> np.ndarray:
+    # one query for every text, or one query per text
+    queries = [query] * len(texts) if isinstance(query, str) else query
+    if isinstance(model, (OnnxCrossEncoder, SidecarCrossEncoder)):
+        return model._run(queries, texts)
+    return _torch_score(model, queries, texts)
+
+
+def _max_length(model: CrossEncoder) -> int:
+    return int(getattr(model, "max_length", None) or model.tokenizer.model_max_length or 512)
+
+
+def _torch_score(model: CrossEncoder, queries: List[str], texts: List[str]) -> np.ndarray:
+    import torch
+
+    batch = model.tokenizer(
+        queries,
+        texts,
+        padding=True,
+        truncation="longest_first",
+        max_length=_max_length(model),
+        return_tensors="pt",
+    )
+    device = next(model.model.parameters()).device
+    batch = {k: v.to(device) for k, v in batch.items()}
+    with torch.inference_mode():
+        logits = model.model(**batch).logits
+        act = _activation(model)
+        if act is not None:
+            logits = act(logits)
+    return logits.reshape(len(texts), -1)[:, 0].float().cpu().numpy()
+
+
+def _truncated_passages(model: CrossEncoder, query: str, candidates: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    # cut each passage at the model's token budget using the cached offsets,
+    # so the tokenizer never sees text that would be thrown away anyway
+    if isinstance(model, SidecarCrossEncoder):
+        # no tokenizer here, the sidecar truncates; char length stands in for tokens
+        return [(len(c.get("text") or ""), c.get("text") or "") for c in candidates]
+    tokenizer = model.tokenizer
+    q_len = len(tokenizer(query, add_special_tokens=False)["input_ids"])
+    # a pasted paragraph as the query keeps half the window for the passage;
+    # longest_first truncation then cuts the query instead of raising
+    max_len = _max_length(model) - tokenizer.num_special_tokens_to_add(pair=True)
+    budget = max(max_len // 2, max_len - q_len, 1)
+    out: List[Tuple[int, str]] = []
+    for c in candidates:
+        text = c.get("text") or ""
+        ends = _passage_offsets(tokenizer, c)
+        if len(ends) > budget:
+            text = text[: ends[budget - 1]]
+        out.append((min(len(ends), budget), text))
+    return out
+
+
+def score_with_model(
+    model: CrossEncoder | OnnxCrossEncoder,
+    query: str,
+    candidates: Sequence[Dict[str, Any]],
+    batch_size: int = RERANK_BATCH_SIZE,
+) -> np.ndarray:
+    # length-sorted batches over pre-truncated passages, no caching
+    passages = _truncated_passages(model, query, list(candidates))
+    if isinstance(model, SidecarCrossEncoder):
+        # one round trip, the sidecar batches across workers itself
+        batch_size = max(len(passages), 1)
+    scores = np.zeros(len(passages), dtype=np.float32)
+    order = sorted(range(len(passages)), key=lambda j: passages[j][0])
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        scores[idx] = _score_batch(model, query, [passages[j][1] for j in idx])
+    return scores
+
+
+def score_pairs(
+    query: str,
+    candidates: Sequence[Dict[str, Any]],
+    batch_size: int = RERANK_BATCH_SIZE,
+) -> np.ndarray:
+    # cached (query, chunk) scores are reused; only the misses go through the model
+    q_hash = _query_hash(query)
+    scores = np.zeros(len(candidates), dtype=np.float32)
+
+    misses: List[int] = []
+    for i, c in enumerate(candidates):
+        cached = _score_cache.get((q_hash, *_passage_key(c))) if c.get("chunk_id") else None
+        if cached is None:
+            misses.append(i)
+        else:
+            scores[i] = cached
+
+    if not misses:
+        return scores
+
+    fresh = score_with_model(get_cross_encoder(), query, [candidates[i] for i in misses], batch_size)
+    for i, s in zip(misses, fresh):
+        scores[i] = float(s)
+        if candidates[i].get("chunk_id"):
+            _score_cache.put((q_hash, *_passage_key(candidates[i])), float(s))
+
+    return scores
+
+
+def _cheap_scores(query: str, candidates: Sequence[Dict[str, Any]]) -> List[float]:
+    # first cascade stage: ANN similarity plus the share of query terms the chunk contains
+    q_terms = {w for w in _WORD_RE.findall(query.lower()) if len(w) > 2}
+    out: List[float] = []
+    for c in candidates:
+        words = set(_WORD_RE.findall((c.get("text") or "").lower()))
+        overlap = len(q_terms & words) / len(q_terms) if q_terms else 0.0
+        out.append(float(c.get("score") or 0.0) + overlap)
+    return out
+
+
+def _record_latency(n_candidates: int, seconds: float) -> None:
+    with _latency_lock:
+        _latencies[n_candidates].append(seconds)
+
+
+def rerank_latency_report() -> Dict[str, Any]:
+    with _latency_lock:
+        by_count = {n: latency_summary(list(v)) for n, v in sorted(_latencies.items())}
+    return {
+        "by_candidate_count": by_count,
+        "score_cache": _score_cache.stats(),
+        "token_cache": _token_cache.stats(),
+    }
+
+
+def _cascade(query: str, candidates: List[Dict[str, Any]], top_k: int, cascade_keep: Optional[int]) -> List[Dict[str, Any]]:
+    keep = RERANK_CASCADE_KEEP if cascade_keep is None else cascade_keep
+    if keep and len(candidates) > max(keep, top_k):
+        cheap = _cheap_scores(query, candidates)
+        ranked = sorted(zip(cheap, range(len(candidates))), reverse=True)
+        candidates = [candidates[i] for _, i in ranked[: max(keep, top_k)]]
+    return candidates
+
+
+@traced("rerank")
 def rerank_chunks(
     query: str,
     candidates: List[Dict[str, Any]],
     top_k: int = 5,
+    cascade_keep: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
     
     if not candidates:
         return []
 
-    model = get_cross_encoder()
+    t0 = time.perf_counter()
+    n_candidates = len(candidates)
 
-    pairs = [(query, c["text"]) for c in candidates]
-    scores = model.predict(pairs)  # array of floats
+    candidates = _cascade(query, candidates, top_k, cascade_keep)
+    scores = score_pairs(query, candidates)
 
     for c, s in zip(candidates, scores):
         c["rerank_score"] = float(s)
 
     candidates.sort(key=lambda x: x["rerank_score"], reverse=True)
+    _record_latency(n_candidates, time.perf_counter() - t0)
     return candidates[:top_k]
 
 
+@traced("rerank")
+def rerank_chunks_batch(
+    queries: List[str],
+    candidate_lists: List[List[Dict[str, Any]]],
+    top_k: int = 5,
+    cascade_keep: Optional[int] = None,
+    batch_size: int = RERANK_BATCH_SIZE,
+) -> List[List[Dict[str, Any]]]:
+    # same result as rerank_chunks per query, but the uncached pairs of all
+    # queries share length-sorted model batches
+    t0 = time.perf_counter()
+    lists = [_cascade(q, list(cands), top_k, cascade_keep) for q, cands in zip(queries, candidate_lists)]
+
+    model = None
+    pending: List[Tuple[int, int, int, str]] = []  # (query idx, candidate idx, n_tokens, truncated text)
+    for qi, (query, cands) in enumerate(zip(queries, lists)):
+        q_hash = _query_hash(query)
+        misses: List[int] = []
+        for ci, c in enumerate(cands):
+            cached = _score_cache.get((q_hash, *_passage_key(c))) if c.get("chunk_id") else None
+            if cached is None:
+                misses.append(ci)
+            else:
+                c["rerank_score"] = float(cached)
+        if misses:
+            model = model or get_cross_encoder()
+            passages = _truncated_passages(model, query, [cands[ci] for ci in misses])
+            pending.extend((qi, ci, n, text) for ci, (n, text) in zip(misses, passages))
+
+    pending.sort(key=lambda p: p[2])
+    if isinstance(model, SidecarCrossEncoder):
+        batch_size = max(len(pending), 1)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        scores = _score_batch(model, [queries[qi] for qi, _, _, _ in batch], [text for _, _, _, text in batch])
+        for (qi, ci, _, _), s in zip(batch, scores):
+            c = lists[qi][ci]
+            c["rerank_score"] = float(s)
+            if c.get("chunk_id"):
+                _score_cache.put((_query_hash(queries[qi]), *_passage_key(c)), float(s))
+
+    out: List[List[Dict[str, Any]]] = []
+    for cands in lists:
+        cands.sort(key=lambda x: x["rerank_score"], reverse=True)
+        out.append(cands[:top_k])
+    if lists:
+        per_query = (time.perf_counter() - t0) / len(lists)
+        for cands in candidate_lists:
+            _record_latency(len(cands), per_query)
+    return out
+
+
 if __name__ == "__main__":
     from src.retrieval.hybrid_retriever import search_similar_chunks  # adjust name if needed
 
@@ -49,4 +429,6 @@ if __name__ == "__main__":
         print(f"\n=== Reranked {i} (score={c['rerank_score']:.4f}) ===")
         print("Section:", c["section_id"], "-", c["section_heading"])
         print("Pages  :", c["page_start"], "→", c["page_end"])
-        print("Preview:", c["text"][:300], "...")
\ No newline at end of file
+        print("Preview:", c["text"][:300], "...")
+
+    print("\nRerank latency:", rerank_latency_report())
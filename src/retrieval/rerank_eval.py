@@ -0,0 +1,108 @@
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sentence_transformers import CrossEncoder
+
+from src.retrieval.hybrid_retriever import search_similar_chunks
+from src.retrieval.ranker import CROSS_ENCODER_MODEL, OnnxCrossEncoder, score_with_model
+
+# Fixed query set so runs are comparable; candidates come from the live index
+EVAL_QUERIES = [
+    "What powers does the Delhi Special Police Establishment have in States?",
+    "Who can be appointed as a director of a warehousing corporation?",
+    "What is the penalty for contravening an order under the Essential Commodities Act?",
+    "How is the Food Corporation of India constituted?",
+    "What are the functions of the Central Warehousing Corporation?",
+    "Who may issue a permit for a transport vehicle?",
+    "What is the punishment for driving without a licence?",
+    "What does the Act say about the levy sugar price equalisation fund?",
+    "Which authority can make rules under this Act?",
+    "What are the duties of the registering authority for motor vehicles?",
+    "How can a consumer file a complaint and before which commission?",
+    "What is the definition of electronic record under the Information Technology Act?",
+    "What protections exist for senior citizens against neglect by their children?",
+    "What are the eligibility conditions for a pension under the scheme?",
+    "Who is responsible for the maintenance of national highways?",
+]
+
+
+def ndcg_at_k(reference: Sequence[float], candidate: Sequence[float], k: int) -> float:
+    # reference scores are the graded relevance, candidate scores give the ranking
+    gains = np.asarray(reference, dtype=np.float64)
+    gains = gains - gains.min()  # relevance must be non-negative
+    k = min(k, len(gains))
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    order = np.argsort(-np.asarray(candidate))[:k]
+    ideal = np.sort(gains)[::-1][:k]
+    idcg = float((ideal * discounts).sum())
+    if idcg == 0:
+        return 1.0
+    return float((gains[order] * discounts).sum()) / idcg
+
+
+def evaluate(
+    queries: Sequence[str],
+    *,
+    top_k: int = 20,
+    ks: Sequence[int] = (5, 10),
+    quantize: bool = True,
+    onnx_threads: int = 0,
+) -> Dict[str, Any]:
+    torch_model = CrossEncoder(CROSS_ENCODER_MODEL)
+    onnx_model = OnnxCrossEncoder(CROSS_ENCODER_MODEL, quantize=quantize, intra_op_threads=onnx_threads)
+
+    per_query: List[Dict[str, Any]] = []
+    torch_s = onnx_s = 0.0
+    for q in queries:
+        candidates = search_similar_chunks(q, top_k=top_k)
+        if len(candidates) < 2:
+            continue
+        t0 = time.perf_counter()
+        ref = score_with_model(torch_model, q, candidates)
+        t1 = time.perf_counter()
+        got = score_with_model(onnx_model, q, candidates)
+        t2 = time.perf_counter()
+        torch_s += t1 - t0
+        onnx_s += t2 - t1
+        per_query.append({
+            "query": q,
+            "candidates": len(candidates),
+            "top1_agree": bool(np.argmax(ref) == np.argmax(got)),
+            **{f"ndcg@{k}": round(ndcg_at_k(ref, got, k), 4) for k in ks},
+        })
+
+    n = max(len(per_query), 1)
+    return {
+        "model": CROSS_ENCODER_MODEL,
+        "onnx_model": str(onnx_model.model_path),
+        "queries": len(per_query),
+        **{f"mean_ndcg@{k}": round(sum(r[f"ndcg@{k}"] for r in per_query) / n, 4) for k in ks},
+        "top1_agreement": round(sum(r["top1_agree"] for r in per_query) / n, 4),
+        "torch_ms_per_query": round(torch_s / n * 1000, 2),
+        "onnx_ms_per_query": round(onnx_s / n * 1000, 2),
+        "per_query": per_query,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the ONNX reranker against the torch CrossEncoder by NDCG")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--no-quantize", action="store_true", help="evaluate the fp32 ONNX export instead of int8")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--min-ndcg", type=float, default=0.98, help="fail (exit 1) if mean NDCG@10 is below this")
+    args = parser.parse_args()
+
+    report = evaluate(EVAL_QUERIES, top_k=args.top_k, quantize=not args.no_quantize, onnx_threads=args.threads)
+    print(json.dumps(report, indent=2))
+    if report["queries"] and report["mean_ndcg@10"] < args.min_ndcg:
+        print(f"mean NDCG@10 {report['mean_ndcg@10']} below {args.min_ndcg}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
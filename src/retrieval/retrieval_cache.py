@@ -0,0 +1,239 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from src.retrieval.hybrid_retriever import (
+    COARSE_TO_FINE,
+    NARROW_MIN_HITS,
+    SECTION_TOP_K,
+    hydrate_chunks,
+    search_similar_chunks,
+)
+from src.retrieval.ranker import RERANKER_BACKEND, rerank_chunks
+from src.utils.telemetry import cache_events
+from src.vectorstore.base import SearchFilter
+from src.vectorstore.index_version import get_index_version
+
+# Shared by every uvicorn worker on the host; empty disables the cache
+RETRIEVAL_CACHE_DB = os.getenv("LAW_MATE_RETRIEVAL_CACHE_DB", "data/retrieval_cache.db")
+RETRIEVAL_CACHE_MAX_ROWS = int(os.getenv("LAW_MATE_RETRIEVAL_CACHE_MAX_ROWS", "50000"))
+_PRUNE_EVERY = 500  # puts between size checks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retrievals (
+  key             TEXT PRIMARY KEY,
+  index_version   TEXT NOT NULL,
+  candidates      TEXT NOT NULL,
+  rerank_backend  TEXT,
+  rerank_scores   TEXT,
+  last_used       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_retrievals_used ON retrievals(last_used);
+"""
+
+
+class CachedRetrieval(BaseModel):
+    # ids and scores only; text is hydrated from the chunk store on a hit
+    candidates: List[Tuple[str, float]]
+    rerank_scores: Dict[str, float] = {}
+
+
+class RetrievalCache:
+
+    def __init__(self, path: Optional[str | Path] = RETRIEVAL_CACHE_DB or None) -> None:
+        self.path = Path(path) if path else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.counters: Dict[str, int] = {"hits": 0, "rerank_hits": 0, "misses": 0, "pruned": 0}
+        self._ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._lock:
+                if not self._ready:
+                    # the file is created on first use, not when the module is imported
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with sqlite3.connect(self.path, timeout=5) as init:
+                        # WAL lets readers in other workers proceed while one of them writes
+                        init.execute("PRAGMA journal_mode=WAL")
+                        init.executescript(_SCHEMA)
+                    init.close()
+                    self._ready = True
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+        cache_events.inc(cache="retrieval", result=name)
+
+    @staticmethod
+    def key(query: str, top_k: int, filters: Optional[SearchFilter], version: str) -> str:
+        norm = " ".join(query.lower().split())
+        f = filters.model_dump(mode="json", exclude_none=True) if filters else {}
+        # settings that change which candidates come back are part of the key
+        settings = {"coarse_to_fine": COARSE_TO_FINE, "section_top_k": SECTION_TOP_K, "narrow_min_hits": NARROW_MIN_HITS}
+        raw = json.dumps([norm, top_k, f, version, settings], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, query: str, top_k: int, filters: Optional[SearchFilter] = None) -> Optional[CachedRetrieval]:
+        if not self.enabled:
+            return None
+        version = get_index_version()
+        key = self.key(query, top_k, filters, version)
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT candidates, rerank_backend, rerank_scores FROM retrievals WHERE key = ? AND index_version = ?",
+            (key, version),
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE retrievals SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        candidates, backend, rerank_scores = row
+        entry = CachedRetrieval(candidates=json.loads(candidates))
+        if rerank_scores and backend == RERANKER_BACKEND:
+            entry.rerank_scores = json.loads(rerank_scores)
+        return entry
+
+    def put_candidates(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[SearchFilter],
+        chunks: List[Dict[str, Any]],
+    ) -> None:
+        if not self.enabled:
+            return
+        version = get_index_version()
+        candidates = [[c["chunk_id"], float(c["score"])] for c in chunks]
+        self._conn().execute(
+            "INSERT OR REPLACE INTO retrievals (key, index_version, candidates, rerank_backend, rerank_scores, last_used) "
+            "VALUES (?, ?, ?, NULL, NULL, ?)",
+            (self.key(query, top_k, filters, version), version, json.dumps(candidates), time.time()),
+        )
+        self._maybe_prune(version)
+
+    def put_rerank_scores(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[SearchFilter],
+        scores: Dict[str, float],
+    ) -> None:
+        if not self.enabled or not scores:
+            return
+        version = get_index_version()
+        self._conn().execute(
+            "UPDATE retrievals SET rerank_backend = ?, rerank_scores = ? WHERE key = ?",
+            (RERANKER_BACKEND, json.dumps(scores), self.key(query, top_k, filters, version)),
+        )
+
+    def _maybe_prune(self, version: str) -> None:
+        with self._lock:
+            self._puts += 1
+            if self._puts % _PRUNE_EVERY:
+                return
+        conn = self._conn()
+        cur = conn.execute("DELETE FROM retrievals WHERE index_version != ?", (version,))
+        pruned = cur.rowcount
+        (n,) = conn.execute("SELECT COUNT(*) FROM retrievals").fetchone()
+        if n > RETRIEVAL_CACHE_MAX_ROWS:
+            cur = conn.execute(
+                "DELETE FROM retrievals WHERE key IN "
+                "(SELECT key FROM retrievals ORDER BY last_used LIMIT ?)",
+                (n - RETRIEVAL_CACHE_MAX_ROWS,),
+            )
+            pruned += cur.rowcount
+        with self._lock:
+            self.counters["pruned"] += max(pruned, 0)
+
+    def clear(self) -> None:
+        if self.enabled:
+            self._conn().execute("DELETE FROM retrievals")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            "path": str(self.path) if self.path else None,
+        }
+
+
+_retrieval_cache: Optional[RetrievalCache] = None
+
+
+def get_retrieval_cache() -> RetrievalCache:
+    global _retrieval_cache
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache()
+    return _retrieval_cache
+
+
+def hydrate_cached(entry: CachedRetrieval) -> Optional[List[Dict[str, Any]]]:
+    # None when a cached id is gone, so the caller falls back to a fresh search
+    chunks = hydrate_chunks(entry.candidates)
+    if len(chunks) < len(entry.candidates):
+        return None
+    for chunk in chunks:
+        if chunk["chunk_id"] in entry.rerank_scores:
+            chunk["rerank_score"] = entry.rerank_scores[chunk["chunk_id"]]
+    return chunks
+
+
+def cached_search(
+    query: str,
+    top_k: int = 10,
+    filters: Optional[SearchFilter] = None,
+    query_vector: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    cache = get_retrieval_cache()
+    entry = cache.get(query, top_k, filters)
+    if entry is not None:
+        chunks = hydrate_cached(entry)
+        if chunks is not None:
+            return chunks
+    chunks = search_similar_chunks(query, top_k=top_k, filters=filters, query_vector=query_vector)
+    cache.put_candidates(query, top_k, filters, chunks)
+    return chunks
+
+
+def cached_rerank(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    top_k: int = 5,
+    *,
+    search_top_k: int,
+    filters: Optional[SearchFilter] = None,
+) -> List[Dict[str, Any]]:
+    # candidates hydrated from the cache carry their rerank_score already; with
+    # the cascade on only the kept ones do, so serve only when enough were scored
+    scored = [c for c in candidates if "rerank_score" in c]
+    if scored and len(scored) >= min(top_k, len(candidates)):
+        get_retrieval_cache()._count("rerank_hits")
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+        return scored[:top_k]
+
+    reranked = rerank_chunks(query, candidates, top_k=top_k)
+    # rerank_chunks sets rerank_score on every candidate it scored, not just the returned top_k
+    scores = {c["chunk_id"]: c["rerank_score"] for c in candidates if "rerank_score" in c and c.get("chunk_id")}
+    get_retrieval_cache().put_rerank_scores(query, search_top_k, filters, scores)
+    return reranked
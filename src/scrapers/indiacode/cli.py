@@ -1,13 +1,9 @@
 import argparse
 
 from .client import ScraperClient, logger
-from .pipeline import (
-    run_listings,
-    run_act_pages,
-    run_full_pipeline,
-)
-from .pdf_downloader import run_batch as run_download_batch
-from .parse import run_parse_batch
+
+# each mode imports only what it runs: parse does not need requests/bs4,
+# download does not need PyMuPDF, and nothing touches the network until a mode starts
 
 
 def main():
@@ -24,9 +20,9 @@ def main():
     parser.add_argument("--parse-batch", type=int, default=10)
 
     args = parser.parse_args()
-    client = ScraperClient()
 
     if args.mode == "full":
+        from .pipeline import run_full_pipeline
         run_full_pipeline(
             listing_rpp=args.listing_rpp,
             listing_max_pages=args.listing_max_pages,
@@ -35,17 +31,21 @@ def main():
             parse_batch_limit=args.parse_batch,
         )
     elif args.mode == "listings":
+        from .pipeline import run_listings
         logger.info("Running listings only")
-        run_listings(client=client, rpp=args.listing_rpp, max_pages=args.listing_max_pages)
+        run_listings(client=ScraperClient(), rpp=args.listing_rpp, max_pages=args.listing_max_pages)
     elif args.mode == "acts":
+        from .pipeline import run_act_pages
         logger.info("Running act-page scraping batch")
-        count = run_act_pages(client=client, batch_limit=args.acts_batch)
+        count = run_act_pages(client=ScraperClient(), batch_limit=args.acts_batch)
         logger.info("Scraped %d acts", count)
     elif args.mode == "download":
+        from .pdf_downloader import run_batch as run_download_batch
         logger.info("Running PDF download batch")
         count = run_download_batch(limit=args.download_batch)
         logger.info("Downloaded %d assets", count)
     elif args.mode == "parse":
+        from .parse import run_parse_batch
         logger.info("Running parse batch")
         count = run_parse_batch(limit=args.parse_batch)
         logger.info("Parsed %d assets", count)
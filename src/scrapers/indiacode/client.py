@@ -2,23 +2,21 @@ from __future__ import annotations
 import time
 import logging
 import random
-from typing import Dict, Optional, Tuple, Any
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Any
 from urllib.parse import urljoin, urlparse
 from http import HTTPStatus
-from urllib import robotparser
-
-import requests
-from requests import Response
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
-
 
 from src.scrapers.indiacode.constants import BASE_URL, USER_AGENTS, MAX_RETRIES, BACKOFF_FACTOR, STATUS_FORCELIST, RESPECT_ROBOTS, REQUEST_DELAY_S, TIMEOUT_S
 
 logger = logging.getLogger('src/scrapers/indiacode/client.py')
 logger.setLevel(logging.INFO)
 
+# requests and bs4 are imported where they are used, so modules that only need
+# the logger (parse, pdf_downloader) stay cheap to import
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from requests import Response
+
 class ScraperClient():
     def __init__( self,
         base_url: str = BASE_URL,
@@ -30,7 +28,9 @@ class ScraperClient():
         request_delay_s: float = REQUEST_DELAY_S,
         respect_robots: bool = RESPECT_ROBOTS,
         ) -> None:
-        
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
 
         self.base_url = base_url.rstrip("/") + "/"
         self.timeout_s = timeout_s
@@ -64,9 +64,9 @@ class ScraperClient():
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
 
+        # robots.txt is fetched on the first request, not when the client is built
         self._robots = None
-        if self.respect_robots:
-            self._init_robots()
+        self._robots_loaded = False
 
 
     def get(self, 
@@ -74,7 +74,8 @@ class ScraperClient():
             params : Optional[Dict[str,Any]] = None, 
             allow_redirects : bool = True,
             ) -> Tuple[int,str,str] : #returns (status_code, text, final_url)
-        
+        import requests
+
         abs_url = self.abs_url(url)
         self._polite_wait()
 
@@ -107,6 +108,7 @@ class ScraperClient():
         return resp.status_code, text, final_url
 
     def soup(self, html: str) -> BeautifulSoup:
+        from bs4 import BeautifulSoup
         return BeautifulSoup(html, "lxml")
 
     def abs_url(self, relative_or_abs: str) -> str:
@@ -117,6 +119,10 @@ class ScraperClient():
             time.sleep(self.request_delay_s)
     
     def _init_robots(self) -> None:
+        from urllib import robotparser
+        import requests
+
+        self._robots_loaded = True
         try:
             robots_url = urljoin(self.base_url, "/robots.txt")
             rp = robotparser.RobotFileParser(robots_url)
@@ -137,6 +143,8 @@ class ScraperClient():
             self._robots = None
 
     def _allowed_by_robots(self, url: str) -> bool:
+        if not self._robots_loaded:
+            self._init_robots()
         if self._robots is None:
             return True
         path = urlparse(url).path or "/"
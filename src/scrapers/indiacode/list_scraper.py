@@ -5,9 +5,6 @@ from typing import Dict, List, Any, Optional
 
 from .constants import BASE_URL, MINISTRY_BROWSE_PATH, MINISTRIES, SELECTORS, DEFAULT_MINISTRY_PARAMS
 from src.db.acts_dao import insert_or_update_act
-from .client import ScraperClient
-
-client = ScraperClient()
 
 def _build_ministry_url(value_param:str, rpp: int, offset: int) -> str:
     return(f"{MINISTRY_BROWSE_PATH}"
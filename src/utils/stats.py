@@ -0,0 +1,22 @@
+from __future__ import annotations
+import math
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    # nearest-rank percentile, q in [0, 100]
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return float(ordered[min(rank, len(ordered)) - 1])
+
+
+def latency_summary(values_s: Sequence[float]) -> Dict[str, float]:
+    return {
+        "count": len(values_s),
+        "p50_ms": round(percentile(values_s, 50) * 1000, 3),
+        "p95_ms": round(percentile(values_s, 95) * 1000, 3),
+        "p99_ms": round(percentile(values_s, 99) * 1000, 3),
+        "mean_ms": round(sum(values_s) / len(values_s) * 1000, 3) if values_s else 0.0,
+    }
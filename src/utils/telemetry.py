@@ -0,0 +1,176 @@
+from __future__ import annotations
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500)
+TOKEN_BUCKETS = (128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # per label set: bucket counts (+Inf last), sum, count
+        self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0.0]))
+            counts[idx] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, (total, n)) in sorted(self._series.items()):
+                running = 0
+                for bound, c in zip(self.buckets, counts):
+                    running += c
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', _fmt_value(bound)))} {running}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, ('le', '+Inf'))} {int(n)}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(round(total, 6))}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {int(n)}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram("lawmate_stage_duration_seconds", "Time spent per pipeline stage")
+request_seconds = registry.histogram("lawmate_request_duration_seconds", "End-to-end HTTP request time")
+requests_total = registry.counter("lawmate_requests_total", "HTTP requests by endpoint and status")
+cache_events = registry.counter("lawmate_cache_events_total", "Cache lookups by cache and result")
+candidates_hist = registry.histogram("lawmate_retrieval_candidates", "Candidates returned per search", COUNT_BUCKETS)
+prompt_tokens_hist = registry.histogram("lawmate_prompt_tokens", "Estimated prompt tokens per LLM call", TOKEN_BUCKETS)
+
+# stage -> accumulated seconds for the current request, read for X-Timing;
+# copied into worker threads by StageExecutor
+_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("lawmate_trace", default=None)
+_trace_lock = threading.Lock()
+
+
+@contextmanager
+def trace() -> Iterator[Dict[str, float]]:
+    stages: Dict[str, float] = {}
+    token = _trace.set(stages)
+    try:
+        yield stages
+    finally:
+        _trace.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=stage)
+    stages = _trace.get()
+    if stages is not None:
+        with _trace_lock:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - t0)
+
+
+def traced(stage: str) -> Callable[[F], F]:
+    # decorator form of span(), works for plain and async functions
+    def wrap(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return awrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return wrap
+
+
+def format_timing(stages: Dict[str, float], total_s: Optional[float] = None) -> str:
+    # "embed_query;dur=3.2, vector_search;dur=11.0, total;dur=40.1" (ms), Server-Timing style
+    parts = [f"{name};dur={secs * 1000:.1f}" for name, secs in stages.items()]
+    if total_s is not None:
+        parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import BaseModel
+
+# Every backend stores the same flat chunk record
+SCALAR_FIELDS = [
+    "chunk_id",
+    "doc_id",
+    "section_id",
+    "section_heading",
+    "part",
+    "chapter",
+    "page_start",
+    "page_end",
+    "chunk_index",  # position within the section, used to merge neighbouring chunks
+    "text",
+    "content_hash",
+    # denormalised from the SQLite acts table so filters can be pushed into the search
+    "ministry_slug",
+    "act_title",
+    "enactment_date",
+]
+VECTOR_FIELD = "embedding"
+CHUNK_FIELDS = SCALAR_FIELDS + [VECTOR_FIELD]
+
+
+class SearchFilter(BaseModel):
+    doc_ids: Optional[List[str]] = None
+    chunk_ids: Optional[List[str]] = None
+    # (doc_id, section_id) pairs; a row matches when it is in one of them
+    sections: Optional[List[Tuple[str, str]]] = None
+    ministry: Optional[str] = None  # slug or display name
+    part: Optional[str] = None
+    chapter: Optional[str] = None
+    section_id_prefix: Optional[str] = None
+    enacted_from: Optional[date] = None
+    enacted_to: Optional[date] = None
+
+    def is_empty(self) -> bool:
+        return not any(v for v in self.model_dump().values())
+
+    def ministry_slug(self) -> Optional[str]:
+        return ministry_slug(self.ministry) if self.ministry else None
+
+    def date_range(self) -> Tuple[Optional[int], Optional[int]]:
+        return date_to_int(self.enacted_from), date_to_int(self.enacted_to)
+
+
+def ministry_slug(name: str) -> str:
+    # same slugging as scrapers.indiacode.pipeline.run_listings
+    return name.strip().lower().replace(" ", "-")
+
+
+def date_to_int(d: Optional[date]) -> Optional[int]:
+    # stored as yyyymmdd, 0 when the act has no parseable enactment date
+    return d.year * 10000 + d.month * 100 + d.day if d else None
+
+
+class VectorStore(ABC):
+    # columns are dicts of field name -> list of values, all lists the same length
+
+    name: str = "base"
+    dim: int  # vector width, checked against snapshots before a load
+
+    @abstractmethod
+    def insert(self, columns: Dict[str, List[Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def upsert(self, columns: Dict[str, List[Any]]) -> int:
+        ...
+
+    @abstractmethod
+    def delete(self, *, doc_ids: Optional[List[str]] = None, chunk_ids: Optional[List[str]] = None) -> int:
+        ...
+
+    def apply_diff(self, upserts: Dict[str, List[Any]], delete_chunk_ids: List[str]) -> Tuple[int, int]:
+        # upsert before delete so a document is never missing mid-update;
+        # backends with transactions make the pair atomic
+        upserted = self.upsert(upserts) if num_rows(upserts) else 0
+        deleted = self.delete(chunk_ids=delete_chunk_ids) if delete_chunk_ids else 0
+        return upserted, deleted
+
+    @abstractmethod
+    def search(
+        self,
+        vectors: List[List[float]],
+        top_k: int,
+        filters: Optional[SearchFilter] = None,
+        output_fields: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        # one hit list per query vector, each hit has the output fields plus "score"
+        ...
+
+    @abstractmethod
+    def query(self, filters: SearchFilter, output_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def iter_rows(self, output_fields: Optional[List[str]] = None, batch_size: int = 2000) -> Iterator[List[Dict[str, Any]]]:
+        # every stored row in batches, vectors included when asked for (snapshot export)
+        ...
+
+    def bulk_load(self, batches: Iterable[Dict[str, List[Any]]]) -> int:
+        # a whole corpus into an empty store (snapshot import); backends with a
+        # faster path than batched inserts override this
+        rows = 0
+        for columns in batches:
+            rows += self.insert(columns)
+        self.flush()
+        return rows
+
+    @abstractmethod
+    def flush(self) -> None:
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+
+def num_rows(columns: Dict[str, List[Any]]) -> int:
+    return len(columns.get("chunk_id", []))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+import argparse
+import math
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymilvus import FieldSchema, Collection, CollectionSchema, DataType, utility
+
+from src.utils.stats import latency_summary
+from src.vectorstore.index_config import INDEX_CONFIG_PATH, save_index_config
+from src.vectorstore.milvus_store import (
+    COLLECTION_NAME,
+    EMBED_DIM,
+    MILVUS_ALIAS,
+    get_or_create_collection,
+    rebuild_index,
+)
+from src.vectorstore.quantization import PQ_M
+
+SCRATCH_COLLECTION = f"{COLLECTION_NAME}_calib"
+METRIC = "COSINE"
+
+
+def load_vectors(coll: Collection, batch_size: int = 2000) -> np.ndarray:
+    it = coll.query_iterator(batch_size=batch_size, expr="", output_fields=["embedding"])
+    parts: List[np.ndarray] = []
+    try:
+        while True:
+            batch = it.next()
+            if not batch:
+                break
+            parts.append(np.asarray([r["embedding"] for r in batch], dtype=np.float32))
+    finally:
+        it.close()
+    if not parts:
+        return np.zeros((0, EMBED_DIM), dtype=np.float32)
+    return np.vstack(parts)
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def sample_queries(vectors: np.ndarray, n: int, queries_file: Optional[Path], seed: int) -> np.ndarray:
+    if queries_file is not None:
+        from src.pipelines.embedder import get_model
+        texts = [line.strip() for line in queries_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+        return np.asarray(get_model().encode(texts[:n]), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)
+    return vectors[idx]
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = _normalize(queries) @ _normalize(vectors).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return top
+
+
+def default_grid(n_vectors: int, k: int) -> List[Tuple[Dict, List[Dict]]]:
+    # nlist around sqrt(N) .. 4*sqrt(N), the usual IVF rule of thumb
+    root = max(1.0, math.sqrt(n_vectors))
+    nlists = sorted({max(16, int(2 ** round(math.log2(root * f)))) for f in (1, 2, 4)})
+    grid: List[Tuple[Dict, List[Dict]]] = []
+    for index_type in ("IVF_FLAT", "IVF_SQ8", "IVF_PQ"):
+        if index_type == "IVF_PQ" and EMBED_DIM % PQ_M:
+            continue
+        for nlist in nlists:
+            nprobes = [p for p in (4, 8, 16, 32, 64, 128) if p <= nlist]
+            params = {"nlist": nlist, "m": PQ_M, "nbits": 8} if index_type == "IVF_PQ" else {"nlist": nlist}
+            grid.append((
+                {"metric_type": METRIC, "index_type": index_type, "params": params},
+                [{"metric_type": METRIC, "params": {"nprobe": p}} for p in nprobes],
+            ))
+    grid.append((
+        {"metric_type": METRIC, "index_type": "HNSW", "params": {"M": 16, "efConstruction": 200}},
+        [{"metric_type": METRIC, "params": {"ef": ef}} for ef in (32, 64, 128, 256) if ef >= k],
+    ))
+    return grid
+
+
+def index_bytes_per_vector(index_params: Dict, dim: int = EMBED_DIM) -> float:
+    # in-memory size of one vector in the loaded index, ignoring centroids/codebooks
+    index_type = index_params["index_type"]
+    params = index_params.get("params", {})
+    if index_type == "IVF_SQ8":
+        return float(dim)
+    if index_type == "IVF_PQ":
+        return params["m"] * params.get("nbits", 8) / 8
+    if index_type == "HNSW":
+        return 4.0 * dim + 2 * params.get("M", 16) * 4  # plus the level-0 graph links
+    return 4.0 * dim
+
+
+def create_scratch_collection(vectors: np.ndarray, batch_size: int = 5000) -> Collection:
+    if utility.has_collection(SCRATCH_COLLECTION, using=MILVUS_ALIAS):
+        utility.drop_collection(SCRATCH_COLLECTION, using=MILVUS_ALIAS)
+    schema = CollectionSchema(
+        fields=[
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=vectors.shape[1]),
+        ],
+        description="LawMate ANN calibration scratch copy",
+    )
+    coll = Collection(name=SCRATCH_COLLECTION, schema=schema, using=MILVUS_ALIAS)
+    for i in range(0, len(vectors), batch_size):
+        batch = vectors[i:i + batch_size]
+        coll.insert([list(range(i, i + len(batch))), batch.tolist()])
+    coll.flush()
+    return coll
+
+
+def measure(
+    coll: Collection,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    search_params: Dict,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    recalls: List[float] = []
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        res = coll.search(data=[q.tolist()], anns_field="embedding", param=search_params, limit=k)
+        latencies.append(time.perf_counter() - t0)
+        got = {hit.id for hit in res[0]}
+        recalls.append(len(got & set(expected.tolist())) / k)
+    return {"recall": round(float(np.mean(recalls)), 4), **latency_summary(latencies)}
+
+
+def choose(results: List[Dict[str, Any]], recall_target: float, max_index_mb: Optional[float] = None) -> Dict[str, Any]:
+    if max_index_mb is not None:
+        results = [r for r in results if r["index_mb"] <= max_index_mb] or results
+    ok = [r for r in results if r["recall"] >= recall_target]
+    if ok:
+        return min(ok, key=lambda r: (r["p99_ms"], r["p50_ms"]))
+    return max(results, key=lambda r: (r["recall"], -r["p99_ms"]))
+
+
+def calibrate(
+    *,
+    n_queries: int = 200,
+    k: int = 10,
+    recall_target: float = 0.95,
+    queries_file: Optional[Path] = None,
+    seed: int = 7,
+    keep_scratch: bool = False,
+    max_index_mb: Optional[float] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    main = get_or_create_collection()
+    vectors = load_vectors(main)
+    if len(vectors) <= k:
+        raise RuntimeError(f"Need more than k={k} vectors to calibrate, found {len(vectors)}")
+    print(f"[calibrate] vectors={len(vectors)} dim={vectors.shape[1]}")
+
+    queries = sample_queries(vectors, n_queries, queries_file, seed)
+    truth = exact_top_k(vectors, queries, k)
+
+    scratch = create_scratch_collection(vectors)
+    results: List[Dict[str, Any]] = []
+    try:
+        for index_params, search_grid in default_grid(len(vectors), k):
+            t0 = time.perf_counter()
+            if scratch.has_index():
+                scratch.release()
+                scratch.drop_index()
+            scratch.create_index(field_name="embedding", index_params=index_params)
+            utility.wait_for_index_building_complete(SCRATCH_COLLECTION, using=MILVUS_ALIAS)
+            scratch.load()
+            build_s = time.perf_counter() - t0
+
+            for search_params in search_grid:
+                row = {
+                    "index_params": index_params,
+                    "search_params": search_params,
+                    "build_s": round(build_s, 2),
+                    "index_mb": round(len(vectors) * index_bytes_per_vector(index_params) / 2**20, 2),
+                    **measure(scratch, queries, truth, k, search_params),
+                }
+                results.append(row)
+                print(
+                    f"[calibrate] {index_params['index_type']:<8} {index_params['params']} "
+                    f"{search_params['params']}: recall@{k}={row['recall']:.3f} "
+                    f"p50={row['p50_ms']:.2f}ms p99={row['p99_ms']:.2f}ms index={row['index_mb']}MB"
+                )
+    finally:
+        if not keep_scratch:
+            utility.drop_collection(SCRATCH_COLLECTION, using=MILVUS_ALIAS)
+
+    best = choose(results, recall_target, max_index_mb)
+    config = {
+        "index_params": best["index_params"],
+        "search_params": best["search_params"],
+        "calibration": {
+            "calibrated_at": datetime.now(timezone.utc).isoformat(),
+            "collection": COLLECTION_NAME,
+            "n_vectors": int(len(vectors)),
+            "n_queries": int(len(queries)),
+            "k": k,
+            "recall_target": recall_target,
+            "recall": best["recall"],
+            "p50_ms": best["p50_ms"],
+            "p99_ms": best["p99_ms"],
+            "index_mb": best["index_mb"],
+        },
+    }
+    return config, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pick Milvus ANN index/search params by recall@k and latency")
+    parser.add_argument("--queries", type=int, default=200, help="number of sampled queries")
+    parser.add_argument("--queries-file", type=Path, default=None, help="optional file with one query text per line")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--recall-target", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep-scratch", action="store_true")
+    parser.add_argument("--max-index-mb", type=float, default=None, help="only pick indexes whose vectors fit in this much memory")
+    parser.add_argument("--write", action="store_true", help=f"save the chosen params to {INDEX_CONFIG_PATH}")
+    parser.add_argument("--apply", action="store_true", help="rebuild the live collection index with the chosen params")
+    args = parser.parse_args()
+
+    config, _ = calibrate(
+        n_queries=args.queries,
+        k=args.k,
+        recall_target=args.recall_target,
+        queries_file=args.queries_file,
+        seed=args.seed,
+        keep_scratch=args.keep_scratch,
+        max_index_mb=args.max_index_mb,
+    )
+    print(f"\n[calibrate] chosen: {config['index_params']} / {config['search_params']}")
+    print(f"[calibrate] {config['calibration']}")
+
+    if args.write:
+        save_index_config(config)
+        print(f"[calibrate] wrote {INDEX_CONFIG_PATH}")
+    if args.apply:
+        rebuild_index(get_or_create_collection(), config["index_params"])
+        print(f"[calibrate] rebuilt index on {COLLECTION_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.vectorstore.base import SCALAR_FIELDS, num_rows
+
+try:
+    import zstandard  # optional, zlib is used when missing
+except ImportError:
+    zstandard = None
+
+CHUNK_STORE_DIR = os.getenv("LAW_MATE_CHUNK_STORE_DIR", "data/chunk_store")
+ZSTD_LEVEL = int(os.getenv("LAW_MATE_CHUNK_STORE_ZSTD_LEVEL", "6"))
+SQLITE_MAX_VARS = 900
+# everything the vector store keeps per chunk except the key itself
+RECORD_FIELDS = [f for f in SCALAR_FIELDS if f != "chunk_id"]
+
+_CODEC_ZLIB = 0
+_CODEC_ZSTD = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+  chunk_id  TEXT PRIMARY KEY,
+  doc_id    TEXT NOT NULL,
+  offset    INTEGER NOT NULL,
+  length    INTEGER NOT NULL,
+  codec     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_doc_id ON records(doc_id);
+CREATE TABLE IF NOT EXISTS store_info (
+  key   TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+
+def _batched(values: List[Any], size: int = SQLITE_MAX_VARS):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# Chunk text and metadata, kept next to the vector index so searches only have
+# to return ids. Records are compressed one by one and appended to a blob file
+# that readers mmap; the chunk_id -> (offset, length) index lives in SQLite.
+# Overwritten and deleted records stay in the blob until compact(), which
+# writes a fresh blob under a new name so open readers keep a valid mapping.
+class ChunkTextStore:
+
+    def __init__(self, root: str | Path = CHUNK_STORE_DIR) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "index.db"
+        self._lock = threading.RLock()
+        self._blob_name: Optional[str] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('blob', 'chunks-0.blob')")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _current_blob(conn: sqlite3.Connection) -> str:
+        return conn.execute("SELECT value FROM store_info WHERE key = 'blob'").fetchone()[0]
+
+    # ---- writes ----
+
+    def _encode(self, record: Dict[str, Any]) -> tuple[bytes, int]:
+        raw = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self._compressor is not None:
+            return self._compressor.compress(raw), _CODEC_ZSTD
+        return zlib.compress(raw, 6), _CODEC_ZLIB
+
+    def put(self, columns: Dict[str, List[Any]]) -> int:
+        n = num_rows(columns)
+        if not n:
+            return 0
+        with self._lock, self._conn() as conn:
+            # the sqlite write lock also serialises appends to the blob
+            conn.execute("BEGIN IMMEDIATE")
+            blob_path = self.root / self._current_blob(conn)
+            rows = []
+            with open(blob_path, "ab") as f:
+                offset = f.tell()
+                for i in range(n):
+                    record = {name: columns[name][i] for name in RECORD_FIELDS if name in columns}
+                    payload, codec = self._encode(record)
+                    f.write(payload)
+                    rows.append((columns["chunk_id"][i], columns["doc_id"][i], offset, len(payload), codec))
+                    offset += len(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            # index rows are committed only after the bytes are on disk
+            conn.executemany(
+                "INSERT OR REPLACE INTO records (chunk_id, doc_id, offset, length, codec) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return n
+
+    def delete(self, *, doc_ids: Optional[List[str]] = None, chunk_ids: Optional[List[str]] = None) -> int:
+        deleted = 0
+        with self._lock, self._conn() as conn:
+            for column, values in (("doc_id", doc_ids or []), ("chunk_id", chunk_ids or [])):
+                for batch in _batched(values):
+                    cur = conn.execute(f"DELETE FROM records WHERE {column} IN ({','.join('?' * len(batch))})", batch)
+                    deleted += cur.rowcount
+        return deleted
+
+    def compact(self) -> int:
+        with self._lock, self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            old_name = self._current_blob(conn)
+            old_path = self.root / old_name
+            size = old_path.stat().st_size if old_path.exists() else 0
+            live = conn.execute("SELECT chunk_id, offset, length FROM records ORDER BY offset").fetchall()
+            live_bytes = sum(r[2] for r in live)
+            if live_bytes == size:
+                return 0
+
+            generation = int(old_name.split("-")[1].split(".")[0]) + 1
+            new_name = f"chunks-{generation}.blob"
+            moved = []
+            with open(old_path, "rb") as src, open(self.root / new_name, "wb") as dst:
+                for chunk_id, offset, length in live:
+                    src.seek(offset)
+                    moved.append((dst.tell(), chunk_id))
+                    dst.write(src.read(length))
+                dst.flush()
+                os.fsync(dst.fileno())
+            conn.executemany("UPDATE records SET offset = ? WHERE chunk_id = ?", moved)
+            conn.execute("UPDATE store_info SET value = ? WHERE key = 'blob'", (new_name,))
+        # readers that still map the old blob keep working on the unlinked inode
+        old_path.unlink(missing_ok=True)
+        return size - live_bytes
+
+    # ---- reads ----
+
+    def _mapping(self, blob_name: str, needed: int) -> Optional[mmap.mmap]:
+        # remap when compact() switched files or the blob grew past our mapping
+        if self._mm is None or self._blob_name != blob_name or len(self._mm) < needed:
+            path = self.root / blob_name
+            if not path.exists() or path.stat().st_size == 0:
+                return None
+            with open(path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._blob_name = blob_name
+        return self._mm
+
+    def _decode(self, payload: bytes, codec: int) -> Dict[str, Any]:
+        if codec == _CODEC_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("chunk store has zstd records but the zstandard package is not installed")
+            raw = self._decompressor.decompress(payload)
+        else:
+            raw = zlib.decompress(payload)
+        return json.loads(raw)
+
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not chunk_ids:
+            return {}
+        with self._lock, self._conn() as conn:
+            blob_name = self._current_blob(conn)
+            index = []
+            for batch in _batched(list(chunk_ids)):
+                index.extend(
+                    conn.execute(
+                        f"SELECT chunk_id, offset, length, codec FROM records "
+                        f"WHERE chunk_id IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                )
+            if not index:
+                return {}
+            mm = self._mapping(blob_name, max(offset + length for _, offset, length, _ in index))
+            if mm is None:
+                return {}
+            out: Dict[str, Dict[str, Any]] = {}
+            for chunk_id, offset, length, codec in index:
+                out[chunk_id] = {"chunk_id": chunk_id, **self._decode(mm[offset:offset + length], codec)}
+        return out
+
+    def count(self) -> int:
+        with self._conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._conn() as conn:
+            blob_name = self._current_blob(conn)
+            records, live_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM records").fetchone()
+        path = self.root / blob_name
+        return {
+            "records": records,
+            "live_bytes": live_bytes,
+            "blob_bytes": path.stat().st_size if path.exists() else 0,
+            "codec": "zstd" if zstandard is not None else "zlib",
+        }
+
+
+_chunk_store: Optional[ChunkTextStore] = None
+
+
+def get_chunk_store() -> ChunkTextStore:
+    global _chunk_store
+    if _chunk_store is None:
+        _chunk_store = ChunkTextStore()
+    return _chunk_store
+
+
+if __name__ == "__main__":
+    # python -m src.vectorstore.chunk_store [stats|compact]
+    store = get_chunk_store()
+    if len(sys.argv) > 1 and sys.argv[1] == "compact":
+        print(f"Reclaimed {store.compact()} bytes")
+    print(store.stats())
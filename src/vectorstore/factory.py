@@ -0,0 +1,41 @@
+from __future__ import annotations
+import os
+from typing import Optional
+
+from src.vectorstore.base import VectorStore
+
+# "milvus" (default) or "local" (FAISS / numpy + SQLite, no server needed)
+VECTOR_BACKEND = os.getenv("LAW_MATE_VECTOR_BACKEND", "milvus").lower()
+
+_store: Optional[VectorStore] = None
+_section_store: Optional[VectorStore] = None
+
+
+def get_vector_store() -> VectorStore:
+    global _store
+    if _store is None:
+        if VECTOR_BACKEND == "local":
+            from src.vectorstore.local_store import LocalVectorStore
+            _store = LocalVectorStore()
+        elif VECTOR_BACKEND == "milvus":
+            from src.vectorstore.milvus_store import MilvusVectorStore
+            _store = MilvusVectorStore()
+        else:
+            raise ValueError(f"Unknown LAW_MATE_VECTOR_BACKEND={VECTOR_BACKEND!r}")
+    return _store
+
+
+def get_section_store() -> VectorStore:
+    # second store on the same backend with one heading and one summary vector per section
+    global _section_store
+    if _section_store is None:
+        if VECTOR_BACKEND == "local":
+            from src.vectorstore.local_store import LOCAL_SECTION_STORE_DIR, LocalVectorStore
+            # a few vectors per section: small enough to keep in full precision
+            _section_store = LocalVectorStore(LOCAL_SECTION_STORE_DIR, quantization="none")
+        elif VECTOR_BACKEND == "milvus":
+            from src.vectorstore.milvus_store import SECTION_COLLECTION_NAME, MilvusVectorStore
+            _section_store = MilvusVectorStore(collection_name=SECTION_COLLECTION_NAME)
+        else:
+            raise ValueError(f"Unknown LAW_MATE_VECTOR_BACKEND={VECTOR_BACKEND!r}")
+    return _section_store
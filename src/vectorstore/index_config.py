@@ -0,0 +1,41 @@
+from __future__ import annotations
+import copy
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Written by `python -m src.vectorstore.calibrate_ann --write`, read once at startup
+INDEX_CONFIG_PATH = Path(os.getenv("LAW_MATE_INDEX_CONFIG", "data/index_config.json"))
+
+DEFAULT_INDEX_CONFIG: Dict[str, Any] = {
+    "index_params": {
+        "metric_type": "COSINE",
+        "index_type": "IVF_FLAT",
+        "params": {"nlist": 1024},
+    },
+    "search_params": {
+        "metric_type": "COSINE",
+        "params": {"nprobe": 10},
+    },
+}
+
+_config: Optional[Dict[str, Any]] = None
+
+
+def load_index_config(path: Path = INDEX_CONFIG_PATH) -> Dict[str, Any]:
+    global _config
+    if _config is None:
+        cfg = copy.deepcopy(DEFAULT_INDEX_CONFIG)
+        if path.exists():
+            stored = json.loads(path.read_text(encoding="utf-8"))
+            cfg.update({k: v for k, v in stored.items() if v})
+        _config = cfg
+    return _config
+
+
+def save_index_config(cfg: Dict[str, Any], path: Path = INDEX_CONFIG_PATH) -> None:
+    global _config
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cfg, indent=2), encoding="utf-8")
+    _config = cfg
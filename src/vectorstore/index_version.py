@@ -0,0 +1,32 @@
+from __future__ import annotations
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+# Changes whenever the indexed corpus changes; caches keyed on it go stale together
+INDEX_VERSION_PATH = Path(os.getenv("LAW_MATE_INDEX_VERSION_FILE", "data/index_version"))
+
+_cached: Optional[Tuple[float, str]] = None
+
+
+def get_index_version(path: Path = INDEX_VERSION_PATH) -> str:
+    global _cached
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return "0"
+    # a stat per call is cheap and picks up bumps made by other processes
+    if _cached is None or _cached[0] != mtime:
+        _cached = (mtime, path.read_text(encoding="utf-8").strip() or "0")
+    return _cached[1]
+
+
+def bump_index_version(path: Path = INDEX_VERSION_PATH) -> str:
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, path)
+    return version
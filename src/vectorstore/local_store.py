@@ -0,0 +1,456 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.vectorstore.base import SCALAR_FIELDS, VECTOR_FIELD, SearchFilter, VectorStore, num_rows
+from src.vectorstore.quantization import (
+    MIN_TRAIN_ROWS,
+    QUANTIZATION,
+    RESCORE_FACTOR,
+    TRAIN_SAMPLE,
+    codec_filename,
+    make_codec,
+    rescore,
+)
+
+try:
+    import faiss  # optional, numpy brute force is used when missing
+except ImportError:
+    faiss = None
+
+LOCAL_STORE_DIR = os.getenv("LAW_MATE_LOCAL_STORE_DIR", "data/vectorstore")
+LOCAL_SECTION_STORE_DIR = os.getenv("LAW_MATE_LOCAL_SECTION_STORE_DIR", "data/vectorstore_sections")
+EMBED_DIM = int(os.getenv("LAW_MATE_EMBED_DIM", "384"))
+USE_FAISS = os.getenv("LAW_MATE_USE_FAISS", "1") == "1"
+SQLITE_MAX_VARS = 900
+PREFILTER_GATHER_RATIO = 0.25
+_INTEGER_COLUMNS = {"page_start", "page_end", "chunk_index", "enactment_date"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+  row_id          INTEGER PRIMARY KEY,
+  chunk_id        TEXT NOT NULL UNIQUE,
+  doc_id          TEXT NOT NULL,
+  section_id      TEXT,
+  section_heading TEXT,
+  part            TEXT,
+  chapter         TEXT,
+  page_start      INTEGER,
+  page_end        INTEGER,
+  chunk_index     INTEGER,
+  text            TEXT,
+  content_hash    TEXT,
+  ministry_slug   TEXT,
+  act_title       TEXT,
+  enactment_date  INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks(doc_id);
+CREATE TABLE IF NOT EXISTS store_info (
+  key   TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _batched(values: List[Any], size: int = SQLITE_MAX_VARS):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _filter_sql(filters: Optional[SearchFilter]) -> Tuple[str, List[Any]]:
+    if filters is None:
+        return "", []
+    clauses: List[str] = []
+    params: List[Any] = []
+    if filters.doc_ids:
+        clauses.append(f"doc_id IN ({','.join('?' * len(filters.doc_ids))})")
+        params.extend(filters.doc_ids)
+    if filters.chunk_ids:
+        clauses.append(f"chunk_id IN ({','.join('?' * len(filters.chunk_ids))})")
+        params.extend(filters.chunk_ids)
+    if filters.sections:
+        clauses.append("(" + " OR ".join(["(doc_id = ? AND section_id = ?)"] * len(filters.sections)) + ")")
+        for doc_id, section_id in filters.sections:
+            params.extend([doc_id, section_id])
+    if filters.ministry:
+        clauses.append("ministry_slug = ?")
+        params.append(filters.ministry_slug())
+    if filters.part:
+        clauses.append("part = ?")
+        params.append(filters.part)
+    if filters.chapter:
+        clauses.append("chapter = ?")
+        params.append(filters.chapter)
+    if filters.section_id_prefix:
+        clauses.append("section_id LIKE ? ESCAPE '\\'")
+        escaped = filters.section_id_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(escaped + "%")
+    date_from, date_to = filters.date_range()
+    if date_from is not None or date_to is not None:
+        clauses.append("enactment_date >= ?")
+        params.append(date_from or 1)
+    if date_to is not None:
+        clauses.append("enactment_date <= ?")
+        params.append(date_to)
+    return " AND ".join(clauses), params
+
+
+# Single-box backend: vectors live in an append-only float32 file that is
+# mmapped for search, metadata and the chunk_id -> row mapping live in SQLite.
+# Upserts and deletes only touch SQLite; the orphaned vector rows are
+# reclaimed by compact(). Vectors are L2-normalised so inner product == cosine.
+# With quantization (sq8 / pq, see quantization.py) only compressed codes are
+# held in RAM and the float32 file is read just for re-scoring the shortlist.
+class LocalVectorStore(VectorStore):
+    name = "local"
+
+    def __init__(
+        self,
+        root: str | Path = LOCAL_STORE_DIR,
+        dim: int = EMBED_DIM,
+        use_faiss: bool = USE_FAISS,
+        quantization: str = QUANTIZATION,
+        rescore_factor: int = RESCORE_FACTOR,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.vec_path = self.root / "vectors.f32"
+        self.db_path = self.root / "meta.db"
+        self.dim = dim
+        self.use_faiss = use_faiss and faiss is not None
+        self.codec = make_codec(quantization, dim)
+        self.codec_path = self.root / codec_filename(self.codec) if self.codec is not None else None
+        self.rescore_factor = max(1, rescore_factor)
+
+        self._lock = threading.RLock()
+        self._generation: Optional[str] = None
+        self._mat: Optional[np.ndarray] = None
+        self._live_rows: Optional[np.ndarray] = None
+        self._faiss_index = None
+        self._codes: Optional[np.ndarray] = None  # one code per row of the vector file
+        self._codes_source: Optional[Tuple[float, int]] = None  # (codebook mtime, vector file inode)
+
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            self._migrate(conn)
+            conn.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('dim', ?)", (str(dim),))
+            conn.execute("INSERT OR IGNORE INTO store_info (key, value) VALUES ('generation', '0')")
+            stored_dim = int(conn.execute("SELECT value FROM store_info WHERE key = 'dim'").fetchone()[0])
+        if stored_dim != dim:
+            raise ValueError(f"Local store at {self.root} has dim={stored_dim}, expected {dim}")
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        present = {r["name"] for r in conn.execute("PRAGMA table_info(chunks)")}
+        for name in SCALAR_FIELDS:
+            if name not in present:
+                col_type = "INTEGER" if name in _INTEGER_COLUMNS else "TEXT"
+                conn.execute(f"ALTER TABLE chunks ADD COLUMN {name} {col_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_ministry ON chunks(ministry_slug)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ---- writes ----
+
+    def _total_rows(self) -> int:
+        if not self.vec_path.exists():
+            return 0
+        return self.vec_path.stat().st_size // (4 * self.dim)
+
+    def _write_rows(self, conn: sqlite3.Connection, columns: Dict[str, List[Any]]) -> int:
+        n = num_rows(columns)
+        if not n:
+            return 0
+        vectors = _normalize(np.asarray(columns[VECTOR_FIELD], dtype=np.float32).reshape(n, self.dim))
+        start = self._total_rows()
+        with open(self.vec_path, "ab") as f:
+            f.write(vectors.tobytes())
+
+        rows = []
+        for i in range(n):
+            rows.append((start + i, *(columns.get(name, [None] * n)[i] for name in SCALAR_FIELDS)))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO chunks (row_id, {', '.join(SCALAR_FIELDS)}) "
+            f"VALUES ({', '.join('?' * (len(SCALAR_FIELDS) + 1))})",
+            rows,
+        )
+        return n
+
+    def _delete_rows(self, conn: sqlite3.Connection, column: str, values: List[str]) -> int:
+        deleted = 0
+        for batch in _batched(values):
+            cur = conn.execute(f"DELETE FROM chunks WHERE {column} IN ({','.join('?' * len(batch))})", batch)
+            deleted += cur.rowcount
+        return deleted
+
+    def _write(self, columns: Dict[str, List[Any]]) -> int:
+        if not num_rows(columns):
+            return 0
+        with self._lock, self._conn() as conn:
+            # take the sqlite write lock first so concurrent writers append in order
+            conn.execute("BEGIN IMMEDIATE")
+            n = self._write_rows(conn, columns)
+            self._bump_generation(conn)
+        return n
+
+    def _bump_generation(self, conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE store_info SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'")
+
+    def insert(self, columns: Dict[str, List[Any]]) -> int:
+        # chunk_id is unique here, so insert already has upsert semantics
+        return self._write(columns)
+
+    def upsert(self, columns: Dict[str, List[Any]]) -> int:
+        return self._write(columns)
+
+    def delete(self, *, doc_ids: Optional[List[str]] = None, chunk_ids: Optional[List[str]] = None) -> int:
+        with self._lock, self._conn() as conn:
+            deleted = self._delete_rows(conn, "doc_id", doc_ids or [])
+            deleted += self._delete_rows(conn, "chunk_id", chunk_ids or [])
+            if deleted:
+                self._bump_generation(conn)
+        return deleted
+
+    def apply_diff(self, upserts: Dict[str, List[Any]], delete_chunk_ids: List[str]) -> Tuple[int, int]:
+        # one sqlite transaction, so readers see either the old or the new document
+        with self._lock, self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            upserted = self._write_rows(conn, upserts)
+            deleted = self._delete_rows(conn, "chunk_id", delete_chunk_ids)
+            if upserted or deleted:
+                self._bump_generation(conn)
+        return upserted, deleted
+
+    def flush(self) -> None:
+        # every write is committed (sqlite) and appended (vectors) immediately;
+        # with quantization on, the codebook is (re)trained here once the store
+        # has doubled since the last training, so readers only ever load it
+        if self.codec is None:
+            return None
+        with self._lock, self._conn() as conn:
+            if self._codec_stale(conn):
+                self._refresh(conn)
+                self.train_codec(conn)
+        return None
+
+    def _codec_stale(self, conn: sqlite3.Connection) -> bool:
+        live = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        row = conn.execute("SELECT value FROM store_info WHERE key = 'codec_rows'").fetchone()
+        trained = int(row[0]) if row and self.codec_path.exists() else 0
+        return live >= MIN_TRAIN_ROWS and live >= 2 * trained
+
+    def train_codec(self, conn: sqlite3.Connection) -> None:
+        # on a random sample of live rows; written atomically so readers in
+        # other processes pick it up by mtime
+        rng = np.random.default_rng(0)
+        sample = self._live_rows
+        if len(sample) > TRAIN_SAMPLE:
+            sample = np.sort(rng.choice(sample, size=TRAIN_SAMPLE, replace=False))
+        self.codec.train(np.asarray(self._mat[sample]))
+        tmp_path = self.codec_path.with_suffix(".tmp")
+        self.codec.save(tmp_path)
+        os.replace(tmp_path, self.codec_path)
+        conn.execute("INSERT OR REPLACE INTO store_info (key, value) VALUES ('codec_rows', ?)", (str(len(self._live_rows)),))
+        # readers re-encode on their next search
+        self._bump_generation(conn)
+
+    def compact(self) -> int:
+        with self._lock, self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            live = [r[0] for r in conn.execute("SELECT row_id FROM chunks ORDER BY row_id")]
+            total = self._total_rows()
+            if len(live) == total:
+                return 0
+            mat = self._open_matrix(total)
+            tmp_path = self.vec_path.with_suffix(".f32.tmp")
+            with open(tmp_path, "wb") as f:
+                for batch in _batched(live, 65536):
+                    f.write(np.ascontiguousarray(mat[batch]).tobytes())
+            # ascending order means the new row_id never collides with a pending one
+            for new_id, old_id in enumerate(live):
+                if new_id != old_id:
+                    conn.execute("UPDATE chunks SET row_id = ? WHERE row_id = ?", (new_id, old_id))
+            os.replace(tmp_path, self.vec_path)
+            self._bump_generation(conn)
+        return total - len(live)
+
+    # ---- reads ----
+
+    def _open_matrix(self, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(self.vec_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def _refresh(self, conn: sqlite3.Connection) -> None:
+        generation = conn.execute("SELECT value FROM store_info WHERE key = 'generation'").fetchone()[0]
+        if generation == self._generation and self._mat is not None:
+            return
+        self._mat = self._open_matrix(self._total_rows())
+        self._live_rows = np.fromiter(
+            (r[0] for r in conn.execute("SELECT row_id FROM chunks ORDER BY row_id")), dtype=np.int64
+        )
+        self._faiss_index = None
+        self._generation = generation
+        if self.codec is not None:
+            self._sync_codes(conn)
+
+    def _sync_codes(self, conn: sqlite3.Connection) -> None:
+        # appended rows are encoded incrementally; a new codebook or a
+        # compacted vector file (new inode) re-encodes everything. Only flush()
+        # trains: until the indexer has written a codebook, search is exact.
+        if not self.codec_path.exists():
+            self._codes = None
+            self._codes_source = None
+            return
+        source = (self.codec_path.stat().st_mtime, self.vec_path.stat().st_ino)
+        if source != self._codes_source:
+            self.codec.load(self.codec_path)
+            self._codes = self.codec.encode_all(self._mat)
+            self._codes_source = source
+        elif len(self._codes) < len(self._mat):
+            self._codes = np.concatenate([self._codes, self.codec.encode_all(self._mat[len(self._codes):])])
+
+    def memory_bytes(self) -> Dict[str, int]:
+        # what search keeps in RAM, beyond the page cache of the memmap
+        with self._lock:
+            codes = self._codes.nbytes if self._codes is not None else 0
+            flat = self._faiss_index.ntotal * 4 * self.dim if self._faiss_index is not None else 0
+        return {"codes": codes, "faiss_flat": flat}
+
+    def _get_faiss_index(self):
+        if self._faiss_index is None:
+            index = faiss.IndexIDMap(faiss.IndexFlatIP(self.dim))
+            if len(self._live_rows):
+                index.add_with_ids(np.ascontiguousarray(self._mat[self._live_rows]), self._live_rows)
+            self._faiss_index = index
+        return self._faiss_index
+
+    def _candidate_rows(self, conn: sqlite3.Connection, filters: Optional[SearchFilter]) -> Optional[np.ndarray]:
+        where, params = _filter_sql(filters)
+        if not where:
+            return None
+        return np.fromiter((r[0] for r in conn.execute(f"SELECT row_id FROM chunks WHERE {where}", params)), dtype=np.int64)
+
+    def _top_rows(self, queries: np.ndarray, top_k: int, rows: Optional[np.ndarray]) -> List[List[Tuple[int, float]]]:
+        candidates = self._live_rows if rows is None else rows
+        k = min(top_k, len(candidates))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        if self._codes is not None:
+            if rows is not None and len(rows) < PREFILTER_GATHER_RATIO * len(self._codes):
+                row_ids = rows
+                approx = self.codec.scores(queries, self._codes[rows])
+            else:
+                row_ids = np.arange(len(self._codes))
+                approx = self.codec.scores(queries, self._codes)
+                mask = np.ones(approx.shape[1], dtype=bool)
+                mask[candidates] = False
+                approx[:, mask] = -np.inf
+            shortlist = min(k * self.rescore_factor, len(candidates))
+            return [rescore(q, a, row_ids, k, shortlist, self._mat) for q, a in zip(queries, approx)]
+
+        if self.use_faiss:
+            params = None
+            if rows is not None:
+                params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(rows))
+            scores, ids = self._get_faiss_index().search(queries, k, params=params)
+            return [
+                [(int(i), float(s)) for i, s in zip(id_row, score_row) if i >= 0]
+                for id_row, score_row in zip(ids, scores)
+            ]
+
+        if rows is not None and len(rows) < PREFILTER_GATHER_RATIO * len(self._mat):
+            # narrow filter: only score the matching rows
+            row_ids = rows
+            scores = queries @ np.asarray(self._mat[rows]).T
+        else:
+            # brute force over the whole matrix, then mask rows that are dead or filtered out
+            row_ids = np.arange(len(self._mat))
+            scores = queries @ self._mat.T
+            mask = np.ones(scores.shape[1], dtype=bool)
+            mask[candidates] = False
+            scores[:, mask] = -np.inf
+
+        out: List[List[Tuple[int, float]]] = []
+        for score_row in scores:
+            top = np.argpartition(-score_row, k - 1)[:k]
+            top = top[np.argsort(-score_row[top])]
+            out.append([(int(row_ids[i]), float(score_row[i])) for i in top])
+        return out
+
+    def _rows_by_id(self, conn: sqlite3.Connection, row_ids: List[int], fields: List[str]) -> Dict[int, Dict[str, Any]]:
+        scalar = [f for f in fields if f != VECTOR_FIELD]
+        out: Dict[int, Dict[str, Any]] = {}
+        for batch in _batched(row_ids):
+            cur = conn.execute(
+                f"SELECT row_id, {', '.join(scalar or ['chunk_id'])} FROM chunks "
+                f"WHERE row_id IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for r in cur:
+                row = {f: r[f] for f in scalar}
+                if VECTOR_FIELD in fields:
+                    row[VECTOR_FIELD] = self._mat[r["row_id"]].tolist()
+                out[r["row_id"]] = row
+        return out
+
+    def search(
+        self,
+        vectors: List[List[float]],
+        top_k: int,
+        filters: Optional[SearchFilter] = None,
+        output_fields: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        fields = output_fields or SCALAR_FIELDS
+        queries = _normalize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+
+        with self._lock, self._conn() as conn:
+            self._refresh(conn)
+            rows = self._candidate_rows(conn, filters)
+            ranked = self._top_rows(queries, top_k, rows)
+            wanted = sorted({row_id for hits in ranked for row_id, _ in hits})
+            meta = self._rows_by_id(conn, wanted, fields)
+
+        out: List[List[Dict[str, Any]]] = []
+        for hits in ranked:
+            out.append([{**meta[row_id], "score": score} for row_id, score in hits if row_id in meta])
+        return out
+
+    def query(self, filters: SearchFilter, output_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        fields = output_fields or SCALAR_FIELDS
+        with self._lock, self._conn() as conn:
+            self._refresh(conn)
+            rows = self._candidate_rows(conn, filters)
+            if rows is None:
+                rows = self._live_rows
+            meta = self._rows_by_id(conn, rows.tolist(), fields)
+        return list(meta.values())
+
+    def iter_rows(self, output_fields: Optional[List[str]] = None, batch_size: int = 2000) -> Iterator[List[Dict[str, Any]]]:
+        fields = output_fields or SCALAR_FIELDS
+        with self._lock, self._conn() as conn:
+            self._refresh(conn)
+            live = self._live_rows.tolist()
+        for batch in _batched(live, batch_size):
+            with self._lock, self._conn() as conn:
+                self._refresh(conn)
+                meta = self._rows_by_id(conn, batch, fields)
+            yield [meta[row_id] for row_id in batch if row_id in meta]
+
+    def count(self) -> int:
+        with self._conn() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
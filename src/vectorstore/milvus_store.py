@@ -0,0 +1,412 @@
+from __future__ import annotations
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from pymilvus import FieldSchema, Collection, CollectionSchema, DataType, connections, utility
+
+from src.vectorstore.index_config import load_index_config
+from src.vectorstore.base import CHUNK_FIELDS, SCALAR_FIELDS, VECTOR_FIELD, SearchFilter, VectorStore, num_rows
+
+MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
+MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
+MILVUS_ALIAS = "default"
+COLLECTION_NAME = os.getenv("LAW_MATE_COLLECTION", "lawmate_india_acts")
+# section heading / summary vectors, same schema (see pipelines/section_index.py)
+SECTION_COLLECTION_NAME = os.getenv("LAW_MATE_SECTION_COLLECTION", f"{COLLECTION_NAME}_sections")
+EMBED_DIM = int(os.getenv("LAW_MATE_EMBED_DIM", "384"))
+
+# bulk_load writes parquet into the object storage Milvus itself reads from;
+# no defaults, a bulk import without them fails before writing anything
+BULK_S3_ENDPOINT = os.getenv("LAW_MATE_BULK_S3_ENDPOINT", "")
+BULK_S3_ACCESS_KEY = os.getenv("LAW_MATE_BULK_S3_ACCESS_KEY", "")
+BULK_S3_SECRET_KEY = os.getenv("LAW_MATE_BULK_S3_SECRET_KEY", "")
+BULK_S3_BUCKET = os.getenv("LAW_MATE_BULK_S3_BUCKET", "")
+BULK_S3_SCHEME = os.getenv("LAW_MATE_BULK_S3_SCHEME", "http")
+BULK_FILE_ROWS = int(os.getenv("LAW_MATE_BULK_FILE_ROWS", "1000000"))
+BULK_TIMEOUT_S = float(os.getenv("LAW_MATE_BULK_TIMEOUT_S", "3600"))
+
+# defaults live in index_config; calibrate_ann can overwrite them per corpus
+INDEX_PARAMS: Dict = load_index_config()["index_params"]
+SEARCH_PARAMS: Dict = load_index_config()["search_params"]
+
+
+def connect_milvus()->None:
+    if not connections.has_connection(MILVUS_ALIAS):
+        connections.connect(
+            alias = MILVUS_ALIAS,
+            host = MILVUS_HOST,
+            port = MILVUS_PORT
+    )
+
+
+def get_or_create_collection(name: str = COLLECTION_NAME) -> Collection:
+
+    connect_milvus()
+    existing = utility.list_collections(using=MILVUS_ALIAS)
+    if name in existing:
+        coll = Collection(name = name, using = MILVUS_ALIAS)
+        coll.load()
+        return coll
+
+    # no `text` field: chunk text lives in the local chunk store (chunk_store.py),
+    # so searches ship ids and scores only. Older collections that still have
+    # the field keep working, writes only fill fields present in the schema.
+    fields = [
+        FieldSchema(
+            name = 'chunk_id',
+            dtype = DataType.VARCHAR,
+            is_primary = True,
+            auto_id = False,
+            max_length = 128
+        ),
+        FieldSchema(
+            name="doc_id",
+            dtype = DataType.VARCHAR,
+            max_length = 64
+        ),
+          FieldSchema(
+            name="section_id",
+            dtype=DataType.VARCHAR,
+            max_length=32,
+        ),
+        FieldSchema(
+            name="section_heading",
+            dtype=DataType.VARCHAR,
+            max_length=512,
+        ),
+        FieldSchema(
+            name="part",
+            dtype=DataType.VARCHAR,
+            max_length=64,
+        ),
+        FieldSchema(
+            name="chapter",
+            dtype=DataType.VARCHAR,
+            max_length=64,
+        ),
+        FieldSchema(
+            name="page_start",
+            dtype=DataType.INT32,
+        ),
+        FieldSchema(
+            name="page_end",
+            dtype=DataType.INT32,
+        ),
+        FieldSchema(
+            name="chunk_index",
+            dtype=DataType.INT32,
+        ),
+        FieldSchema(
+            name="content_hash",
+            dtype=DataType.VARCHAR,
+            max_length=64,
+        ),
+        FieldSchema(
+            name="ministry_slug",
+            dtype=DataType.VARCHAR,
+            max_length=128,
+        ),
+        FieldSchema(
+            name="act_title",
+            dtype=DataType.VARCHAR,
+            max_length=512,
+        ),
+        FieldSchema(
+            name="enactment_date",
+            dtype=DataType.INT32,
+        ),
+        FieldSchema(
+            name="embedding",
+            dtype=DataType.FLOAT_VECTOR,
+            dim=EMBED_DIM,
+        ),
+    ]
+
+    schema = CollectionSchema(
+        fields = fields,
+        description =  "LawMate India - legal act chunks"
+    )
+
+    coll = Collection(
+        name = name,
+        schema = schema,
+        using = MILVUS_ALIAS,
+        shards_num = 2
+    )
+
+    coll.create_index(
+        field_name = "embedding",
+        index_params = INDEX_PARAMS
+    )
+
+    utility.index_building_progress(name, using = MILVUS_ALIAS)
+    coll.flush()
+    coll.load()
+    return coll
+
+
+def rebuild_index(coll: Collection, index_params: Dict) -> None:
+    coll.release()
+    coll.drop_index()
+    coll.create_index(field_name="embedding", index_params=index_params)
+    utility.wait_for_index_building_complete(coll.name, using=MILVUS_ALIAS)
+    coll.load()
+
+
+def expr_str_list(values: List[str]) -> str:
+    # json.dumps gives us double-quoted literals with quotes/backslashes escaped
+    return "[" + ", ".join(json.dumps(v) for v in values) + "]"
+
+
+def filter_to_expr(filters: Optional[SearchFilter]) -> str:
+    if filters is None:
+        return ""
+    clauses: List[str] = []
+    if filters.doc_ids:
+        clauses.append(f"doc_id in {expr_str_list(filters.doc_ids)}")
+    if filters.chunk_ids:
+        clauses.append(f"chunk_id in {expr_str_list(filters.chunk_ids)}")
+    if filters.sections:
+        pairs = [f"(doc_id == {json.dumps(d)} and section_id == {json.dumps(s)})" for d, s in filters.sections]
+        clauses.append("(" + " or ".join(pairs) + ")")
+    if filters.ministry:
+        clauses.append(f"ministry_slug == {json.dumps(filters.ministry_slug())}")
+    if filters.part:
+        clauses.append(f"part == {json.dumps(filters.part)}")
+    if filters.chapter:
+        clauses.append(f"chapter == {json.dumps(filters.chapter)}")
+    if filters.section_id_prefix:
+        # Milvus LIKE takes backslash escapes for literal % and _
+        escaped = filters.section_id_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        clauses.append(f"section_id like {json.dumps(escaped + '%')}")
+    date_from, date_to = filters.date_range()
+    if date_from is not None or date_to is not None:
+        clauses.append(f"enactment_date >= {date_from or 1}")
+    if date_to is not None:
+        clauses.append(f"enactment_date <= {date_to}")
+    return " and ".join(clauses)
+
+
+def check_bulk_config() -> None:
+    required = {
+        "LAW_MATE_BULK_S3_ENDPOINT": BULK_S3_ENDPOINT,
+        "LAW_MATE_BULK_S3_ACCESS_KEY": BULK_S3_ACCESS_KEY,
+        "LAW_MATE_BULK_S3_SECRET_KEY": BULK_S3_SECRET_KEY,
+        "LAW_MATE_BULK_S3_BUCKET": BULK_S3_BUCKET,
+    }
+    missing = [name for name, value in required.items() if not value]
+    if missing:
+        raise ValueError(
+            f"Milvus bulk import needs {', '.join(missing)} set to the object storage Milvus uses "
+            "(or import with --no-bulk)"
+        )
+
+
+def _wait_for_imports(collection_name: str, task_ids: List[int]) -> None:
+    from pymilvus import BulkInsertState
+
+    pending = set(task_ids)
+    deadline = time.monotonic() + BULK_TIMEOUT_S
+    while pending:
+        for task_id in list(pending):
+            state = utility.get_bulk_insert_state(task_id=task_id, using=MILVUS_ALIAS)
+            if state.state == BulkInsertState.ImportFailed:
+                raise RuntimeError(f"bulk insert task {task_id} failed: {state.failed_reason}")
+            if state.state == BulkInsertState.ImportCompleted:
+                pending.discard(task_id)
+        if pending:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"bulk insert tasks {sorted(pending)} still running after {BULK_TIMEOUT_S:.0f}s")
+            time.sleep(2)
+    utility.wait_for_index_building_complete(collection_name, using=MILVUS_ALIAS)
+
+
+class MilvusVectorStore(VectorStore):
+    name = "milvus"
+
+    def __init__(self, coll: Optional[Collection] = None, collection_name: str = COLLECTION_NAME) -> None:
+        self._coll = coll
+        self.collection_name = collection_name
+        self._fields: Optional[List[str]] = None
+
+    @property
+    def coll(self) -> Collection:
+        if self._coll is None:
+            self._coll = get_or_create_collection(self.collection_name)
+        return self._coll
+
+    @property
+    def fields(self) -> List[str]:
+        # collections created before a field was added just don't get it written
+        if self._fields is None:
+            present = {f.name for f in self.coll.schema.fields}
+            self._fields = [name for name in CHUNK_FIELDS if name in present]
+        return self._fields
+
+    @property
+    def dim(self) -> int:
+        # from the schema: the collection may predate a LAW_MATE_EMBED_DIM change
+        for f in self.coll.schema.fields:
+            if f.name == VECTOR_FIELD:
+                return int(f.params["dim"])
+        return EMBED_DIM
+
+    def _present(self, fields: List[str]) -> List[str]:
+        return [f for f in fields if f in self.fields]
+
+    def insert(self, columns: Dict[str, List[Any]]) -> int:
+        if not num_rows(columns):
+            return 0
+        res = self.coll.insert([columns[name] for name in self.fields])
+        try:
+            return len(res.primary_keys)
+        except AttributeError:
+            return num_rows(columns)
+
+    def upsert(self, columns: Dict[str, List[Any]]) -> int:
+        if not num_rows(columns):
+            return 0
+        res = self.coll.upsert([columns[name] for name in self.fields])
+        try:
+            return res.upsert_count
+        except AttributeError:
+            return num_rows(columns)
+
+    def delete(self, *, doc_ids: Optional[List[str]] = None, chunk_ids: Optional[List[str]] = None) -> int:
+        # rows matching either list, like the local store (filter_to_expr ANDs its clauses)
+        clauses = [
+            filter_to_expr(SearchFilter(doc_ids=doc_ids or None)),
+            filter_to_expr(SearchFilter(chunk_ids=chunk_ids or None)),
+        ]
+        expr = " or ".join(f"({c})" for c in clauses if c)
+        if not expr:
+            return 0
+        res = self.coll.delete(expr)
+        try:
+            return res.delete_count
+        except AttributeError:
+            return 0
+
+    def search(
+        self,
+        vectors: List[List[float]],
+        top_k: int,
+        filters: Optional[SearchFilter] = None,
+        output_fields: Optional[List[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        fields = self._present(output_fields or SCALAR_FIELDS)
+        results = self.coll.search(
+            data=vectors,
+            anns_field=VECTOR_FIELD,
+            param=SEARCH_PARAMS,
+            limit=top_k,
+            expr=filter_to_expr(filters) or None,
+            output_fields=fields,
+        )
+
+        out: List[List[Dict[str, Any]]] = []
+        for hits in results:
+            rows: List[Dict[str, Any]] = []
+            for hit in hits:
+                row = {f: hit.entity.get(f) for f in fields}
+                row["score"] = float(hit.distance)
+                rows.append(row)
+            out.append(rows)
+        return out
+
+    def query(self, filters: SearchFilter, output_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        expr = filter_to_expr(filters)
+        if not expr:
+            raise ValueError("Milvus query needs a non-empty filter")
+        return self.coll.query(expr=expr, output_fields=self._present(output_fields or SCALAR_FIELDS))
+
+    def iter_rows(self, output_fields: Optional[List[str]] = None, batch_size: int = 2000) -> Iterator[List[Dict[str, Any]]]:
+        it = self.coll.query_iterator(batch_size=batch_size, expr="", output_fields=self._present(output_fields or SCALAR_FIELDS))
+        try:
+            while True:
+                batch = it.next()
+                if not batch:
+                    break
+                yield [dict(r) for r in batch]
+        finally:
+            it.close()
+
+    def _arrow_schema(self):
+        import pyarrow as pa
+
+        types = {DataType.VARCHAR: pa.string(), DataType.INT32: pa.int32(), DataType.INT64: pa.int64()}
+        dtypes = {f.name: f.dtype for f in self.coll.schema.fields}
+        return pa.schema([
+            (name, pa.list_(pa.float32()) if name == VECTOR_FIELD else types[dtypes[name]]) for name in self.fields
+        ])
+
+    def _arrow_table(self, columns: Dict[str, List[Any]], schema, dim: int):
+        import pyarrow as pa
+
+        arrays = []
+        for field in schema:
+            if field.name == VECTOR_FIELD:
+                # one flat float32 buffer plus offsets, no per-row lists
+                flat = np.ascontiguousarray(columns[VECTOR_FIELD], dtype=np.float32).reshape(-1)
+                offsets = np.arange(0, flat.size + 1, dim, dtype=np.int32)
+                arrays.append(pa.ListArray.from_arrays(pa.array(offsets), pa.array(flat)))
+            else:
+                arrays.append(pa.array(columns[field.name], type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def bulk_load(self, batches: Iterable[Dict[str, List[Any]]]) -> int:
+        # column batches become parquet row groups in Milvus' object storage,
+        # then one import task per file; far faster than row inserts for a whole corpus
+        check_bulk_config()
+        import pyarrow.parquet as pq
+        from pyarrow import fs
+
+        s3 = fs.S3FileSystem(
+            access_key=BULK_S3_ACCESS_KEY,
+            secret_key=BULK_S3_SECRET_KEY,
+            endpoint_override=BULK_S3_ENDPOINT,
+            scheme=BULK_S3_SCHEME,
+        )
+        schema, dim = self._arrow_schema(), self.dim
+        prefix = f"lawmate-snapshots/{self.collection_name}/{int(time.time())}"
+        files: List[str] = []
+        writer = None
+        rows = file_rows = 0
+        try:
+            for columns in batches:
+                n = num_rows(columns)
+                if not n:
+                    continue
+                if writer is None or file_rows >= BULK_FILE_ROWS:
+                    if writer is not None:
+                        writer.close()
+                    files.append(f"{prefix}/part-{len(files):05d}.parquet")
+                    writer = pq.ParquetWriter(f"{BULK_S3_BUCKET}/{files[-1]}", schema, filesystem=s3)
+                    file_rows = 0
+                writer.write_table(self._arrow_table(columns, schema, dim))
+                rows += n
+                file_rows += n
+        finally:
+            if writer is not None:
+                writer.close()
+
+        # paths are relative to the bucket Milvus is configured with
+        task_ids = [
+            utility.do_bulk_insert(collection_name=self.collection_name, files=[path], using=MILVUS_ALIAS)
+            for path in files
+        ]
+        _wait_for_imports(self.collection_name, task_ids)
+        self.coll.load()
+        return rows
+
+    def flush(self) -> None:
+        self.coll.flush()
+
+    def count(self) -> int:
+        # live rows; num_entities still counts deleted and upserted-over rows until compaction
+        res = self.coll.query(expr="", output_fields=["count(*)"])
+        return int(res[0]["count(*)"]) if res else 0
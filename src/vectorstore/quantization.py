@@ -0,0 +1,317 @@
+from __future__ import annotations
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Compressed in-memory codes for the local backend. The float32 vectors stay
+# on disk (mmapped); search scores the codes, then re-scores the best
+# top_k * RESCORE_FACTOR rows with the exact float32 vectors.
+#   none  4 * dim bytes/vector in RAM (faiss flat or numpy over the memmap)
+#   sq8   dim bytes/vector, int8 per dimension with a per-dimension scale
+#   pq    PQ_M bytes/vector, product quantization (codebooks trained with faiss)
+QUANTIZATION = os.getenv("LAW_MATE_LOCAL_QUANTIZATION", "none").lower()
+PQ_M = int(os.getenv("LAW_MATE_PQ_M", "48"))  # sub-quantizers, must divide dim
+RESCORE_FACTOR = int(os.getenv("LAW_MATE_RESCORE_FACTOR", "8"))
+TRAIN_SAMPLE = 65536
+MIN_TRAIN_ROWS = 1024  # below this exact search is cheap anyway
+SCORE_BLOCK = 65536  # rows decoded per step, bounds the temporary float32 copy
+PQ_ENCODE_BLOCK = 1024  # rows per step; the (rows, m, 256) distance table is the big temporary
+
+try:
+    import faiss  # only needed to train PQ codebooks
+except ImportError:
+    faiss = None
+
+
+class Codec(ABC):
+    kind: str
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    @property
+    @abstractmethod
+    def code_size(self) -> int:
+        ...
+
+    @abstractmethod
+    def train(self, sample: np.ndarray) -> None:
+        ...
+
+    @abstractmethod
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def _score_block(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def save(self, path: Path) -> None:
+        ...
+
+    @abstractmethod
+    def load(self, path: Path) -> None:
+        ...
+
+    def encode_all(self, vectors: np.ndarray) -> np.ndarray:
+        # blockwise, so a memmap is never copied into RAM as float32 in one piece
+        parts = [self.encode(np.asarray(vectors[i:i + SCORE_BLOCK])) for i in range(0, len(vectors), SCORE_BLOCK)]
+        return np.concatenate(parts) if parts else self.encode(np.zeros((0, self.dim), dtype=np.float32))
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # approximate inner products, shape (n_queries, n_codes)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for i in range(0, len(codes), SCORE_BLOCK):
+            out[:, i:i + SCORE_BLOCK] = self._score_block(queries, codes[i:i + SCORE_BLOCK])
+        return out
+
+
+class ScalarQuantizer8(Codec):
+    kind = "sq8"
+
+    def __init__(self, dim: int) -> None:
+        super().__init__(dim)
+        self.scale = np.ones(dim, dtype=np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return self.dim
+
+    def train(self, sample: np.ndarray) -> None:
+        # symmetric range per dimension; unit vectors keep every component in [-1, 1]
+        self.scale = np.maximum(np.abs(sample).max(axis=0), 1e-6).astype(np.float32) / 127.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def _score_block(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        return (queries * self.scale) @ codes.astype(np.float32).T
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.save(f, self.scale)
+
+    def load(self, path: Path) -> None:
+        self.scale = np.load(path)
+
+
+class ProductQuantizer(Codec):
+    kind = "pq"
+
+    def __init__(self, dim: int, m: int = PQ_M) -> None:
+        if dim % m:
+            raise ValueError(f"LAW_MATE_PQ_M={m} does not divide dim={dim}")
+        super().__init__(dim)
+        self.m = m
+        self.dsub = dim // m
+        self.centroids = np.zeros((m, 256, self.dsub), dtype=np.float32)
+
+    @property
+    def code_size(self) -> int:
+        return self.m
+
+    def train(self, sample: np.ndarray) -> None:
+        pq = faiss.ProductQuantizer(self.dim, self.m, 8)
+        pq.verbose = False
+        pq.train(np.ascontiguousarray(sample, dtype=np.float32))
+        self.centroids = faiss.vector_to_array(pq.centroids).reshape(self.m, 256, self.dsub)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        sq_norms = (self.centroids ** 2).sum(axis=2)  # (m, 256)
+        for i in range(0, len(vectors), PQ_ENCODE_BLOCK):
+            sub = np.asarray(vectors[i:i + PQ_ENCODE_BLOCK], dtype=np.float32).reshape(-1, self.m, self.dsub)
+            # nearest centroid per sub-vector: argmin |x - c|^2 == argmax (x.c - |c|^2 / 2)
+            dots = np.einsum("nmd,mkd->nmk", sub, self.centroids)
+            codes[i:i + PQ_ENCODE_BLOCK] = np.argmax(dots - sq_norms / 2, axis=2)
+        return codes
+
+    def _score_block(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # asymmetric distance: per query a (m, 256) table of sub-vector inner
+        # products, summed over each row's codes
+        tables = np.einsum("qmd,mkd->qmk", queries.reshape(-1, self.m, self.dsub), self.centroids)
+        cols = np.ascontiguousarray(codes.T)  # one contiguous 256-entry lookup per sub-quantizer
+        out = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for qi, table in enumerate(tables):
+            for j in range(self.m):
+                out[qi] += table[j].take(cols[j])
+        return out
+
+    def save(self, path: Path) -> None:
+        with open(path, "wb") as f:
+            np.save(f, self.centroids)
+
+    def load(self, path: Path) -> None:
+        self.centroids = np.load(path)
+        self.m, _, self.dsub = self.centroids.shape
+
+
+def make_codec(kind: str, dim: int, pq_m: int = PQ_M) -> Optional[Codec]:
+    if kind == "none":
+        return None
+    if kind == "sq8":
+        return ScalarQuantizer8(dim)
+    if kind == "pq":
+        if faiss is None:
+            raise ValueError("LAW_MATE_LOCAL_QUANTIZATION=pq needs faiss to train codebooks; install faiss-cpu or use sq8")
+        return ProductQuantizer(dim, pq_m)
+    raise ValueError(f"Unknown LAW_MATE_LOCAL_QUANTIZATION={kind!r}")
+
+
+def codec_filename(codec: Codec) -> str:
+    suffix = f"{codec.kind}{codec.code_size}" if codec.kind == "pq" else codec.kind
+    return f"codec-{suffix}.npy"
+
+
+def rescore(
+    query: np.ndarray,
+    approx: np.ndarray,
+    row_ids: np.ndarray,
+    k: int,
+    shortlist: int,
+    vectors: np.ndarray,
+) -> List[Tuple[int, float]]:
+    # best `shortlist` rows by approximate score, re-ranked by exact inner
+    # product against the float32 vectors; returns the top k (row_id, score)
+    shortlist = min(shortlist, len(approx))
+    top = np.argpartition(-approx, shortlist - 1)[:shortlist]
+    ids = np.sort(row_ids[top])  # ascending, so the memmap is read front to back
+    exact = np.asarray(vectors[ids]) @ query
+    best = np.argsort(-exact)[:k]
+    return [(int(ids[i]), float(exact[i])) for i in best]
+
+
+def evaluate_codec(
+    codec: Codec,
+    vectors: np.ndarray,
+    live_rows: np.ndarray,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int,
+    rescore_factors: List[int],
+) -> Dict[str, Any]:
+    import time
+
+    from src.utils.stats import latency_summary
+
+    rng = np.random.default_rng(0)
+    sample = live_rows if len(live_rows) <= TRAIN_SAMPLE else np.sort(rng.choice(live_rows, TRAIN_SAMPLE, replace=False))
+    t0 = time.perf_counter()
+    codec.train(np.asarray(vectors[sample]))
+    codes = codec.encode_all(vectors[live_rows])
+    build_s = time.perf_counter() - t0
+
+    approx_recall: List[float] = []
+    by_factor: Dict[int, Dict[str, List[float]]] = {f: {"recall": [], "latency": []} for f in rescore_factors}
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        approx = codec.scores(q[None, :], codes)[0]
+        score_s = time.perf_counter() - t0
+        top = np.argpartition(-approx, k - 1)[:k]
+        approx_recall.append(len(set(live_rows[top].tolist()) & expected) / k)
+        for factor in rescore_factors:
+            t1 = time.perf_counter()
+            hits = rescore(q, approx, live_rows, k, k * factor, vectors)
+            by_factor[factor]["latency"].append(score_s + time.perf_counter() - t1)
+            by_factor[factor]["recall"].append(len({row for row, _ in hits} & expected) / k)
+
+    return {
+        "bytes_per_vector": codec.code_size,
+        "codes_mb": round(codes.nbytes / 2**20, 2),
+        "build_s": round(build_s, 2),
+        f"recall@{k}_no_rescore": round(float(np.mean(approx_recall)), 4),
+        "rescored": {
+            f: {f"recall@{k}": round(float(np.mean(v["recall"])), 4), **latency_summary(v["latency"])}
+            for f, v in by_factor.items()
+        },
+    }
+
+
+def report(
+    root: Optional[str] = None,
+    *,
+    n_queries: int = 200,
+    k: int = 10,
+    pq_ms: Optional[List[int]] = None,
+    rescore_factors: Optional[List[int]] = None,
+    project_rows: int = 0,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    # memory vs recall@k against exact float32 search, on the vectors of a local store
+    from src.vectorstore.local_store import LOCAL_STORE_DIR, LocalVectorStore
+
+    store = LocalVectorStore(root or LOCAL_STORE_DIR, quantization="none", use_faiss=False)
+    with store._lock, store._conn() as conn:
+        store._refresh(conn)
+    vectors, live_rows = store._mat, store._live_rows
+    if len(live_rows) <= k:
+        raise RuntimeError(f"Need more than k={k} vectors, found {len(live_rows)}")
+
+    rng = np.random.default_rng(seed)
+    queries = np.asarray(vectors[np.sort(rng.choice(live_rows, size=min(n_queries, len(live_rows)), replace=False))])
+    # exact float32 top k, blockwise over the memmap
+    exact = np.concatenate([
+        queries @ np.asarray(vectors[live_rows[i:i + SCORE_BLOCK]]).T for i in range(0, len(live_rows), SCORE_BLOCK)
+    ], axis=1)
+    truth = [set(live_rows[np.argpartition(-row, k - 1)[:k]].tolist()) for row in exact]
+
+    n = project_rows or len(live_rows)
+    results: Dict[str, Any] = {
+        "vectors": int(len(live_rows)),
+        "dim": store.dim,
+        "projected_rows": n,
+        "none": {"bytes_per_vector": 4 * store.dim, "projected_mb": round(n * 4 * store.dim / 2**20, 1), f"recall@{k}": 1.0},
+    }
+    codecs: List[Codec] = [ScalarQuantizer8(store.dim)]
+    if faiss is not None:
+        codecs += [ProductQuantizer(store.dim, m) for m in (pq_ms or [24, 48, 96]) if store.dim % m == 0]
+    for codec in codecs:
+        name = codec_filename(codec)[len("codec-"):-len(".npy")]
+        row = evaluate_codec(codec, vectors, live_rows, queries, truth, k, rescore_factors or [1, 2, 4, 8])
+        row["projected_mb"] = round(n * codec.code_size / 2**20, 1)
+        results[name] = row
+        rescored = ", ".join(
+            f"x{f}: {r[f'recall@{k}']:.3f} ({r['p50_ms']:.1f} ms)" for f, r in row["rescored"].items()
+        )
+        print(
+            f"[quantize] {name:<6} {codec.code_size:>4} B/vec  {row['projected_mb']:>8} MB @ {n} rows  "
+            f"recall@{k} raw={row[f'recall@{k}_no_rescore']:.3f}  rescored {rescored}"
+        )
+    print(f"[quantize] none   {4 * store.dim:>4} B/vec  {results['none']['projected_mb']:>8} MB @ {n} rows  recall@{k}=1.000")
+    return results
+
+
+def main() -> None:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Memory vs recall of sq8 / PQ codes on a local vector store")
+    parser.add_argument("--store", default=None, help="local store directory (default LAW_MATE_LOCAL_STORE_DIR)")
+    parser.add_argument("--queries", type=int, default=200, help="stored vectors used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-m", type=int, action="append", help="PQ sub-quantizer counts to try (repeatable)")
+    parser.add_argument("--rescore", type=int, action="append", help="rescore factors to try (repeatable)")
+    parser.add_argument("--project-rows", type=int, default=0, help="report RAM for this many vectors")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write the JSON report here")
+    args = parser.parse_args()
+
+    results = report(
+        args.store,
+        n_queries=args.queries,
+        k=args.k,
+        pq_ms=args.pq_m,
+        rescore_factors=args.rescore,
+        project_rows=args.project_rows,
+        seed=args.seed,
+    )
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
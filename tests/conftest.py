@@ -0,0 +1,54 @@
+from __future__ import annotations
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The src modules read their data paths from the environment at import time;
+# point every default under a throwaway directory before any of them loads.
+_DATA = Path(tempfile.mkdtemp(prefix="lawmate-tests-"))
+for var, name in {
+    "LAW_MATE_VECTOR_BACKEND": None,
+    "LAW_MATE_CITATION_INDEX_DB": "citation_index.db",
+    "LAW_MATE_RETRIEVAL_CACHE_DB": "retrieval_cache.db",
+    "LAW_MATE_CHUNK_STORE_DIR": "chunk_store",
+    "LAW_MATE_LOCAL_STORE_DIR": "vectorstore",
+    "LAW_MATE_LOCAL_SECTION_STORE_DIR": "vectorstore_sections",
+    "LAW_MATE_INDEX_VERSION_FILE": "index_version",
+    "LAW_MATE_INDEX_CONFIG": "index_config.json",
+    "LAW_MATE_ONNX_DIR": "onnx",
+}.items():
+    os.environ.setdefault(var, "local" if name is None else str(_DATA / name))
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+CORPUS = ROOT / "benchmarks" / "data" / "corpus.jsonl"
+
+
+@pytest.fixture
+def stub_models():
+    from benchmarks import stubs
+
+    stubs.install_stub_models()
+    yield
+    from src.pipelines import embedder
+    from src.retrieval import ranker
+
+    embedder._model = None
+    ranker._cross_encoder = None
+
+
+@pytest.fixture
+def local_index(tmp_path, stub_models):
+    # the benchmark corpus in fresh local stores, installed as the process-wide ones
+    from benchmarks import stubs
+    from src.vectorstore import chunk_store, factory
+
+    n, _ = stubs.build_local_index(CORPUS, tmp_path / "index")
+    yield n
+    factory._store = None
+    factory._section_store = None
+    chunk_store._chunk_store = None
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+from src.api.concurrency import AdmissionController, Overloaded
+
+
+def test_slots_cap_in_flight_and_release_once():
+    admission = AdmissionController(max_in_flight=1)
+    slot = admission.acquire()
+    with pytest.raises(Overloaded):
+        admission.acquire()
+    slot.release()
+    slot.release()
+    assert admission.in_flight == 0
+
+
+def _scope():
+    return {"type": "http", "method": "POST", "path": "/", "headers": [], "asgi": {"spec_version": "2.4"}}
+
+
+async def _disconnected():
+    return {"type": "http.disconnect"}
+
+
+def test_streamed_slot_released_when_body_never_starts():
+    from src.api.main import AdmittedStreamingResponse
+
+    admission = AdmissionController(max_in_flight=4)
+    started = False
+
+    async def body():
+        nonlocal started
+        started = True
+        yield "never sent"
+
+    async def send(message):
+        # the client is gone before the headers go out
+        raise OSError("connection reset")
+
+    response = AdmittedStreamingResponse(body(), admission.acquire())
+    with pytest.raises(Exception):
+        asyncio.run(response(_scope(), _disconnected, send))
+    assert not started
+    assert admission.in_flight == 0
+
+
+def test_streamed_slot_released_after_full_body():
+    from src.api.main import AdmittedStreamingResponse
+
+    admission = AdmissionController(max_in_flight=4)
+    sent = []
+
+    async def body():
+        assert admission.in_flight == 1
+        yield "a"
+        yield "b"
+
+    async def send(message):
+        sent.append(message)
+
+    response = AdmittedStreamingResponse(body(), admission.acquire())
+    asyncio.run(response(_scope(), _disconnected, send))
+    assert b"".join(m.get("body", b"") for m in sent) == b"ab"
+    assert admission.in_flight == 0
+
+
+def test_ask_batch_releases_its_slot(local_index):
+    from fastapi.testclient import TestClient
+
+    from benchmarks import stubs
+    from src.api import main
+
+    from src.llm import client as llm_client
+
+    stubs.install_fake_llm(tokens_per_s=2000, prefill_s=0.0)
+    try:
+        resp = TestClient(main.app).post(
+            "/ask_batch", json={"questions": ["powers of the special police establishment", "penalty for contravention"]}
+        )
+    finally:
+        llm_client._async_client = None
+    assert resp.status_code == 200
+    lines = [line for line in resp.text.splitlines() if line]
+    assert len(lines) == 2
+    assert main.admission.in_flight == 0
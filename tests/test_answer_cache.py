@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.llm.answer_cache import AnswerCache, citation_signature
+from src.llm.answerer import LLMAnswer
+from src.vectorstore.index_version import bump_index_version
+
+PARAMS = "top_k=20"
+
+
+def _vec(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(384).astype(np.float32)
+
+
+def test_near_duplicate_question_is_served():
+    cache = AnswerCache(max_entries=16, similarity_threshold=0.97)
+    q = "What does Section 3 of the Essential Commodities Act say?"
+    vec = _vec(1)
+    cache.put(q, ["c1"], PARAMS, LLMAnswer(answer="s3", citations=[]), query_vector=vec)
+
+    hit = cache.get_similar("what does section 3 of the essential commodities act say", vec + 0.01, PARAMS)
+    assert hit is not None and hit.answer == "s3"
+    assert cache.get_similar(q, vec, "top_k=5") is None
+
+
+def test_different_section_is_never_a_semantic_hit():
+    cache = AnswerCache(max_entries=16, similarity_threshold=0.97)
+    vec = _vec(2)
+    cache.put("What does Section 3 of the Essential Commodities Act say?", ["c1"], PARAMS,
+              LLMAnswer(answer="s3", citations=[]), query_vector=vec)
+
+    # identical embedding, different citation
+    assert cache.get_similar("What does Section 4 of the Essential Commodities Act say?", vec, PARAMS) is None
+    assert cache.get_similar("What does Section 3 of the Essential Commodities Act, 1956 say?", vec, PARAMS) is None
+
+
+def test_signature_tracks_sections_and_numbers():
+    assert citation_signature("Section 3(1A) of Act 10 of 1955") != citation_signature("Section 3 of Act 10 of 1955")
+    assert citation_signature("penalty for hoarding") == citation_signature("Penalty for hoarding?")
+
+
+def test_index_version_bump_drops_entries(tmp_path):
+    cache = AnswerCache(max_entries=16, disk_path=tmp_path / "answers.db")
+    q = "who may constitute the special police establishment"
+    cache.put(q, ["c1"], PARAMS, LLMAnswer(answer="cg", citations=[]), query_vector=_vec(3))
+    assert cache.get_exact(q, ["c1"], PARAMS) is not None
+
+    bump_index_version()
+    assert cache.get_exact(q, ["c1"], PARAMS) is None
+    assert cache.get_similar(q, _vec(3), PARAMS) is None
+
+
+def test_ask_works_with_the_citation_index_disabled(local_index, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from benchmarks import stubs
+    from src.api import main
+    from src.llm import client as llm_client
+    from src.retrieval import citation_index
+
+    monkeypatch.setattr(citation_index, "_citation_index", citation_index.CitationIndex(None))
+    monkeypatch.setattr(main, "answer_cache", AnswerCache(max_entries=16, similarity_threshold=0.97))
+    assert citation_signature("Section 3 of the Essential Commodities Act")
+
+    stubs.install_fake_llm(tokens_per_s=5000, prefill_s=0.0)
+    try:
+        client = TestClient(main.app)
+        payload = {"question": "What does section 3 of the Essential Commodities Act allow?"}
+        first = client.post("/ask", json=payload)
+        second = client.post("/ask", json=payload)
+    finally:
+        llm_client._async_client = None
+    assert first.status_code == 200 and second.status_code == 200
+    assert second.json() == first.json()
+    assert main.answer_cache.counters["exact_hits"] + main.answer_cache.counters["semantic_hits"] == 1
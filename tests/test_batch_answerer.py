@@ -0,0 +1,26 @@
+from __future__ import annotations
+import json
+
+
+def test_batch_larger_than_the_llm_queue_is_fully_answered(local_index, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from benchmarks import stubs
+    from src.api import main
+    from src.llm import client as llm_client
+
+    monkeypatch.setattr(main.llm_scheduler, "queue_size", 4)
+    completed = main.llm_scheduler.counters["completed"]
+    questions = [f"powers of the special police establishment {i}" for i in range(12)]
+
+    stubs.install_fake_llm(tokens_per_s=5000, prefill_s=0.0)
+    try:
+        resp = TestClient(main.app).post("/ask_batch", json={"questions": questions})
+    finally:
+        llm_client._async_client = None
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert sorted(line["index"] for line in lines) == list(range(len(questions)))
+    assert all(line["error"] is None and line["answer"]["answer"] for line in lines)
+    # every question went through the scheduler, none was rejected for capacity
+    assert main.llm_scheduler.counters["completed"] - completed == len(questions)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from src.retrieval import citation_index
+from src.retrieval.citation_index import CitationIndex, act_aliases, cited_chunks, parse_section_refs
+from src.vectorstore.base import SearchFilter
+
+ECA_TEXT = """1. Short title and extent.
+This Act may be called the Essential Commodities Act, 1955.
+
+2. Definitions.
+In this Act, unless the context otherwise requires, essential commodity means a commodity specified in the Schedule.
+
+3. Powers to control production, supply, distribution, etc., of essential commodities.
+If the Central Government is of opinion that it is necessary so to do, it may by order provide for regulating production."""
+
+
+@pytest.mark.parametrize(
+    "question, refs",
+    [
+        ("What does Section 2(1A) say?", ["2(1A)"]),
+        ("Explain sections 3, 5 and 6A", ["3", "5", "6A"]),
+        ("arrested u/s 41 and s. 41 again", ["41"]),
+        ("Sec. 2 ( 1a ) of the Act", ["2(1A)"]),
+        ("the second schedule lists 12 items", []),
+    ],
+)
+def test_section_refs(question, refs):
+    assert parse_section_refs(question) == refs
+
+
+def test_act_aliases():
+    aliases = act_aliases("The Essential Commodities Act, 1955", "010")
+    assert aliases == {
+        "essential commodities act 1955",
+        "essential commodities act",
+        "act 10 of 1955",
+        "act no 10 of 1955",
+    }
+    assert act_aliases("") == set()
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    idx = CitationIndex(tmp_path / "citations.db")
+    monkeypatch.setattr(citation_index, "_citation_index", idx)
+    return idx
+
+
+def test_lookup_needs_act_and_section_and_falls_back_to_the_section(index):
+    index.put_doc("eca", act_aliases("Essential Commodities Act, 1955"), [("2", 1, "eca-2-1"), ("2", 0, "eca-2-0"), ("3", 0, "eca-3-0")])
+    index.put_doc("other", act_aliases("Other Act, 1955"), [("2", 0, "other-2-0")])
+
+    assert index.lookup("Section 2 of the Essential Commodities Act") == ["eca-2-0", "eca-2-1"]
+    assert index.lookup("What is section 3(2) of the essential commodities act, 1955?") == ["eca-3-0"]
+    assert index.lookup("What is section 2?") == []
+    assert index.lookup("What does the Essential Commodities Act say?") == []
+    assert index.lookup("Section 2 of the Essential Commodities Act", doc_ids=["other"]) == []
+
+    index.delete_doc("eca")
+    assert index.lookup("Section 2 of the Essential Commodities Act") == []
+
+
+def test_cited_chunks_are_hydrated(local_index, index):
+    index.put_doc("eca-1955", act_aliases("Essential Commodities Act, 1955"), [("3", 0, "eca-1955-3-0")])
+
+    chunks = cited_chunks("What does section 3 of the Essential Commodities Act allow?")
+    assert [(c["doc_id"], c["section_id"]) for c in chunks] == [("eca-1955", "3")]
+    assert chunks[0]["text"]
+    # filters the index cannot check turn the fast path off
+    assert cited_chunks("section 3 of the Essential Commodities Act", SearchFilter(section_id_prefix="3")) == []
+
+
+def test_indexer_publishes_citations_only_after_the_chunks_are_written(tmp_path, stub_models, index, monkeypatch):
+    from src.pipelines import indexer
+    from src.pipelines.preprocessor import ExtractedTextData
+    from src.vectorstore.chunk_store import ChunkTextStore
+    from src.vectorstore.local_store import LocalVectorStore
+
+    monkeypatch.setattr(indexer, "SECTION_INDEX", False)
+    monkeypatch.setattr(indexer, "_act_metadata", {
+        "eca": {"act_title": "The Essential Commodities Act, 1955", "act_number": "10", "enactment_date_raw": "1955-04-01"},
+    })
+    doc = ExtractedTextData(doc_id="eca", text_by_page={1: ECA_TEXT}, full_text=ECA_TEXT, source_path="eca.txt")
+    chunks = ChunkTextStore(tmp_path / "chunks")
+    writer = indexer.VectorBatchWriter(LocalVectorStore(tmp_path / "vectors"), chunk_store=chunks)
+
+    assert indexer.index_document(doc, diff=False, writer=writer) > 0
+    # still buffered: nothing may point at chunks that are not stored yet
+    assert index.lookup("section 2 of the Essential Commodities Act") == []
+
+    writer.close()
+    ids = index.lookup("section 2 of act 10 of 1955")
+    assert ids and set(chunks.get_many(ids)) == set(ids)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+from src.llm import client
+from src.llm.answerer import answer_with_llm
+from src.llm.fake_client import FakeOllamaClient, FakeOllamaSyncClient
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    monkeypatch.setattr(client, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(client, "_client", None)
+    monkeypatch.setattr(client, "_async_client", None)
+    yield
+
+
+def test_both_factories_follow_the_fake_backend(fake_backend):
+    assert isinstance(client.get_client(), FakeOllamaSyncClient)
+    assert isinstance(client.get_async_client(), FakeOllamaClient)
+    assert client.get_client() is client.get_client()
+
+
+def test_sync_answer_runs_without_ollama(fake_backend):
+    fake = client.get_client()
+    fake.tokens_per_s, fake.prefill_s = 10_000, 0.0
+    chunk = {
+        "chunk_id": "a-1-0", "doc_id": "a", "section_id": "1", "section_heading": "Short title",
+        "page_start": 1, "page_end": 1, "chunk_index": 0, "text": "This Act may be called the Test Act.",
+    }
+    answer = answer_with_llm("what is the short title", [chunk])
+    assert answer.answer
+    assert [c.section_id for c in answer.citations] == ["1"]
+
+
+def test_fake_clients_stream_the_same_reply(fake_backend):
+    sync = FakeOllamaSyncClient(tokens_per_s=0, prefill_s=0)
+    parts = list(sync.chat("m", [{"role": "user", "content": "q"}], stream=True))
+    assert "".join(p["message"]["content"] for p in parts) == sync.reply
+    assert parts[-1]["done"]
+
+    async def collect():
+        stream = await FakeOllamaClient(tokens_per_s=0, prefill_s=0).chat("m", [{"role": "user", "content": "q"}], stream=True)
+        return "".join([p["message"]["content"] async for p in stream])
+
+    assert asyncio.run(collect()) == sync.reply
+
+
+def test_unknown_backend_is_a_config_error(monkeypatch):
+    monkeypatch.setattr(client, "LLM_BACKEND", "vllm")
+    monkeypatch.setattr(client, "_client", None)
+    with pytest.raises(ValueError, match="LAW_MATE_LLM_BACKEND"):
+        client.get_client()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from src.llm.answerer import assemble_context, merge_adjacent_chunks
+
+OVERLAP = "the Central Government may by notification in the Official Gazette"
+
+
+def _chunk(doc: str, section: str, idx: int, text: str, score: float, page: int = 1):
+    return {
+        "chunk_id": f"{doc}-{section}-{idx}",
+        "doc_id": doc,
+        "section_id": section,
+        "chunk_index": idx,
+        "text": text,
+        "score": score,
+        "page_start": page,
+        "page_end": page,
+    }
+
+
+def test_neighbours_merge_and_overlap_is_cut_once():
+    first = f"Power to make rules. {OVERLAP}"
+    second = f"{OVERLAP} make rules for carrying out the purposes of this Act."
+    blocks, removed = merge_adjacent_chunks([
+        _chunk("a", "5", 1, second, 0.4, page=3),
+        _chunk("a", "5", 0, first, 0.9, page=2),
+    ])
+    assert len(blocks) == 1
+    assert blocks[0]["text"].count(OVERLAP) == 1
+    assert removed == len(OVERLAP)
+    assert (blocks[0]["page_start"], blocks[0]["page_end"]) == (2, 3)
+    assert blocks[0]["rank_score"] == 0.9
+
+
+def test_gaps_sections_and_docs_stay_apart():
+    blocks, removed = merge_adjacent_chunks([
+        _chunk("a", "5", 0, "zero", 0.1),
+        _chunk("a", "5", 2, "two", 0.2),
+        _chunk("a", "6", 1, "other section", 0.3),
+        _chunk("b", "5", 1, "other act", 0.4),
+    ])
+    assert removed == 0
+    assert [b["text"] for b in blocks] == ["other act", "other section", "two", "zero"]
+
+
+def test_rerank_score_wins_over_vector_score():
+    blocks, _ = merge_adjacent_chunks([
+        {**_chunk("a", "1", 0, "low vector, high rerank", 0.1), "rerank_score": 5.0},
+        _chunk("a", "2", 0, "high vector", 0.9),
+    ])
+    assert blocks[0]["section_id"] == "1"
+
+
+def test_chunks_without_index_fall_back_to_the_id_suffix():
+    blocks, _ = merge_adjacent_chunks([
+        {"chunk_id": "a-5-0", "doc_id": "a", "section_id": "5", "text": f"head {OVERLAP}", "score": 1.0, "page_start": 1, "page_end": 1},
+        {"chunk_id": "a-5-1", "doc_id": "a", "section_id": "5", "text": f"{OVERLAP} tail", "score": 0.5, "page_start": 1, "page_end": 1},
+    ])
+    assert len(blocks) == 1 and blocks[0]["text"].endswith("tail")
+
+
+def test_budget_drops_lowest_ranked_blocks_first():
+    chunks = [_chunk("a", str(i), 0, "x" * 400, 1.0 - i / 10) for i in range(5)]
+    packed, usage = assemble_context(chunks, token_budget=250)
+    assert [b["section_id"] for b in packed] == ["0", "1"]
+    assert usage.chunks_dropped == 3
+    assert usage.context_tokens <= 250
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.vectorstore import local_store, quantization
+from src.vectorstore.local_store import LocalVectorStore
+from src.vectorstore.quantization import ProductQuantizer, ScalarQuantizer8, make_codec, rescore
+
+K = 10
+
+
+def _unit(mat: np.ndarray) -> np.ndarray:
+    return (mat / np.linalg.norm(mat, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _recall(codec, rows: int = 4000, dim: int = 64, n_queries: int = 20, factor: int = 8) -> float:
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng.standard_normal((rows, dim)))
+    queries = _unit(vectors[:n_queries] + 0.3 * rng.standard_normal((n_queries, dim)))
+    codec.train(vectors)
+    codes = codec.encode_all(vectors)
+    assert codes.shape == (rows, codec.code_size)
+
+    row_ids = np.arange(rows)
+    found = 0
+    for q, approx in zip(queries, codec.scores(queries, codes)):
+        truth = set(np.argsort(-(vectors @ q))[:K].tolist())
+        found += len({r for r, _ in rescore(q, approx, row_ids, K, K * factor, vectors)} & truth)
+    return found / (K * n_queries)
+
+
+def test_sq8_rescored_recall():
+    assert _recall(ScalarQuantizer8(64)) >= 0.98
+
+
+def test_pq_rescored_recall():
+    pytest.importorskip("faiss")
+    assert _recall(ProductQuantizer(64, m=16)) >= 0.9
+
+
+def test_pq_without_faiss_is_a_config_error(monkeypatch):
+    monkeypatch.setattr(quantization, "faiss", None)
+    with pytest.raises(ValueError, match="faiss"):
+        make_codec("pq", 64)
+
+
+def _columns(vectors: np.ndarray):
+    ids = [f"d-{i}-0" for i in range(len(vectors))]
+    return {"chunk_id": ids, "doc_id": ["d"] * len(ids), "section_id": [str(i) for i in range(len(ids))], "embedding": vectors.tolist()}
+
+
+def test_readers_search_exactly_until_flush_writes_the_codebook(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "MIN_TRAIN_ROWS", 64)
+    vectors = _unit(np.random.default_rng(1).standard_normal((200, 16)))
+    writer = LocalVectorStore(tmp_path, dim=16, use_faiss=False, quantization="sq8")
+    writer.insert(_columns(vectors))
+
+    reader = LocalVectorStore(tmp_path, dim=16, use_faiss=False, quantization="sq8")
+    hits = reader.search([vectors[7].tolist()], top_k=3, output_fields=["chunk_id"])[0]
+    assert hits[0]["chunk_id"] == "d-7-0"
+    # the reader neither trained nor wrote a codebook
+    assert not reader.codec_path.exists() and reader._codes is None
+
+    writer.flush()
+    assert writer.codec_path.exists()
+    hits = reader.search([vectors[7].tolist()], top_k=3, output_fields=["chunk_id"])[0]
+    assert hits[0]["chunk_id"] == "d-7-0"
+    assert reader._codes is not None and len(reader._codes) == len(vectors)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.retrieval import ranker
+
+WORDS = ["powers", "of", "the", "central", "government", "police", "establishment", "section", "act", "offence"]
+
+
+@pytest.fixture
+def wordpiece(tmp_path):
+    transformers = pytest.importorskip("transformers")
+    vocab = tmp_path / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *WORDS]) + "\n")
+    return transformers.BertTokenizerFast(vocab_file=str(vocab))
+
+
+class _Model:
+    # what _truncated_passages reads off a CrossEncoder
+    def __init__(self, tokenizer, max_length: int) -> None:
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+
+
+def test_long_query_keeps_half_the_window_for_the_passage(wordpiece):
+    model = _Model(wordpiece, 32)
+    query = " ".join(WORDS * 10)
+    passage = {"chunk_id": "c1", "text": " ".join(WORDS * 5)}
+
+    [(n_tokens, text)] = ranker._truncated_passages(model, query, [passage])
+    assert n_tokens == (32 - 3) // 2
+
+    # the pair still fits: longest_first trims the query
+    enc = wordpiece([query], [text], truncation="longest_first", max_length=32)
+    assert len(enc["input_ids"][0]) == 32
+
+
+def test_short_query_leaves_the_rest_of_the_window(wordpiece):
+    model = _Model(wordpiece, 32)
+    [(n_tokens, _)] = ranker._truncated_passages(model, "police powers", [{"chunk_id": "c2", "text": " ".join(WORDS * 5)}])
+    assert n_tokens == 32 - 3 - 2
+
+
+def test_rerank_orders_by_cross_encoder_score(stub_models):
+    candidates = [
+        {"chunk_id": "a", "text": "definitions of terms used in the act"},
+        {"chunk_id": "b", "text": "powers of the special police establishment"},
+        {"chunk_id": "c", "text": "short title and commencement"},
+    ]
+    out = ranker.rerank_chunks("powers of the special police establishment", candidates, top_k=2)
+    assert [c["chunk_id"] for c in out][0] == "b"
+    assert len(out) == 2
+    assert np.isfinite([c["rerank_score"] for c in out]).all()
+
+
+@pytest.fixture
+def tiny_checkpoint(tmp_path, wordpiece, monkeypatch):
+    # a 2-layer BERT cross-encoder with random weights, big enough to give spread-out scores
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+    import transformers
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=wordpiece.vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=64, num_labels=1, initializer_range=0.5,
+    )
+    path = tmp_path / "tiny-cross-encoder"
+    transformers.BertForSequenceClassification(config).eval().save_pretrained(path)
+    wordpiece.model_max_length = 64
+    wordpiece.save_pretrained(path)
+    monkeypatch.setattr(ranker, "ONNX_DIR", tmp_path / "onnx")
+    return str(path)
+
+
+def _onnx_and_torch_scores(checkpoint: str, quantize: bool):
+    from sentence_transformers import CrossEncoder
+
+    onnx_model = ranker.OnnxCrossEncoder(checkpoint, quantize=quantize)
+    torch_model = CrossEncoder(checkpoint)
+    # a query longer than the window, and passages of every length: exercises
+    # truncation, length-sorted batches and padding
+    query = " ".join(WORDS * 8)
+    candidates = [{"chunk_id": f"c{i}", "text": " ".join(WORDS[i:] * (i + 1))} for i in range(len(WORDS))]
+    return (
+        onnx_model,
+        ranker.score_with_model(onnx_model, query, candidates, batch_size=3),
+        ranker.score_with_model(torch_model, query, candidates, batch_size=3),
+    )
+
+
+def test_onnx_export_scores_like_torch(tiny_checkpoint):
+    model, onnx_scores, torch_scores = _onnx_and_torch_scores(tiny_checkpoint, quantize=False)
+    assert model.model_path.name == "model.onnx"
+    # sigmoid applied: probabilities, and spread out enough for the comparison to mean something
+    assert ((onnx_scores > 0) & (onnx_scores < 1)).all() and np.ptp(torch_scores) > 0.05
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=1e-4)
+
+    pairs = [("police powers", "section of the act"), ("offence", "the central government")]
+    np.testing.assert_allclose(model.predict(pairs, batch_size=1), model._run(*map(list, zip(*pairs))), atol=1e-6)
+
+
+def test_int8_onnx_stays_close_to_torch(tiny_checkpoint):
+    model, onnx_scores, torch_scores = _onnx_and_torch_scores(tiny_checkpoint, quantize=True)
+    assert model.model_path.name == "model.int8.onnx"
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=0.15)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.retrieval import hybrid_retriever, retrieval_cache
+from src.retrieval.retrieval_cache import RetrievalCache
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_import_creates_no_files(tmp_path):
+    env = {**os.environ, "LAW_MATE_RETRIEVAL_CACHE_DB": str(tmp_path / "sub" / "cache.db")}
+    subprocess.run([sys.executable, "-c", "import src.retrieval.retrieval_cache"], cwd=ROOT, env=env, check=True)
+    assert not (tmp_path / "sub").exists()
+
+
+def test_candidates_round_trip_and_rerank_scores(tmp_path):
+    cache = RetrievalCache(tmp_path / "cache.db")
+    assert not (tmp_path / "cache.db").exists()
+    assert cache.get("q", 10) is None
+
+    cache.put_candidates("q", 10, None, [{"chunk_id": "a", "score": 0.9}, {"chunk_id": "b", "score": 0.5}])
+    cache.put_rerank_scores("q", 10, None, {"a": 2.0})
+    entry = cache.get("  Q ", 10)
+    assert entry.candidates == [("a", 0.9), ("b", 0.5)]
+    assert entry.rerank_scores == {"a": 2.0}
+    assert cache.get("q", 20) is None
+
+
+def test_key_covers_coarse_to_fine_settings(monkeypatch):
+    before = RetrievalCache.key("q", 10, None, "v1")
+    monkeypatch.setattr(retrieval_cache, "SECTION_TOP_K", hybrid_retriever.SECTION_TOP_K + 1)
+    assert RetrievalCache.key("q", 10, None, "v1") != before
+    monkeypatch.undo()
+    monkeypatch.setattr(retrieval_cache, "COARSE_TO_FINE", not hybrid_retriever.COARSE_TO_FINE)
+    assert RetrievalCache.key("q", 10, None, "v1") != before
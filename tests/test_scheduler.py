@@ -0,0 +1,167 @@
+from __future__ import annotations
+import asyncio
+
+import pytest
+
+from src.api.concurrency import Overloaded
+from src.llm import scheduler
+from src.llm.scheduler import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    ClientDisconnected,
+    DeadlineExceeded,
+    LLMScheduler,
+    cancel_on_disconnect,
+)
+
+
+async def _serve_in_order(sched: LLMScheduler, requests):
+    # one generation holds the only slot while the rest queue up, then they drain
+    order = []
+    gate = asyncio.Event()
+
+    async def job(name: str) -> None:
+        await gate.wait()
+        order.append(name)
+
+    first = asyncio.create_task(sched.run(job, "first"))
+    await asyncio.sleep(0)
+    waiters = []
+    for name, priority in requests:
+        waiters.append(asyncio.create_task(sched.run(job, name, priority=priority)))
+        await asyncio.sleep(0.001)
+    gate.set()
+    await asyncio.gather(first, *waiters)
+    return order
+
+
+def test_fifo_within_a_priority_level():
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        return await _serve_in_order(sched, [("a", PRIORITY_NORMAL), ("b", PRIORITY_NORMAL), ("c", PRIORITY_NORMAL)])
+
+    assert asyncio.run(main()) == ["first", "a", "b", "c"]
+
+
+def test_higher_priority_overtakes_recent_lower_priority(monkeypatch):
+    monkeypatch.setattr(scheduler, "PRIORITY_STEP_S", 10.0)
+
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        return await _serve_in_order(sched, [("low", PRIORITY_LOW), ("normal", PRIORITY_NORMAL), ("high", PRIORITY_HIGH)])
+
+    assert asyncio.run(main()) == ["first", "high", "normal", "low"]
+
+
+def test_low_priority_does_not_starve(monkeypatch):
+    # an old low-priority request beats a normal one that arrived a step later
+    monkeypatch.setattr(scheduler, "PRIORITY_STEP_S", 0.0005)
+
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        return await _serve_in_order(sched, [("low", PRIORITY_LOW), ("normal", PRIORITY_NORMAL)])
+
+    assert asyncio.run(main()) == ["first", "low", "normal"]
+
+
+def test_deadline_expires_in_the_queue_and_frees_nothing_it_did_not_hold():
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        release = asyncio.Event()
+        holder = asyncio.create_task(sched.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await sched.run(asyncio.sleep, 0, deadline_s=0.02)
+        assert sched.queued == 0 and sched.in_flight == 1
+        release.set()
+        await holder
+        return sched
+
+    sched = asyncio.run(main())
+    assert sched.in_flight == 0
+    assert sched.counters["expired"] == 1
+
+
+def test_deadline_covers_generation_too():
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        with pytest.raises(DeadlineExceeded) as exc:
+            await sched.run(asyncio.sleep, 1.0, deadline_s=0.02)
+        assert exc.value.status_code == 504
+        return sched
+
+    assert asyncio.run(main()).in_flight == 0
+
+
+def test_full_queue_rejects():
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=1)
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(sched.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await sched.run(release.wait)
+        release.set()
+        await asyncio.gather(*tasks)
+        return sched
+
+    sched = asyncio.run(main())
+    assert sched.counters["rejected"] == 1 and sched.counters["completed"] == 2
+
+
+def test_disconnect_cancels_a_queued_request_and_hands_the_slot_on():
+    async def main():
+        sched = LLMScheduler(max_in_flight=1, queue_size=10)
+        release = asyncio.Event()
+        holder = asyncio.create_task(sched.run(release.wait))
+        await asyncio.sleep(0)
+
+        async def gone() -> bool:
+            return True
+
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(sched.run(asyncio.sleep, 0), gone)
+        assert sched.queued == 0
+
+        release.set()
+        await holder
+        # the slot is free again for the next caller
+        await asyncio.wait_for(sched.run(asyncio.sleep, 0), timeout=1)
+        return sched
+
+    sched = asyncio.run(main())
+    assert sched.in_flight == 0 and sched.counters["cancelled"] == 1
+
+
+def test_stream_deadline_stops_generation(local_index):
+    import json
+    import time
+
+    from fastapi.testclient import TestClient
+
+    from benchmarks import stubs
+    from src.api import main
+    from src.llm import client as llm_client
+
+    fake = stubs.install_fake_llm(tokens_per_s=5, prefill_s=0.0)
+    expired = main.llm_scheduler.counters["expired"]
+    try:
+        t0 = time.perf_counter()
+        resp = TestClient(main.app).post(
+            "/ask/stream", json={"question": "powers of the special police establishment", "deadline_s": 0.5}
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        llm_client._async_client = None
+
+    events = [block.split("\n", 1) for block in resp.text.strip().split("\n\n")]
+    names = [e[0].removeprefix("event: ") for e in events]
+    assert names[0] == "citations" and names[-1] == "error" and "done" not in names
+    error = json.loads(events[-1][1].removeprefix("data: "))
+    assert error["reason"] == "deadline"
+    assert 0 < names.count("token") < len(fake._tokens())
+    # the Ollama stream was closed, long before the full reply would have taken
+    assert fake.cancelled == 1 and elapsed < len(fake._tokens()) / fake.tokens_per_s / 2
+    assert main.llm_scheduler.in_flight == 0
+    assert main.llm_scheduler.counters["expired"] == expired + 1
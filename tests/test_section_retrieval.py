@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.vectorstore.base import CHUNK_FIELDS, SearchFilter
+from src.vectorstore.local_store import LocalVectorStore
+
+DIM = 8
+
+
+def _columns(rows):
+    rng = np.random.default_rng(0)
+    cols = {name: [] for name in CHUNK_FIELDS}
+    for doc_id, section_id, idx in rows:
+        row = {
+            "chunk_id": f"{doc_id}-{section_id}-{idx}", "doc_id": doc_id, "section_id": section_id,
+            "section_heading": "", "part": "", "chapter": "", "page_start": 1, "page_end": 1,
+            "chunk_index": idx, "text": "", "content_hash": "", "ministry_slug": "", "act_title": "",
+            "enactment_date": 0, "embedding": rng.standard_normal(DIM).tolist(),
+        }
+        for name in CHUNK_FIELDS:
+            cols[name].append(row[name])
+    return cols
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(tmp_path / "vs", dim=DIM, use_faiss=False, quantization="none")
+    store.insert(_columns([(d, s, i) for d in ("a", "b") for s in ("3", "5") for i in range(2)]))
+    return store
+
+
+def test_section_pairs_do_not_cross(store):
+    rows = store.query(SearchFilter(sections=[("a", "3"), ("b", "5")]), output_fields=["chunk_id"])
+    assert sorted(r["chunk_id"] for r in rows) == ["a-3-0", "a-3-1", "b-5-0", "b-5-1"]
+
+    hits = store.search([np.ones(DIM).tolist()], top_k=10, filters=SearchFilter(sections=[("b", "3")]), output_fields=["chunk_id"])
+    assert sorted(h["chunk_id"] for h in hits[0]) == ["b-3-0", "b-3-1"]
+
+
+def test_section_pairs_combine_with_other_filters(store):
+    f = SearchFilter(doc_ids=["a"], sections=[("a", "3"), ("b", "5")])
+    assert sorted(r["chunk_id"] for r in store.query(f, output_fields=["chunk_id"])) == ["a-3-0", "a-3-1"]
+
+
+QUESTIONS = [
+    "powers and jurisdiction of the special police establishment",
+    "penalty for contravention of an order",
+    "who may constitute the special police force",
+]
+
+
+def _count_searches(monkeypatch):
+    from src.vectorstore.factory import get_vector_store
+
+    store = get_vector_store()
+    calls = []
+    search = store.search
+
+    def counted(vectors, top_k, filters=None, output_fields=None):
+        calls.append(filters)
+        return search(vectors, top_k=top_k, filters=filters, output_fields=output_fields)
+
+    monkeypatch.setattr(store, "search", counted)
+    return calls
+
+
+def test_narrowed_search_above_the_floor_skips_the_full_search(local_index, monkeypatch):
+    from src.retrieval import hybrid_retriever
+    from src.retrieval.hybrid_retriever import embed_query, section_filter
+
+    pairs = set(section_filter(embed_query(QUESTIONS[0])).sections)
+    calls = _count_searches(monkeypatch)
+    # one chunk per section in the benchmark corpus: fewer than top_k, more than the floor
+    chunks = hybrid_retriever.search_similar_chunks(QUESTIONS[0], top_k=len(pairs) + 4)
+    assert len(calls) == 1 and calls[0].sections
+    assert len(chunks) == len(pairs)
+    assert all((c["doc_id"], c["section_id"]) in pairs for c in chunks)
+
+
+def test_short_narrowed_search_is_merged_with_the_full_one_by_score(local_index, monkeypatch):
+    from src.retrieval import hybrid_retriever
+
+    top_k = hybrid_retriever.SECTION_TOP_K + 4
+    monkeypatch.setattr(hybrid_retriever, "NARROW_MIN_HITS", top_k)
+    calls = _count_searches(monkeypatch)
+    chunks = hybrid_retriever.search_similar_chunks(QUESTIONS[0], top_k=top_k)
+    assert len(calls) == 2
+    assert len(chunks) == min(top_k, local_index)
+    assert len({c["chunk_id"] for c in chunks}) == len(chunks)
+    scores = [c["score"] for c in chunks]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_batch_retrieves_like_single_queries(local_index):
+    from src.retrieval.hybrid_retriever import search_similar_chunks, search_similar_chunks_batch
+
+    batch = search_similar_chunks_batch(QUESTIONS, top_k=5)
+    single = [search_similar_chunks(q, top_k=5) for q in QUESTIONS]
+    assert [[c["chunk_id"] for c in hits] for hits in batch] == [[c["chunk_id"] for c in hits] for hits in single]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import socket
+import threading
+import time
+
+import pytest
+
+from src.inference.sidecar import _FRAME, SidecarClient, SidecarUnavailable, _encode_frame, _recv_exact
+
+
+class _FakeSidecar:
+    # answers {"op": "stats"} frames; `behaviour` decides per received frame
+    # whether to reply, hang up, or stall past the client's timeout
+
+    def __init__(self, path, behaviour) -> None:
+        self.frames = 0
+        self.behaviour = behaviour
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(str(path))
+        self.server.listen()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    head_len, body_len = _FRAME.unpack(_recv_exact(conn, _FRAME.size))
+                    _recv_exact(conn, head_len + body_len)
+                except ConnectionError:
+                    return
+                self.frames += 1
+                action = self.behaviour(self.frames)
+                if action == "hang_up":
+                    return
+                if action == "stall":
+                    time.sleep(0.5)
+                try:
+                    conn.sendall(_encode_frame({"ok": True, "stats": {"frame": self.frames}}))
+                except OSError:
+                    return  # the client gave up on a stalled reply
+
+    def close(self) -> None:
+        self.server.close()
+
+
+def test_reconnects_once_after_a_restart(tmp_path):
+    sidecar = _FakeSidecar(tmp_path / "s.sock", lambda n: "hang_up" if n == 1 else "reply")
+    try:
+        assert SidecarClient(str(tmp_path / "s.sock"), timeout_s=2).stats() == {"frame": 2}
+    finally:
+        sidecar.close()
+
+
+def test_timeout_is_not_retried(tmp_path):
+    sidecar = _FakeSidecar(tmp_path / "s.sock", lambda n: "stall")
+    client = SidecarClient(str(tmp_path / "s.sock"), timeout_s=0.1)
+    try:
+        with pytest.raises(SidecarUnavailable, match="timed out"):
+            client.stats()
+        time.sleep(0.2)
+        # the slow request ran once, and its late reply does not leak into the next call
+        assert sidecar.frames == 1
+        assert client._local.sock is None
+    finally:
+        sidecar.close()
+
+
+def test_missing_socket_is_unavailable(tmp_path):
+    with pytest.raises(SidecarUnavailable, match="not reachable"):
+        SidecarClient(str(tmp_path / "none.sock"), timeout_s=0.1).stats()
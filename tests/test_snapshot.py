@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.pipelines.snapshot import export_snapshot, import_snapshot
+from src.vectorstore import chunk_store, factory
+from src.vectorstore.base import SearchFilter
+from src.vectorstore.chunk_store import ChunkTextStore
+from src.vectorstore.local_store import LocalVectorStore
+
+
+def _fresh_stores(root):
+    factory._store = LocalVectorStore(root / "vectorstore")
+    factory._section_store = LocalVectorStore(root / "vectorstore_sections")
+    chunk_store._chunk_store = ChunkTextStore(root / "chunk_store")
+
+
+def _search(store, query):
+    return [(h["chunk_id"], round(h["score"], 5)) for h in store.search([query], top_k=5, output_fields=["chunk_id"])[0]]
+
+
+def test_export_then_import_round_trips(local_index, tmp_path):
+    store = factory.get_vector_store()
+    # deleted rows must neither be exported nor size the embeddings file
+    assert store.delete(doc_ids=["dspe-1946"]) > 0
+    live = store.count()
+    query = np.asarray(store.query(SearchFilter(doc_ids=["eca-1955"]), output_fields=["embedding"])[0]["embedding"]).tolist()
+    before = _search(store, query)
+    sections_before = factory.get_section_store().count()
+
+    manifest = export_snapshot(tmp_path / "snap")
+    assert manifest["parts"]["chunks"]["rows"] == live
+    assert np.load(tmp_path / "snap" / manifest["parts"]["chunks"]["embeddings"], mmap_mode="r").shape[0] == live
+    assert not list((tmp_path / "snap").glob("*.part"))
+
+    _fresh_stores(tmp_path / "imported")
+    counts = import_snapshot(tmp_path / "snap", bulk=False)
+    assert counts == {"chunks": live, "sections": sections_before}
+    assert factory.get_vector_store().count() == live
+    assert _search(factory.get_vector_store(), query) == before
+    first = before[0][0]
+    assert chunk_store.get_chunk_store().get_many([first])[first]["text"]
+
+    with pytest.raises(RuntimeError, match="not empty"):
+        import_snapshot(tmp_path / "snap", bulk=False)
+
+
+def test_import_rejects_a_snapshot_of_another_dim(local_index, tmp_path):
+    manifest = export_snapshot(tmp_path / "snap")
+    root = tmp_path / "imported"
+    factory._store = LocalVectorStore(root / "vectorstore", dim=manifest["dim"] + 8)
+    factory._section_store = LocalVectorStore(root / "vectorstore_sections")
+    chunk_store._chunk_store = ChunkTextStore(root / "chunk_store")
+
+    with pytest.raises(ValueError, match=f"dim {manifest['dim']}"):
+        import_snapshot(tmp_path / "snap", bulk=False)
+    # rejected up front: nothing written to either store
+    assert factory.get_vector_store().count() == 0
+    assert factory.get_section_store().count() == 0